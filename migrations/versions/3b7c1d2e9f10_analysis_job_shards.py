@@ -0,0 +1,45 @@
+"""analysis job shards
+
+Revision ID: 3b7c1d2e9f10
+Revises: ee4bd7764a39
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c1d2e9f10'
+down_revision: Union[str, Sequence[str], None] = 'ee4bd7764a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_job_shards',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('job_id', sa.BigInteger(), nullable=False),
+    sa.Column('idx', sa.Integer(), nullable=False),
+    sa.Column('date_from', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('date_to', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('partial', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['analysis_jobs.id'], name=op.f('fk_analysis_job_shards_job_id_analysis_jobs'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_analysis_job_shards')),
+    sa.UniqueConstraint('job_id', 'idx', name='uq_analysis_job_shards_job_idx')
+    )
+    op.create_index('idx_analysis_job_shards_job_status', 'analysis_job_shards', ['job_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_job_shards_job_status', table_name='analysis_job_shards')
+    op.drop_table('analysis_job_shards')
@@ -0,0 +1,35 @@
+"""analysis job scope fingerprint
+
+Revision ID: 8d4e2a6b1c35
+Revises: 5a1f0c3d7b22
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e2a6b1c35'
+down_revision: Union[str, Sequence[str], None] = '5a1f0c3d7b22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_jobs', sa.Column('scope_fingerprint', sa.String(), nullable=True))
+    op.create_index(
+        'idx_analysis_jobs_fingerprint_done',
+        'analysis_jobs',
+        ['scope_fingerprint', 'finished_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'DONE'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_jobs_fingerprint_done', table_name='analysis_jobs')
+    op.drop_column('analysis_jobs', 'scope_fingerprint')
@@ -0,0 +1,46 @@
+"""source x topic x day breakdown cube
+
+Revision ID: a3d9e5c7f1b4
+Revises: f2c8a6d4b1e9
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d9e5c7f1b4'
+down_revision: Union[str, Sequence[str], None] = 'f2c8a6d4b1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'overview_reports',
+        sa.Column(
+            'breakdown',
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        'analysis_day_aggregates',
+        sa.Column(
+            'topics',
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'[]'::jsonb"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('analysis_day_aggregates', 'topics')
+    op.drop_column('overview_reports', 'breakdown')
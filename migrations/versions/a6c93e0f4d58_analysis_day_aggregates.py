@@ -0,0 +1,45 @@
+"""analysis day aggregates
+
+Revision ID: a6c93e0f4d58
+Revises: 8d4e2a6b1c35
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c93e0f4d58'
+down_revision: Union[str, Sequence[str], None] = '8d4e2a6b1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analysis_day_aggregates',
+    sa.Column('job_id', sa.BigInteger(), nullable=False),
+    sa.Column('source_id', sa.BigInteger(), nullable=False),
+    sa.Column('day', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('agg_key', sa.String(), nullable=False),
+    sa.Column('docs_fetched', sa.Integer(), nullable=False),
+    sa.Column('max_doc_id', sa.BigInteger(), nullable=True),
+    sa.Column('docs_matched', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('neg', sa.Integer(), nullable=False),
+    sa.Column('neu', sa.Integer(), nullable=False),
+    sa.Column('pos', sa.Integer(), nullable=False),
+    sa.Column('sentiment_mode', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['analysis_jobs.id'], name=op.f('fk_analysis_day_aggregates_job_id_analysis_jobs'), ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['source_id'], ['sources.id'], name=op.f('fk_analysis_day_aggregates_source_id_sources'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'source_id', 'day', name=op.f('pk_analysis_day_aggregates'))
+    )
+    op.create_index('idx_analysis_day_aggregates_lookup', 'analysis_day_aggregates', ['agg_key', 'source_id', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_day_aggregates_lookup', table_name='analysis_day_aggregates')
+    op.drop_table('analysis_day_aggregates')
@@ -0,0 +1,40 @@
+"""incremental ingestion cursors
+
+Revision ID: b5e8d2f4a9c6
+Revises: a3d9e5c7f1b4
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e8d2f4a9c6'
+down_revision: Union[str, Sequence[str], None] = 'a3d9e5c7f1b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=True))
+    # один курсор инкрементальной загрузки на источник
+    op.create_index(
+        'uq_ingestion_jobs_incremental_source',
+        'ingestion_jobs',
+        ['source_id', 'kind'],
+        unique=True,
+        postgresql_where=sa.text("kind = 'INCREMENTAL'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'uq_ingestion_jobs_incremental_source',
+        table_name='ingestion_jobs',
+        postgresql_where=sa.text("kind = 'INCREMENTAL'"),
+    )
+    op.drop_column('ingestion_jobs', 'next_run_at')
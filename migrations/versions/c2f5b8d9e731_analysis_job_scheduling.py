@@ -0,0 +1,33 @@
+"""analysis job scheduling: size class, priority
+
+Revision ID: c2f5b8d9e731
+Revises: a6c93e0f4d58
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f5b8d9e731'
+down_revision: Union[str, Sequence[str], None] = 'a6c93e0f4d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_jobs', sa.Column('docs_estimate', sa.Integer(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('size_class', sa.String(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('priority', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_index('idx_analysis_jobs_account_status', 'analysis_jobs', ['account_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_jobs_account_status', table_name='analysis_jobs')
+    op.drop_column('analysis_jobs', 'priority')
+    op.drop_column('analysis_jobs', 'size_class')
+    op.drop_column('analysis_jobs', 'docs_estimate')
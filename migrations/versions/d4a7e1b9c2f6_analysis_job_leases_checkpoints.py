@@ -0,0 +1,63 @@
+"""analysis job leases, heartbeats and checkpoints
+
+Revision ID: d4a7e1b9c2f6
+Revises: c2f5b8d9e731
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e1b9c2f6'
+down_revision: Union[str, Sequence[str], None] = 'c2f5b8d9e731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_jobs', sa.Column('lease_owner', sa.String(), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('analysis_jobs', sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column(
+        'analysis_jobs',
+        sa.Column('checkpoint', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    )
+    op.create_index(
+        'idx_analysis_jobs_lease_running',
+        'analysis_jobs',
+        ['lease_expires_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'RUNNING'"),
+    )
+
+    op.add_column('analysis_job_shards', sa.Column('lease_owner', sa.String(), nullable=True))
+    op.add_column('analysis_job_shards', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('analysis_job_shards', sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_index(
+        'idx_analysis_job_shards_lease_running',
+        'analysis_job_shards',
+        ['lease_expires_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'RUNNING'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_analysis_job_shards_lease_running', table_name='analysis_job_shards', postgresql_where=sa.text("status = 'RUNNING'"))
+    op.drop_column('analysis_job_shards', 'attempts')
+    op.drop_column('analysis_job_shards', 'lease_expires_at')
+    op.drop_column('analysis_job_shards', 'lease_owner')
+
+    op.drop_index('idx_analysis_jobs_lease_running', table_name='analysis_jobs', postgresql_where=sa.text("status = 'RUNNING'"))
+    op.drop_column('analysis_jobs', 'checkpoint')
+    op.drop_column('analysis_jobs', 'attempts')
+    op.drop_column('analysis_jobs', 'heartbeat_at')
+    op.drop_column('analysis_jobs', 'lease_expires_at')
+    op.drop_column('analysis_jobs', 'lease_owner')
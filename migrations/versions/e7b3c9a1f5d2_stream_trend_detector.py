@@ -0,0 +1,75 @@
+"""online trend detector for stream sources
+
+Revision ID: e7b3c9a1f5d2
+Revises: d4a7e1b9c2f6
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c9a1f5d2'
+down_revision: Union[str, Sequence[str], None] = 'd4a7e1b9c2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('trend_events', 'job_id', existing_type=sa.BigInteger(), nullable=True)
+    op.add_column('trend_events', sa.Column('source_id', sa.BigInteger(), nullable=True))
+    op.add_column(
+        'trend_events',
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_foreign_key(
+        op.f('fk_trend_events_source_id_sources'),
+        'trend_events', 'sources',
+        ['source_id'], ['id'],
+        ondelete='CASCADE',
+    )
+    op.create_check_constraint(
+        op.f('ck_trend_events_owner'),
+        'trend_events',
+        'job_id IS NOT NULL OR source_id IS NOT NULL',
+    )
+    op.create_index(
+        'idx_trend_events_source_ts',
+        'trend_events',
+        ['source_id', 'ts'],
+        unique=False,
+        postgresql_where=sa.text('source_id IS NOT NULL'),
+    )
+
+    op.create_table(
+        'stream_trend_states',
+        sa.Column('source_id', sa.BigInteger(), nullable=False),
+        sa.Column('state', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['source_id'], ['sources.id'],
+            name=op.f('fk_stream_trend_states_source_id_sources'),
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('source_id', name=op.f('pk_stream_trend_states')),
+    )
+
+    op.create_index('idx_documents_source_id', 'documents', ['source_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_documents_source_id', table_name='documents')
+    op.drop_table('stream_trend_states')
+
+    op.drop_index('idx_trend_events_source_ts', table_name='trend_events', postgresql_where=sa.text('source_id IS NOT NULL'))
+    op.drop_constraint(op.f('ck_trend_events_owner'), 'trend_events', type_='check')
+    op.drop_constraint(op.f('fk_trend_events_source_id_sources'), 'trend_events', type_='foreignkey')
+    op.execute('DELETE FROM trend_events WHERE job_id IS NULL')
+    op.drop_column('trend_events', 'created_at')
+    op.drop_column('trend_events', 'source_id')
+    op.alter_column('trend_events', 'job_id', existing_type=sa.BigInteger(), nullable=False)
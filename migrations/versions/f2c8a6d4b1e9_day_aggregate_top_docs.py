@@ -0,0 +1,36 @@
+"""top negative documents per day aggregate
+
+Revision ID: f2c8a6d4b1e9
+Revises: e7b3c9a1f5d2
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a6d4b1e9'
+down_revision: Union[str, Sequence[str], None] = 'e7b3c9a1f5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'analysis_day_aggregates',
+        sa.Column(
+            'top_docs',
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'[]'::jsonb"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('analysis_day_aggregates', 'top_docs')
@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Optional
+
+import httpx
+
+
+DEFAULT_PATHS = [
+    "/api/analysis/jobs/{job_id}",
+    "/api/analysis/jobs/{job_id}/overview",
+    "/api/analysis/jobs",
+    "/api/sources",
+]
+
+
+# utils
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    xs = sorted(values)
+    k = max(0, min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1)))))
+    return xs[k]
+
+
+async def login(base_url: str, email: str, password: str) -> str:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as c:
+        r = await c.post("/api/auth/login", json={"email": email, "password": password})
+        r.raise_for_status()
+        return r.json()["access_token"]
+
+
+# load
+async def poller(
+    client: httpx.AsyncClient,
+    paths: list[str],
+    deadline: float,
+    latencies: dict[str, list[float]],
+    errors: dict[str, int],
+) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            ok = r.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+
+        if ok:
+            latencies[path].append(dt_ms)
+        else:
+            errors[path] += 1
+
+
+async def run_load(
+    base_url: str,
+    token: str,
+    paths: list[str],
+    concurrency: int,
+    duration: float,
+) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(poller(client, paths, deadline, latencies, errors) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    return latencies, errors, elapsed
+
+
+def print_report(title: str, latencies: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> None:
+    total = sum(len(v) for v in latencies.values())
+    print(f"\n== {title}: {total} ok requests in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f} rps)")
+    print(f"{'path':<45} {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'err':>5}")
+
+    for path in sorted(set(latencies) | set(errors)):
+        xs = latencies.get(path, [])
+        print(
+            f"{path:<45} {len(xs):>7} "
+            f"{statistics.median(xs) if xs else 0.0:>8.1f} "
+            f"{percentile(xs, 95):>8.1f} "
+            f"{percentile(xs, 99):>8.1f} "
+            f"{max(xs) if xs else 0.0:>8.1f} "
+            f"{errors.get(path, 0):>5}"
+        )
+
+
+# main
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Tail latency of API polling endpoints under concurrent clients (ms)"
+    )
+
+    ap.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://localhost:8080"))
+    ap.add_argument(
+        "--compare-url",
+        default=os.getenv("BENCH_COMPARE_URL"),
+        help="Second deployment (e.g. previous sync build) to run the same load against",
+    )
+    ap.add_argument("--token", default=os.getenv("BENCH_TOKEN"))
+    ap.add_argument("--email", default=os.getenv("BENCH_EMAIL"))
+    ap.add_argument("--password", default=os.getenv("BENCH_PASSWORD"))
+    ap.add_argument("--job-id", type=int, required=True)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds per run")
+    ap.add_argument("--path", action="append", dest="paths", help="override polled paths ({job_id} is substituted)")
+
+    args = ap.parse_args()
+
+    paths = [p.format(job_id=args.job_id) for p in (args.paths or DEFAULT_PATHS)]
+
+    targets = [args.base_url] + ([args.compare_url] if args.compare_url else [])
+    for base_url in targets:
+        token: Optional[str] = args.token
+        if not token:
+            if not args.email or not args.password:
+                raise ValueError("Pass --token or --email/--password")
+            token = asyncio.run(login(base_url, args.email, args.password))
+
+        latencies, errors, elapsed = asyncio.run(
+            run_load(base_url, token, paths, args.concurrency, args.duration)
+        )
+        print_report(f"{base_url} concurrency={args.concurrency}", latencies, errors, elapsed)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,95 @@
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+import numpy as np
+
+from src.app.domain.services.trend_detection import (
+    detect_trends,
+    detect_trends_array,
+    detect_trends_reference,
+)
+
+
+# utils
+def make_series(n_series: int, hours: int, seed: int, fractional: bool) -> np.ndarray:
+    """
+    Почасовые счётчики документов: суточная сезонность, шум и редкие всплески.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    base = rng.uniform(5, 200, size=(n_series, 1))
+    daily = 1.0 + 0.5 * np.sin(2 * np.pi * (t % 24) / 24.0)
+    values = rng.poisson(base * daily).astype(np.float64)
+
+    spikes = rng.random(values.shape) < 0.001
+    values[spikes] *= rng.uniform(3, 10, size=int(spikes.sum()))
+    values = np.rint(values)
+    if fractional:
+        values += rng.random(values.shape)
+    return values
+
+
+def timed(fn: Callable[[], object], repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+# main
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Rolling z-score trend detection: pure Python reference vs NumPy (seconds, best of N)"
+    )
+    ap.add_argument("--years", type=float, default=3.0, help="length of each hourly series")
+    ap.add_argument("--series", type=int, default=100, help="rows for the 2-D (many sources/topics) run")
+    ap.add_argument("--window", type=int, default=24)
+    ap.add_argument("--z", type=float, default=2.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--fractional", action="store_true", help="non-integer values (two-pass window path)")
+    ap.add_argument("--seed", type=int, default=0)
+
+    args = ap.parse_args()
+
+    hours = int(args.years * 365 * 24)
+    values = make_series(args.series, hours, args.seed, args.fractional)
+    t0 = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    tss = [t0 + timedelta(hours=h) for h in range(hours)]
+
+    series = [{"ts": ts, "value": v} for ts, v in zip(tss, values[0].tolist())]
+    kw = {"window": args.window, "z_threshold": args.z}
+
+    print(f"hourly series: {hours} points ({args.years:g} years), window={args.window}, z={args.z}")
+    print(f"{'run':<40} {'seconds':>10} {'signals':>9}")
+
+    t_ref, ref = timed(lambda: detect_trends_reference(series, **kw), args.repeat)
+    print(f"{'1 series, reference (python)':<40} {t_ref:>10.4f} {len(ref):>9}")
+
+    t_np, got = timed(lambda: detect_trends(series, **kw), args.repeat)
+    print(f"{'1 series, numpy':<40} {t_np:>10.4f} {len(got):>9}   x{t_ref / max(t_np, 1e-9):.1f}")
+
+    same = [(s.ts, s.kind) for s in ref] == [(s.ts, s.kind) for s in got] and all(
+        np.isclose(a.z, b.z) and np.isclose(a.baseline, b.baseline) for a, b in zip(ref, got)
+    )
+    if not same:
+        raise RuntimeError("numpy signals differ from the reference implementation")
+
+    t_2d, rows = timed(lambda: detect_trends_array(values, tss, **kw), args.repeat)
+    total = sum(len(r) for r in rows)
+    print(
+        f"{f'{args.series} series, numpy 2-D':<40} {t_2d:>10.4f} {total:>9}"
+        f"   ~x{t_ref * args.series / max(t_2d, 1e-9):.1f} vs reference (extrapolated)"
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        sys.exit(1)
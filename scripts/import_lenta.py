@@ -1,11 +1,16 @@
 import argparse
 import csv
 import hashlib
+import io
 import json
+import multiprocessing as mp
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Callable, Iterator, Optional
 
 import psycopg2
 from psycopg2.extras import execute_values
@@ -13,6 +18,16 @@ from psycopg2.extras import execute_values
 
 IMPORT_KIND = "LENTA_IMPORT_V1"
 REQUIRED_COLUMNS = {"url", "title", "text", "topic", "tags", "date"}
+DOC_COLUMNS = ("source_id", "published_at", "title", "text", "topic", "url", "url_hash", "meta")
+
+# insert – execute_values + ON CONFLICT (батчи по --batch-size),
+# copy – COPY FROM STDIN в UNLOGGED staging и один INSERT ... SELECT на чанк (--chunk-size),
+# bulk – copy без поддержки вторичных индексов documents во время загрузки (пересоздаются в конце)
+IMPORT_MODES = ("insert", "copy", "bulk")
+
+# pg_advisory_lock(ns, job_id) на всё время импорта: живой процесс держит его, у убитого он снят.
+# Пространство ключей отдельное от блокировок приложения (ADVISORY_NS_ACCOUNT_JOBS = 1)
+ADVISORY_NS_INGESTION_JOBS = 2
 
 
 # utils
@@ -132,13 +147,365 @@ def finish_ingestion_error(conn, job_id: int, error: str) -> None:
     conn.commit()
 
 
+def lock_ingestion_job(conn, job_id: int) -> None:
+    """
+    Сессионная блокировка задачи: держится до закрытия соединения (или смерти процесса).
+    """
+    with conn.cursor() as cur:
+        cur.execute("select pg_try_advisory_lock(%s, %s)", (ADVISORY_NS_INGESTION_JOBS, job_id))
+        locked = cur.fetchone()[0]
+    conn.commit()
+    if not locked:
+        raise RuntimeError(f"ingestion_job_id={job_id} is already running in another process")
+
+
+def resume_ingestion_job(conn, job_id: int) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            update ingestion_jobs
+            set status = 'RUNNING',
+                finished_at = null,
+                error = null
+            where id = %s
+            """,
+            (job_id,),
+        )
+    conn.commit()
+
+
+# checkpoints (--resume)
+# Отпечаток – размер и sha256 начала файла: полный хэш многогигабайтного CSV – сам по себе долгий проход
+FINGERPRINT_HEAD_BYTES = 1 << 20
+
+
+def file_fingerprint(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(FINGERPRINT_HEAD_BYTES)
+    return f"{os.path.getsize(path)}:{hashlib.sha256(head).hexdigest()}"
+
+
+class Checkpoint:
+    """
+    Позиция импорта в ingestion_jobs.stats["checkpoint"]: смещение в байтах сразу после последней
+    закоммиченной строки CSV, номер этой строки, вставлено документов всего и отпечаток файла.
+    Пишется в той же транзакции, что и данные, – смещение никогда не опережает закоммиченные строки.
+    """
+
+    def __init__(self, job_id: int, fingerprint: str, offset: int = 0, row: int = 0, inserted: int = 0):
+        self.job_id = job_id
+        self.fingerprint = fingerprint
+        self.offset = offset
+        self.row = row
+        self.inserted = inserted
+
+    def to_dict(self) -> dict:
+        return {
+            "offset": self.offset,
+            "row": self.row,
+            "inserted": self.inserted,
+            "fingerprint": self.fingerprint,
+        }
+
+    @classmethod
+    def from_dict(cls, job_id: int, d: dict) -> "Checkpoint":
+        return cls(
+            job_id,
+            str(d["fingerprint"]),
+            offset=int(d["offset"]),
+            row=int(d["row"]),
+            inserted=int(d["inserted"]),
+        )
+
+    def save(self, cur, pos: Optional[tuple[int, int]], inserted: int) -> None:
+        """
+        pos – (смещение, номер строки) конца последнего блока в транзакции; inserted – всего с начала файла.
+        """
+        if pos is None:
+            return
+        self.offset, self.row = pos
+        self.inserted = inserted
+        cur.execute(
+            """
+            update ingestion_jobs
+            set stats = stats || jsonb_build_object('checkpoint', %s::jsonb)
+            where id = %s
+            """,
+            (json.dumps(self.to_dict()), self.job_id),
+        )
+
+
+def find_resumable_ingestion(conn, source_id: int, kind: str) -> Optional[Checkpoint]:
+    """
+    Последний прерванный импорт (ERROR или RUNNING после убитого процесса) с чекпоинтом.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            select id, stats -> 'checkpoint'
+            from ingestion_jobs
+            where source_id = %s
+              and kind = %s
+              and status in ('ERROR', 'RUNNING')
+              and stats ? 'checkpoint'
+            order by id desc
+            limit 1
+            """,
+            (source_id, kind),
+        )
+        row = cur.fetchone()
+    return Checkpoint.from_dict(int(row[0]), row[1]) if row else None
+
+
+def resumable_checkpoint(conn, source_id: int, kind: str, fingerprint: str) -> Optional[Checkpoint]:
+    """
+    Чекпоинт прерванного импорта того же файла; None – импорт начинается сначала.
+    """
+    checkpoint = find_resumable_ingestion(conn, source_id, kind)
+    if checkpoint is None:
+        print("[RESUME] no interrupted ingestion with a checkpoint, starting from the beginning")
+    elif checkpoint.fingerprint != fingerprint:
+        print(f"[RESUME] file changed since ingestion_job_id={checkpoint.job_id}, starting from the beginning")
+        return None
+    return checkpoint
+
+
 # documents import
-def flush_batch(conn, batch) -> int:
+def open_csv(lines: Iterator[str]) -> tuple[Iterator[list[str]], dict[str, int]]:
+    """
+    csv.reader поверх строк файла и индексы колонок по заголовку (обязательные – REQUIRED_COLUMNS).
+    """
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV has no header")
+
+    missing = REQUIRED_COLUMNS - set(header)
+    if missing:
+        raise ValueError(f"CSV missing columns: {sorted(missing)}")
+    return reader, {name: i for i, name in enumerate(header)}
+
+
+def normalize_row(values: list[str], columns: dict[str, int], source_id: int) -> Optional[tuple]:
+    """
+    Строка CSV -> кортеж колонок documents (DOC_COLUMNS) или None, если строка отбрасывается.
+    """
+    def field(name: str) -> str:
+        i = columns[name]
+        return values[i].strip() if i < len(values) else ""
+
+    url = field("url")
+    text = field("text")
+    date_s = field("date")
+
+    if not url or not text or not date_s:
+        return None
+
+    try:
+        published_at = parse_date_yyyy_mm_dd(date_s)
+    except Exception:
+        return None
+
+    title = field("title") or None
+    topic = field("topic") or None
+    tags = field("tags") or None
+
+    meta = {}
+    if tags:
+        meta["tags"] = tags
+
+    return (
+        source_id,
+        published_at,
+        title,
+        text,
+        topic,
+        url,
+        sha256_hex(url),
+        json.dumps(meta),
+    )
+
+
+def _read_lines(f, pos: dict) -> Iterator[str]:
+    # бинарное чтение построчно: pos["offset"] – байт сразу после последней отданной строки.
+    # csv.reader забирает строки по одной и останавливается на конце записи (в т.ч. многострочной),
+    # поэтому после каждой записи смещение указывает ровно на начало следующей
+    for raw in iter(f.readline, b""):
+        pos["offset"] += len(raw)
+        yield raw.decode("utf-8")
+
+
+def iter_blocks(
+    csv_path: str,
+    limit: Optional[int],
+    stats: dict,
+    block_rows: int,
+    offset: int = 0,
+) -> Iterator[tuple[list[list[str]], dict[str, int], tuple[int, int]]]:
+    """
+    Сырые строки CSV блоками по block_rows и позиция конца блока (смещение в байтах, номер строки);
+    stats["processed"] – прочитано записей (пустые строки не считаются, как в csv.DictReader; ровно limit,
+    а не limit + 1, как считал прежний цикл). offset > 0 – продолжение с чекпоинта:
+    заголовок читается из начала файла, затем чтение продолжается с offset.
+    """
+    with open(csv_path, "rb") as f:
+        pos = {"offset": 0}
+        reader, columns = open_csv(_read_lines(f, pos))
+        if offset:
+            f.seek(offset)
+            pos["offset"] = offset
+
+        block: list[list[str]] = []
+        for values in reader:
+            if not values:
+                continue
+            if limit and stats["processed"] >= limit:
+                break
+            stats["processed"] += 1
+            block.append(values)
+            if len(block) >= block_rows:
+                yield block, columns, (pos["offset"], stats["processed"])
+                block = []
+        if block:
+            yield block, columns, (pos["offset"], stats["processed"])
+
+
+def copy_line(doc: tuple) -> str:
+    return "\t".join(_copy_value(v) for v in doc) + "\n"
+
+
+def normalize_block(block: list[list[str]], columns: dict[str, int], source_id: int, as_copy: bool):
+    """
+    CPU-часть импорта: разбор, нормализация, sha256 и (для COPY) кодирование строк.
+    Возвращает (число документов, список кортежей или готовый текст COPY).
+    """
+    docs = [d for d in (normalize_row(v, columns, source_id) for v in block) if d is not None]
+    if as_copy:
+        return len(docs), "".join(copy_line(d) for d in docs)
+    return len(docs), docs
+
+
+# parallel pipeline: reader (поток) -> N процессов normalize_block -> writer (основной поток)
+PIPELINE_BLOCK_ROWS = 500
+# ограниченные очереди (в блоках): reader ждёт, пока воркеры и БД не разберут очередь
+PIPELINE_QUEUE_BLOCKS = 16
+
+
+def _pipeline_worker(in_q, out_q, source_id: int, as_copy: bool) -> None:
+    while True:
+        task = in_q.get()
+        if task is None:
+            out_q.put(None)
+            return
+        seq, block, columns, pos = task
+        try:
+            out_q.put((seq, *normalize_block(block, columns, source_id, as_copy), pos))
+        except Exception as e:
+            out_q.put((seq, -1, f"{type(e).__name__}: {e}", pos))
+
+
+def iter_normalized(
+    csv_path: str,
+    source_id: int,
+    limit: Optional[int],
+    stats: dict,
+    workers: int,
+    as_copy: bool,
+    offset: int = 0,
+) -> Iterator[tuple[int, Any, tuple[int, int]]]:
+    """
+    Нормализованные блоки в порядке файла: (число документов, payload, позиция конца блока).
+    workers=0 – в текущем процессе; иначе reader-поток, workers процессов и упорядочивание
+    результатов по номеру блока – при дублях url в файле вставляется та же строка, что и без пайплайна,
+    а позиции идут монотонно (чекпоинт после коммита покрывает все предыдущие блоки).
+    """
+    blocks = iter_blocks(csv_path, limit, stats, PIPELINE_BLOCK_ROWS, offset)
+    if workers <= 0:
+        for block, columns, pos in blocks:
+            yield (*normalize_block(block, columns, source_id, as_copy), pos)
+        return
+
+    ctx = mp.get_context("spawn")  # без fork: дочерние процессы не наследуют соединение с БД
+    in_q = ctx.Queue(maxsize=PIPELINE_QUEUE_BLOCKS)
+    out_q = ctx.Queue(maxsize=PIPELINE_QUEUE_BLOCKS)
+    procs = [
+        ctx.Process(target=_pipeline_worker, args=(in_q, out_q, source_id, as_copy), daemon=True)
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    failed: list[BaseException] = []
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        # блокирующий put с выходом, если writer уже остановил пайплайн
+        while not stop.is_set():
+            try:
+                in_q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read() -> None:
+        try:
+            for seq, (block, columns, pos) in enumerate(blocks):
+                if not _put((seq, block, columns, pos)):
+                    return
+        except BaseException as e:
+            failed.append(e)
+        finally:
+            for _ in procs:
+                _put(None)
+
+    reader = threading.Thread(target=_read, name="csv-reader", daemon=True)
+    reader.start()
+
+    pending: dict[int, tuple[int, Any, tuple[int, int]]] = {}
+    next_seq = 0
+    finished = 0
+    try:
+        while finished < len(procs):
+            try:
+                item = out_q.get(timeout=1.0)
+            except queue.Empty:
+                if any(p.exitcode not in (None, 0) for p in procs):
+                    raise RuntimeError("import worker process died")
+                continue
+            if item is None:
+                finished += 1
+                continue
+            seq, n, payload, pos = item
+            if n < 0:
+                raise RuntimeError(f"worker failed on block {seq}: {payload}")
+            pending[seq] = (n, payload, pos)
+            while next_seq in pending:
+                yield pending.pop(next_seq)
+                next_seq += 1
+        reader.join()
+        if failed:
+            raise failed[0]
+    finally:
+        stop.set()
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+
+
+# on_commit(cur, inserted) – в той же транзакции перед commit (чекпоинт)
+OnCommit = Optional[Callable[[Any, int], None]]
+
+
+def flush_batch(conn, batch, on_commit: OnCommit = None) -> int:
     """
     Вставка батча в documents с дедупом по (source_id, url_hash).
     """
     with conn.cursor() as cur:
-        execute_values(
+        # батч бывает больше page_size (закрывается на границе блока): rowcount считает только
+        # последнюю страницу, поэтому вставленные строки считаются по RETURNING всех страниц
+        rows = execute_values(
             cur,
             """
             insert into documents(
@@ -153,11 +520,15 @@ def flush_batch(conn, batch) -> int:
             )
             values %s
             on conflict (source_id, url_hash) do nothing
+            returning 1
             """,
             batch,
             page_size=2000,
+            fetch=True,
         )
-        inserted = cur.rowcount or 0
+        inserted = len(rows)
+        if on_commit:
+            on_commit(cur, inserted)
 
     conn.commit()
     return inserted
@@ -169,67 +540,276 @@ def import_csv(
     source_id: int,
     batch_size: int,
     limit: Optional[int],
+    workers: int = 0,
+    checkpoint: Optional[Checkpoint] = None,
 ) -> tuple[int, int]:
-    processed = 0
-    inserted_total = 0
+    stats = {"processed": checkpoint.row if checkpoint else 0}
+    inserted_total = checkpoint.inserted if checkpoint else 0
+    offset = checkpoint.offset if checkpoint else 0
     batch = []
 
-    with open(csv_path, "r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
+    def on_commit(pos: tuple[int, int]) -> OnCommit:
+        if checkpoint is None:
+            return None
+        before = inserted_total
+        return lambda cur, inserted: checkpoint.save(cur, pos, before + inserted)
 
-        if not reader.fieldnames:
-            raise ValueError("CSV has no header")
+    # батч закрывается на границе блока (>= batch_size строк): чекпоинт – конец последнего блока батча
+    for _, docs, pos in iter_normalized(csv_path, source_id, limit, stats, workers, False, offset):
+        batch.extend(docs)
+        if len(batch) >= batch_size:
+            inserted_total += flush_batch(conn, batch, on_commit(pos))
+            batch = []
 
-        missing = REQUIRED_COLUMNS - set(reader.fieldnames)
-        if missing:
-            raise ValueError(f"CSV missing columns: {sorted(missing)}")
+    if batch:
+        inserted_total += flush_batch(conn, batch, on_commit(pos))
 
-        for row in reader:
-            processed += 1
-            if limit and processed > limit:
-                break
+    return stats["processed"], inserted_total
 
-            url = (row.get("url") or "").strip()
-            text = (row.get("text") or "").strip()
-            date_s = (row.get("date") or "").strip()
 
-            if not url or not text or not date_s:
-                continue
-
-            try:
-                published_at = parse_date_yyyy_mm_dd(date_s)
-            except Exception:
-                continue
+# COPY fast path
+def _copy_value(v) -> str:
+    """
+    Значение в текстовом формате COPY: NULL – \\N, спецсимволы экранируются.
+    """
+    if v is None:
+        return "\\N"
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return (
+        str(v)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyStream(io.TextIOBase):
+    """
+    Файлоподобный поток для copy_expert поверх блоков текста COPY: блоки берутся по мере чтения,
+    чанк (max_rows документов, с точностью до блока) целиком в памяти не собирается.
+    """
 
-            title = (row.get("title") or "").strip() or None
-            topic = (row.get("topic") or "").strip() or None
-            tags = (row.get("tags") or "").strip() or None
-
-            meta = {}
-            if tags:
-                meta["tags"] = tags
-
-            batch.append(
-                (
-                    source_id,
-                    published_at,
-                    title,
-                    text,
-                    topic,
-                    url,
-                    sha256_hex(url),
-                    json.dumps(meta),
-                )
+    def __init__(self, blocks: Iterator[tuple[int, str, tuple[int, int]]], max_rows: int):
+        self.blocks = blocks
+        self.max_rows = max_rows
+        self.count = 0
+        self.exhausted = False
+        # позиция в CSV конца последнего отданного блока
+        self.pos: Optional[tuple[int, int]] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        # copy_expert не требует ровно size символов – отдаём целые блоки, без нарезки буфера
+        while self.count < self.max_rows:
+            item = next(self.blocks, None)
+            if item is None:
+                self.exhausted = True
+                return ""
+            n, text, self.pos = item
+            self.count += n
+            if text:
+                return text
+        return ""
+
+
+def create_staging(conn, name: str) -> None:
+    # UNLOGGED: без WAL; после сбоя таблица пустая – это только буфер загрузки
+    with conn.cursor() as cur:
+        cur.execute(f"drop table if exists {name}")
+        cur.execute(
+            f"""
+            create unlogged table {name} (
+                source_id bigint not null,
+                published_at timestamptz not null,
+                title text,
+                text text not null,
+                topic text,
+                url text not null,
+                url_hash text not null,
+                meta jsonb not null
             )
+            """
+        )
+    conn.commit()
+
+
+def drop_staging(conn, name: str) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"drop table if exists {name}")
+    conn.commit()
 
-            if len(batch) >= batch_size:
-                inserted_total += flush_batch(conn, batch)
-                batch.clear()
 
-        if batch:
-            inserted_total += flush_batch(conn, batch)
+def copy_chunk(conn, staging: str, stream: CopyStream, on_commit: OnCommit = None) -> int:
+    """
+    COPY чанка в staging и перенос в documents одним INSERT ... SELECT с дедупом по (source_id, url_hash).
+    """
+    cols = ", ".join(DOC_COLUMNS)
+    with conn.cursor() as cur:
+        cur.copy_expert(f"copy {staging} ({cols}) from stdin", stream, size=1 << 16)
+        cur.execute(
+            f"""
+            insert into documents({cols})
+            select {cols}
+            from {staging}
+            on conflict (source_id, url_hash) do nothing
+            """
+        )
+        inserted = cur.rowcount or 0
+        cur.execute(f"truncate {staging}")
+        if on_commit:
+            on_commit(cur, inserted)
 
-    return processed, inserted_total
+    conn.commit()
+    return inserted
+
+
+def secondary_indexes(conn) -> list[tuple[str, str]]:
+    """
+    Вторичные индексы documents: всё, кроме PK и уникальных (они нужны ON CONFLICT).
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            select i.relname, pg_get_indexdef(i.oid)
+            from pg_index x
+            join pg_class i on i.oid = x.indexrelid
+            where x.indrelid = 'documents'::regclass
+              and not x.indisprimary
+              and not x.indisunique
+            order by i.relname
+            """
+        )
+        return [(str(name), str(ddl)) for name, ddl in cur.fetchall()]
+
+
+def record_dropped_indexes(cur, job_id: int, dropped: list[tuple[str, str]]) -> None:
+    # в той же транзакции, что и drop index: если процесс убьют до пересоздания, DDL не потеряется
+    cur.execute(
+        """
+        update ingestion_jobs
+        set stats = stats || jsonb_build_object('dropped_indexes', %s::jsonb)
+        where id = %s
+        """,
+        (json.dumps([list(x) for x in dropped]), job_id),
+    )
+
+
+def restore_dropped_indexes(conn) -> int:
+    """
+    Пересоздаёт индексы documents, удалённые bulk-импортом, который не дошёл до их пересоздания
+    (процесс убит, OOM): DDL лежит в ingestion_jobs.stats["dropped_indexes"] до конца загрузки.
+    Идущий bulk-импорт (RUNNING, его процесс держит lock_ingestion_job) не трогается.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            select id, status, stats -> 'dropped_indexes'
+            from ingestion_jobs
+            where stats ? 'dropped_indexes'
+              and status in ('ERROR', 'RUNNING')
+            order by id
+            """
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return 0
+
+        restored = 0
+        cur.execute("set maintenance_work_mem = '512MB'")
+        for job_id, status, dropped in rows:
+            if status == "RUNNING":
+                # свободная блокировка – процесс импорта умер; занятая – загрузка ещё идёт
+                cur.execute("select pg_try_advisory_xact_lock(%s, %s)", (ADVISORY_NS_INGESTION_JOBS, job_id))
+                if not cur.fetchone()[0]:
+                    continue
+            for name, ddl in dropped:
+                cur.execute("select to_regclass(%s) is null", (name,))
+                if cur.fetchone()[0]:
+                    cur.execute(ddl)
+                    restored += 1
+            cur.execute("update ingestion_jobs set stats = stats - 'dropped_indexes' where id = %s", (job_id,))
+        if restored:
+            cur.execute("analyze documents")
+    conn.commit()
+    return restored
+
+
+def import_csv_copy(
+    conn,
+    csv_path: str,
+    source_id: int,
+    chunk_size: int,
+    limit: Optional[int],
+    staging: str,
+    defer_indexes: bool = False,
+    workers: int = 0,
+    checkpoint: Optional[Checkpoint] = None,
+    job_id: Optional[int] = None,
+) -> tuple[int, int]:
+    """
+    job_id – задача в ingestion_jobs: в bulk-режиме в её stats на время загрузки сохраняется DDL
+    удалённых индексов (restore_dropped_indexes).
+    """
+    stats = {"processed": checkpoint.row if checkpoint else 0}
+    inserted_total = checkpoint.inserted if checkpoint else 0
+    offset = checkpoint.offset if checkpoint else 0
+    blocks = iter_normalized(csv_path, source_id, limit, stats, workers, True, offset)
+
+    dropped: list[tuple[str, str]] = []
+    with conn.cursor() as cur:
+        # потеря последних коммитов при сбое сервера безопасна – импорт идемпотентен
+        cur.execute("set synchronous_commit = off")
+    create_staging(conn, staging)
+    try:
+        if defer_indexes:
+            dropped = secondary_indexes(conn)
+            with conn.cursor() as cur:
+                if job_id is not None:
+                    record_dropped_indexes(cur, job_id, dropped)
+                for name, _ in dropped:
+                    cur.execute(f"drop index if exists {name}")
+            conn.commit()
+            print(f"[BULK] dropped {len(dropped)} secondary indexes: {', '.join(n for n, _ in dropped) or '-'}")
+
+        while True:
+            started = time.perf_counter()
+            stream = CopyStream(blocks, chunk_size)
+
+            def on_commit(cur, inserted: int) -> None:
+                # поток чанка уже дочитан: stream.pos – конец последнего блока в staging
+                checkpoint.save(cur, stream.pos, inserted_total + inserted)
+
+            inserted = copy_chunk(conn, staging, stream, on_commit if checkpoint else None)
+            inserted_total += inserted
+            if stream.count:
+                elapsed = time.perf_counter() - started
+                print(
+                    f"[CHUNK] rows={stream.count} inserted={inserted} "
+                    f"rows/sec={stream.count / max(elapsed, 1e-9):.0f} processed={stats['processed']}"
+                )
+            if stream.exhausted:
+                break
+    finally:
+        conn.rollback()  # после ошибки транзакция прервана – иначе уборка не выполнится
+        drop_staging(conn, staging)
+        if dropped:
+            # пересоздание индексов одним проходом по таблице вместо поддержки на каждую строку
+            started = time.perf_counter()
+            with conn.cursor() as cur:
+                cur.execute("set maintenance_work_mem = '512MB'")
+                for _, ddl in dropped:
+                    cur.execute(ddl)
+                cur.execute("analyze documents")
+                if job_id is not None:
+                    cur.execute("update ingestion_jobs set stats = stats - 'dropped_indexes' where id = %s", (job_id,))
+            conn.commit()
+            print(f"[BULK] rebuilt {len(dropped)} indexes in {time.perf_counter() - started:.1f}s")
+
+    return stats["processed"], inserted_total
 
 
 # main
@@ -241,6 +821,20 @@ def main() -> None:
     ap.add_argument("--source-name", default=os.getenv("SOURCE_NAME", "Lenta (historical)"))
     ap.add_argument("--batch-size", type=int, default=int(os.getenv("BATCH_SIZE", "2000")))
     ap.add_argument("--limit", type=int, default=None if os.getenv("LIMIT") is None else int(os.getenv("LIMIT")))
+    ap.add_argument("--mode", choices=IMPORT_MODES, default=os.getenv("IMPORT_MODE", "copy"))
+    ap.add_argument(
+        "--workers", type=int,
+        default=int(os.getenv("IMPORT_WORKERS", str(max(0, min(4, (os.cpu_count() or 1) - 1))))),
+        help="parse/hash processes; 0 – in the main process",
+    )
+    ap.add_argument(
+        "--chunk-size", type=int, default=int(os.getenv("CHUNK_SIZE", "50000")),
+        help="rows per COPY + INSERT ... SELECT (copy/bulk modes)",
+    )
+    ap.add_argument(
+        "--resume", action="store_true", default=os.getenv("IMPORT_RESUME", "").lower() in ("1", "true", "yes"),
+        help="continue the last interrupted import of this file from its checkpoint",
+    )
 
     args = ap.parse_args()
 
@@ -253,21 +847,58 @@ def main() -> None:
     try:
         source_id = ensure_source_global(conn, args.source_name)
 
+        restored = restore_dropped_indexes(conn)
+        if restored:
+            print(f"[BULK] restored {restored} indexes dropped by an interrupted bulk import")
+
         if has_done_ingestion(conn, source_id, IMPORT_KIND):
             print(f"[SKIP] Ingestion already DONE for source_id={source_id}, kind={IMPORT_KIND}")
             return
 
-        ingestion_job_id = start_ingestion_job(conn, source_id, IMPORT_KIND)
-        print(f"[START] ingestion_job_id={ingestion_job_id}, source_id={source_id}")
-
-        try:
-            processed, inserted = import_csv(
-                conn,
-                csv_path=args.csv,
-                source_id=source_id,
-                batch_size=args.batch_size,
-                limit=args.limit,
+        fingerprint = file_fingerprint(args.csv)
+        checkpoint = resumable_checkpoint(conn, source_id, IMPORT_KIND, fingerprint) if args.resume else None
+        if checkpoint is not None:
+            ingestion_job_id = checkpoint.job_id
+            lock_ingestion_job(conn, ingestion_job_id)
+            resume_ingestion_job(conn, ingestion_job_id)
+            print(
+                f"[RESUME] ingestion_job_id={ingestion_job_id}, source_id={source_id}, "
+                f"offset={checkpoint.offset}, row={checkpoint.row}, inserted={checkpoint.inserted}"
             )
+        else:
+            ingestion_job_id = start_ingestion_job(conn, source_id, IMPORT_KIND)
+            lock_ingestion_job(conn, ingestion_job_id)
+            checkpoint = Checkpoint(ingestion_job_id, fingerprint)
+            print(f"[START] ingestion_job_id={ingestion_job_id}, source_id={source_id}")
+        resumed_from_row = checkpoint.row
+
+        started = time.perf_counter()
+        try:
+            if args.mode == "insert":
+                processed, inserted = import_csv(
+                    conn,
+                    csv_path=args.csv,
+                    source_id=source_id,
+                    batch_size=args.batch_size,
+                    limit=args.limit,
+                    workers=args.workers,
+                    checkpoint=checkpoint,
+                )
+            else:
+                processed, inserted = import_csv_copy(
+                    conn,
+                    csv_path=args.csv,
+                    source_id=source_id,
+                    chunk_size=args.chunk_size,
+                    limit=args.limit,
+                    staging=f"documents_import_stage_{ingestion_job_id}",
+                    defer_indexes=args.mode == "bulk",
+                    workers=args.workers,
+                    checkpoint=checkpoint,
+                    job_id=ingestion_job_id,
+                )
+            seconds = time.perf_counter() - started
+            rows_per_sec = (processed - resumed_from_row) / max(seconds, 1e-9)
 
             finish_ingestion_ok(
                 conn,
@@ -278,12 +909,18 @@ def main() -> None:
                     "csv_path": args.csv,
                     "source_id": source_id,
                     "kind": IMPORT_KIND,
+                    "mode": args.mode,
+                    "workers": args.workers,
+                    "seconds": round(seconds, 3),
+                    "rows_per_sec": round(rows_per_sec, 1),
+                    "resumed_from_row": resumed_from_row,
                 },
             )
 
-            print("[DONE]")
+            print(f"[DONE] mode={args.mode} workers={args.workers}")
             print(f"Processed rows: {processed}")
             print(f"Inserted rows:  {inserted}")
+            print(f"Elapsed:        {seconds:.1f}s ({rows_per_sec:.0f} rows/sec)")
 
         except Exception as e:
             finish_ingestion_error(conn, ingestion_job_id, str(e))
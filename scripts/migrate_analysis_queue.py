@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import sys
+
+import aio_pika
+from aio_pika.exceptions import ChannelNotFoundEntity
+
+from src.app.infra.db import SessionLocal
+from src.app.infra.mq import (
+    ANALYSIS_QUEUE_NAME,
+    QUEUE_NAME,
+    RABBIT_URL,
+    RabbitJobQueue,
+    analysis_queue,
+    broker,
+    deferred_queue,
+)
+from src.app.infra.uow import SqlAlchemyUoW
+from src.app.services.analysis_service import AnalysisService
+
+
+# utils
+def pending_messages() -> list[tuple[dict, int]]:
+    db = SessionLocal()
+    try:
+        return AnalysisService(SqlAlchemyUoW(db)).pending_messages()
+    finally:
+        db.close()
+
+
+async def legacy_queue_state(conn: aio_pika.abc.AbstractConnection, name: str) -> tuple[int, int] | None:
+    """
+    (сообщений, консьюмеров) старой очереди; None – очереди нет.
+    passive-объявление не трогает аргументы, поэтому не конфликтует с x-max-priority.
+    """
+    channel = await conn.channel()
+    try:
+        q = await channel.declare_queue(name, passive=True)
+    except ChannelNotFoundEntity:
+        return None
+    res = q.declaration_result
+    await channel.close()
+    return res.message_count, res.consumer_count
+
+
+# main
+async def migrate(keep_legacy: bool) -> None:
+    if ANALYSIS_QUEUE_NAME == QUEUE_NAME:
+        raise RuntimeError("ANALYSIS_QUEUE_NAME must differ from QUEUE_NAME")
+
+    conn = await aio_pika.connect_robust(RABBIT_URL)
+    try:
+        state = await legacy_queue_state(conn, QUEUE_NAME)
+        if state is None:
+            print(f"[QUEUE] legacy queue {QUEUE_NAME!r} not found")
+        else:
+            messages, consumers = state
+            print(f"[QUEUE] legacy queue {QUEUE_NAME!r}: {messages} messages, {consumers} consumers")
+            if consumers and not keep_legacy:
+                raise RuntimeError(
+                    f"legacy queue {QUEUE_NAME!r} still has consumers: stop old workers first"
+                )
+
+        # Источник истины – БД: все PENDING задачи и шарды заново публикуются в новую очередь
+        # (дубли безопасны: claim атомарен). Сообщения RUNNING задач из старой очереди
+        # не нужны – по истечении lease их вернёт reaper.
+        queue = RabbitJobQueue(broker)
+        await queue.start()
+        try:
+            await broker.declare_queue(analysis_queue)
+            await broker.declare_queue(deferred_queue)
+            messages = pending_messages()
+            errors = [e for e in await queue.publish_many(messages) if e is not None]
+        finally:
+            await queue.stop()
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(messages)} messages not published: {errors[0]}")
+        print(f"[QUEUE] republished {len(messages)} pending messages to {ANALYSIS_QUEUE_NAME!r}")
+
+        if state is not None and not keep_legacy:
+            channel = await conn.channel()
+            await channel.queue_delete(QUEUE_NAME, if_unused=True)
+            await channel.close()
+            print(f"[QUEUE] deleted legacy queue {QUEUE_NAME!r}")
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Move analysis messages from the legacy QUEUE_NAME queue to the priority queue"
+    )
+    ap.add_argument(
+        "--keep-legacy",
+        action="store_true",
+        help="only republish pending jobs, do not delete the legacy queue",
+    )
+    args = ap.parse_args()
+    asyncio.run(migrate(args.keep_legacy))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:
+        print(f"[ERROR] {exc}", file=sys.stderr)
+        sys.exit(1)
@@ -1,20 +1,21 @@
 from dataclasses import dataclass
-from typing import Generator
+from typing import AsyncGenerator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.infra.db import SessionLocal
+from src.app.infra.db import AsyncSessionLocal, AsyncSessionLocalRO
 from src.app.infra.models import UserORM, AccountUserORM
-from src.app.core.security import decode_token
+from src.app.core import auth_cache
 
-from src.app.infra.uow import SqlAlchemyUoW
-from src.app.domain.contracts.uow import UoW
+from src.app.infra.async_uow import SqlAlchemyAsyncUoW
+from src.app.domain.contracts.uow import AsyncUoW
 
-from src.app.services.auth_service import AuthService
-from src.app.services.sources_service import SourcesService
-from src.app.services.analysis_service import AnalysisService
+from src.app.services.auth_service import AsyncAuthService
+from src.app.services.sources_service import AsyncSourcesService
+from src.app.services.analysis_service import AsyncAnalysisService
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -28,30 +29,38 @@ class UserContext:
     role: str
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency для SQLAlchemy-сессии.
+    Dependency для AsyncSession (asyncpg).
     Сессия создаётся на запрос и гарантированно закрывается.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_current_user_ctx(
-    db: Session = Depends(get_db),
+async def get_db_ro() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency для read-only сессии (реплика, DATABASE_URL_RO).
+    Используется для отчётов, рядов и статистики.
+    """
+    async with AsyncSessionLocalRO() as db:
+        yield db
+
+
+async def get_current_user_ctx(
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ) -> UserContext:
     """
     Возвращает контекст текущего пользователя:
-    - декодирует JWT,
+    - декодирует JWT (с кэшем),
     - проверяет, что пользователь активен,
     - проверяет привязку к аккаунту.
+    Контекст user -> account кэшируется на AUTH_CACHE_TTL_SECONDS; при
+    AUTH_TRUST_CLAIMS_SECONDS > 0 свежие токены обслуживаются по claims без БД.
     """
     try:
-        payload = decode_token(token)
+        payload = auth_cache.decode_token_cached(token)
         user_id = int(payload["sub"])
     except Exception:
         raise HTTPException(
@@ -59,11 +68,16 @@ def get_current_user_ctx(
             detail="Недействительный или просроченный токен.",
         )
 
+    cached = auth_cache.get_user_ctx(user_id) or auth_cache.trusted_claims_ctx(payload)
+    if cached:
+        account_id, role = cached
+        return UserContext(user_id=user_id, account_id=account_id, role=role)
+
     user = (
-        db.query(UserORM)
-        .filter(UserORM.id == user_id, UserORM.is_active.is_(True))
-        .first()
-    )
+        await db.execute(
+            select(UserORM).where(UserORM.id == user_id, UserORM.is_active.is_(True))
+        )
+    ).scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -71,16 +85,16 @@ def get_current_user_ctx(
         )
 
     au = (
-        db.query(AccountUserORM)
-        .filter(AccountUserORM.user_id == user.id)
-        .first()
-    )
+        await db.execute(select(AccountUserORM).where(AccountUserORM.user_id == user.id))
+    ).scalars().first()
     if not au:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="У пользователя нет привязанного аккаунта.",
         )
 
+    auth_cache.put_user_ctx(int(user.id), int(au.account_id), str(au.role))
+
     return UserContext(
         user_id=int(user.id),
         account_id=int(au.account_id),
@@ -88,19 +102,33 @@ def get_current_user_ctx(
     )
 
 
-def get_uow(db: Session = Depends(get_db)) -> UoW:
+def get_uow(db: AsyncSession = Depends(get_db)) -> AsyncUoW:
     """
     Dependency для Unit of Work.
     """
-    return SqlAlchemyUoW(db)
+    return SqlAlchemyAsyncUoW(db)
+
+
+def get_uow_ro(db: AsyncSession = Depends(get_db_ro)) -> AsyncUoW:
+    """
+    Dependency для read-only Unit of Work (без commit).
+    """
+    return SqlAlchemyAsyncUoW(db, read_only=True)
 
 
 # Service factories (composition root)
-def get_auth_service(uow: UoW = Depends(get_uow)) -> AuthService:
-    return AuthService(uow)
+def get_auth_service(uow: AsyncUoW = Depends(get_uow)) -> AsyncAuthService:
+    return AsyncAuthService(uow)
+
+def get_sources_service(uow: AsyncUoW = Depends(get_uow)) -> AsyncSourcesService:
+    return AsyncSourcesService(uow)
+
+def get_analysis_service(uow: AsyncUoW = Depends(get_uow)) -> AsyncAnalysisService:
+    return AsyncAnalysisService(uow)
 
-def get_sources_service(uow: UoW = Depends(get_uow)) -> SourcesService:
-    return SourcesService(uow)
+# Read-only варианты: отчёты, ряды и статистика читаются с реплики
+def get_sources_service_ro(uow: AsyncUoW = Depends(get_uow_ro)) -> AsyncSourcesService:
+    return AsyncSourcesService(uow)
 
-def get_analysis_service(uow: UoW = Depends(get_uow)) -> AnalysisService:
-    return AnalysisService(uow)
\ No newline at end of file
+def get_analysis_service_ro(uow: AsyncUoW = Depends(get_uow_ro)) -> AsyncAnalysisService:
+    return AsyncAnalysisService(uow)
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from src.app.api.deps import UserContext, get_current_user_ctx
 from src.app.api.schemas import (
     CreateAnalysisJobRequest,
+    BatchCreateAnalysisJobsRequest,
+    BatchCreateAnalysisJobsResponse,
+    BatchJobItemResponse,
     AnalysisJobResponse,
     OverviewReportResponse,
+    AnalysisShardResponse,
+    JobProgressResponse,
+    BreakdownResponse,
+    TrendEventResponse,
     job_to_response,
+    shard_to_response,
 )
-from src.app.api.deps import get_analysis_service
-from src.app.services.analysis_service import AnalysisService
-from src.app.infra.mq import enqueue_analysis_job
+from src.app.api.deps import get_analysis_service, get_analysis_service_ro
+from src.app.services.analysis_service import AsyncAnalysisService
+from src.app.infra.mq import enqueue_analysis_job, enqueue_analysis_jobs
 from src.app.domain.value_objects import AnalysisScope, DateRange
+from src.app.domain.enums import JobStatus
 
 
 router = APIRouter(prefix="/api/analysis", tags=["analysis"])
@@ -20,7 +32,7 @@ router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 async def create_job(
     req: CreateAnalysisJobRequest,
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: AnalysisService = Depends(get_analysis_service),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
 ):
     scope = AnalysisScope(
         source_ids=list(req.scope.source_ids),
@@ -30,7 +42,7 @@ async def create_job(
 
     # Создаём job
     try:
-        job = svc.create_job(
+        job = await svc.create_job(
             account_id=ctx.account_id,
             scope=scope,
         )
@@ -43,15 +55,19 @@ async def create_job(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    # Результат переиспользован (тот же scope, данные не менялись) – в очередь не ставим
+    if job.status == JobStatus.DONE:
+        return job_to_response(job)
+
     # Публикуем в очередь. Если publish упал проставляем ERROR.
     try:
-        await enqueue_analysis_job({"job_id": job.id})
+        await enqueue_analysis_job({"job_id": job.id}, priority=job.priority)
     except Exception as e:
         try:
-            svc.uow.analysis.set_error(job.id, f"mq_publish_error: {e}")
-            svc.uow.commit()
+            await svc.uow.analysis.set_error(job.id, f"mq_publish_error: {e}")
+            await svc.uow.commit()
         except Exception:
-            svc.uow.rollback()
+            await svc.uow.rollback()
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Job created, but failed to enqueue. Please retry.",
@@ -60,38 +76,169 @@ async def create_job(
     return job_to_response(job)
 
 
+@router.post("/jobs/batch", response_model=BatchCreateAnalysisJobsResponse)
+async def create_jobs_batch(
+    req: BatchCreateAnalysisJobsRequest,
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
+):
+    scopes = [
+        AnalysisScope(
+            source_ids=list(j.scope.source_ids),
+            date_range=DateRange(start=j.scope.date_range.start, end=j.scope.date_range.end),
+            query=j.scope.query,
+        )
+        for j in req.jobs
+    ]
+
+    try:
+        results = await svc.create_jobs(ctx.account_id, scopes)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    # Одна пачка публикаций с подтверждениями; неопубликованные задачи – ERROR
+    queued = [r for r in results if r.job and r.job.status != JobStatus.DONE]
+    errors = await enqueue_analysis_jobs([({"job_id": r.job.id}, r.job.priority) for r in queued])
+    failed = [(r, e) for r, e in zip(queued, errors) if e is not None]
+    if failed:
+        try:
+            for r, e in failed:
+                await svc.uow.analysis.set_error(r.job.id, f"mq_publish_error: {e}")
+            await svc.uow.commit()
+        except Exception:
+            await svc.uow.rollback()
+        for r, e in failed:
+            r.job.status, r.error = JobStatus.ERROR, "Job created, but failed to enqueue. Please retry."
+
+    items = [
+        BatchJobItemResponse(
+            index=r.index,
+            job=job_to_response(r.job) if r.job else None,
+            error=r.error,
+        )
+        for r in results
+    ]
+    n_failed = sum(1 for it in items if it.error)
+    return BatchCreateAnalysisJobsResponse(created=len(items) - n_failed, failed=n_failed, items=items)
+
+
 @router.get("/jobs", response_model=list[AnalysisJobResponse])
-def list_jobs(
+async def list_jobs(
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: AnalysisService = Depends(get_analysis_service),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
     limit: int = 50,
 ):
-    jobs = svc.list_jobs(ctx.account_id, limit=limit)
+    jobs = await svc.list_jobs(ctx.account_id, limit=limit)
     return [job_to_response(j) for j in jobs]
 
 
 @router.get("/jobs/{job_id}", response_model=AnalysisJobResponse)
-def get_job(
+async def get_job(
     job_id: int,
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: AnalysisService = Depends(get_analysis_service),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
 ):
-    j = svc.get_job(ctx.account_id, job_id)
+    j = await svc.get_job(ctx.account_id, job_id)
+    if not j:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job_to_response(j)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=AnalysisJobResponse)
+async def cancel_job(
+    job_id: int,
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
+):
+    try:
+        j = await svc.cancel_job(ctx.account_id, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
     if not j:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     return job_to_response(j)
 
 
 @router.get("/jobs/{job_id}/overview", response_model=OverviewReportResponse)
-def get_overview(
+async def get_overview(
     job_id: int,
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: AnalysisService = Depends(get_analysis_service),
+    svc: AsyncAnalysisService = Depends(get_analysis_service_ro),
 ):
-    rep = svc.get_overview(ctx.account_id, job_id)
+    rep = await svc.get_overview(ctx.account_id, job_id)
     if not rep:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Overview not found (job not DONE or missing report)",
         )
-    return rep
\ No newline at end of file
+    return rep
+
+
+@router.get("/jobs/{job_id}/progress", response_model=JobProgressResponse)
+async def get_progress(
+    job_id: int,
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
+):
+    p = await svc.get_progress(ctx.account_id, job_id)
+    if not p:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return p
+
+
+@router.get("/jobs/{job_id}/shards", response_model=list[AnalysisShardResponse])
+async def get_shards(
+    job_id: int,
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncAnalysisService = Depends(get_analysis_service),
+):
+    j = await svc.get_job(ctx.account_id, job_id)
+    if not j:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return [shard_to_response(s) for s in await svc.get_shards(ctx.account_id, job_id)]
+
+
+@router.get("/jobs/{job_id}/trends", response_model=list[TrendEventResponse])
+async def get_trends(
+    job_id: int,
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncAnalysisService = Depends(get_analysis_service_ro),
+):
+    j = await svc.get_job(ctx.account_id, job_id)
+    if not j:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return [TrendEventResponse(**vars(e)) for e in await svc.get_trends(ctx.account_id, job_id)]
+
+
+@router.get("/jobs/{job_id}/breakdown", response_model=BreakdownResponse)
+async def get_breakdown(
+    job_id: int,
+    group_by: str = Query("source_id,topic,day", description="Измерения через запятую: source_id, topic, day"),
+    source_id: Optional[list[int]] = Query(None),
+    topic: Optional[list[str]] = Query(None, description="Пустое значение – документы без темы"),
+    day_from: Optional[date] = None,
+    day_to: Optional[date] = None,
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncAnalysisService = Depends(get_analysis_service_ro),
+):
+    dims = [g.strip() for g in group_by.split(",") if g.strip()]
+    try:
+        rows = await svc.get_breakdown(
+            ctx.account_id,
+            job_id,
+            group_by=dims,
+            source_ids=source_id,
+            topics=[t or None for t in topic] if topic is not None else None,
+            day_from=day_from.isoformat() if day_from else None,
+            day_to=day_to.isoformat() if day_to else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e))
+
+    if rows is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Breakdown not found (job not DONE or missing report)",
+        )
+    return BreakdownResponse(job_id=job_id, group_by=dims, rows=rows)
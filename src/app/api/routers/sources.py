@@ -1,41 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from src.app.api.deps import UserContext, get_current_user_ctx
-from src.app.api.schemas import SourceResponse, SourceStatsResponse
-from src.app.api.deps import get_sources_service
-from src.app.services.sources_service import SourcesService
+from src.app.api.schemas import SourceResponse, SourceStatsResponse, StreamTrendEventResponse
+from src.app.api.deps import get_sources_service_ro
+from src.app.services.sources_service import AsyncSourcesService
 
 
 router = APIRouter(prefix="/api/sources", tags=["sources"])
 
 
 @router.get("", response_model=list[SourceResponse])
-def list_sources(
+async def list_sources(
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: SourcesService = Depends(get_sources_service),
+    svc: AsyncSourcesService = Depends(get_sources_service_ro),
 ):
-    return svc.list_sources(ctx.account_id)
+    return await svc.list_sources(ctx.account_id)
 
 
 @router.get("/{source_id}", response_model=SourceResponse)
-def get_source(
+async def get_source(
     source_id: int,
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: SourcesService = Depends(get_sources_service),
+    svc: AsyncSourcesService = Depends(get_sources_service_ro),
 ):
-    s = svc.get_source(ctx.account_id, source_id)
+    s = await svc.get_source(ctx.account_id, source_id)
     if not s:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Source not found")
     return s
 
 
 @router.get("/{source_id}/stats", response_model=SourceStatsResponse)
-def source_stats(
+async def source_stats(
     source_id: int,
     ctx: UserContext = Depends(get_current_user_ctx),
-    svc: SourcesService = Depends(get_sources_service),
+    svc: AsyncSourcesService = Depends(get_sources_service_ro),
 ):
-    st = svc.source_stats(ctx.account_id, source_id)
+    st = await svc.source_stats(ctx.account_id, source_id)
     if not st:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Source not found")
-    return SourceStatsResponse(**st)
\ No newline at end of file
+    return SourceStatsResponse(**st)
+
+
+@router.get("/{source_id}/trends/live", response_model=list[StreamTrendEventResponse])
+async def source_live_trends(
+    source_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    ctx: UserContext = Depends(get_current_user_ctx),
+    svc: AsyncSourcesService = Depends(get_sources_service_ro),
+):
+    events = await svc.live_trends(ctx.account_id, source_id, limit)
+    if events is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Source not found")
+    return [StreamTrendEventResponse(**vars(e)) for e in events]
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any, Optional, Sequence
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -36,6 +36,14 @@ class SourceStatsResponse(BaseModel):
     date_min: Optional[datetime] = None
     date_max: Optional[datetime] = None
 
+class StreamTrendEventResponse(BaseModel):
+    source_id: int
+    ts: datetime = Field(..., description="Начало корзины времени")
+    kind: str
+    value: float
+    baseline: float
+    z: float
+
 
 # Analysis
 class DateRangeRequest(BaseModel):
@@ -60,6 +68,10 @@ class CreateAnalysisJobRequest(BaseModel):
     params: dict[str, Any] = Field(default_factory=dict)
 
 
+class BatchCreateAnalysisJobsRequest(BaseModel):
+    jobs: list[CreateAnalysisJobRequest] = Field(min_length=1, max_length=500)
+
+
 class AnalysisJobResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -74,6 +86,21 @@ class AnalysisJobResponse(BaseModel):
     params: dict[str, Any] = Field(default_factory=dict)
     error: Optional[str] = None
 
+    size_class: Optional[str] = None
+    priority: int = 0
+
+
+class BatchJobItemResponse(BaseModel):
+    index: int
+    job: Optional[AnalysisJobResponse] = None
+    error: Optional[str] = None
+
+
+class BatchCreateAnalysisJobsResponse(BaseModel):
+    created: int
+    failed: int
+    items: list[BatchJobItemResponse]
+
 
 class OverviewReportResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -85,6 +112,62 @@ class OverviewReportResponse(BaseModel):
     created_at: datetime
 
 
+class AnalysisShardResponse(BaseModel):
+    id: int
+    idx: int
+    status: str
+    date_from: datetime
+    date_to: datetime
+    total_documents: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobProgressResponse(BaseModel):
+    job_id: int
+    status: str
+    stage: Optional[str] = None
+    docs_total: Optional[int] = None
+    docs_fetched: Optional[int] = None
+    docs_scored: Optional[int] = None
+    docs_per_sec: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    shards_total: Optional[int] = None
+    shards_done: Optional[int] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class TrendEventResponse(BaseModel):
+    ts: datetime
+    kind: str
+    value: float
+    baseline: float
+    z: float
+    top_doc_ids: list[int] = Field(
+        default_factory=list, description="Самые негативные документы суток всплеска (spike, neg_spike)"
+    )
+
+
+class BreakdownRowResponse(BaseModel):
+    # измерения, не попавшие в group_by, – None
+    source_id: Optional[int] = None
+    topic: Optional[str] = None
+    day: Optional[date] = None
+    docs: int
+    negative: int
+    neutral: int
+    positive: int
+    neg_share: Optional[float] = Field(None, description="Доля негатива среди оценённых документов")
+
+
+class BreakdownResponse(BaseModel):
+    job_id: int
+    group_by: list[str]
+    rows: list[BreakdownRowResponse]
+
+
 # Мапперы домен -> API DTO
 def job_to_response(job) -> AnalysisJobResponse:
     """
@@ -125,4 +208,21 @@ def job_to_response(job) -> AnalysisJobResponse:
         scope=scope_payload,
         params=getattr(job, "params", {}) or {},
         error=getattr(job, "error", None),
-    )
\ No newline at end of file
+        size_class=getattr(job, "size_class", None),
+        priority=int(getattr(job, "priority", 0) or 0),
+    )
+
+
+def shard_to_response(shard) -> AnalysisShardResponse:
+    partial = shard.partial or {}
+    return AnalysisShardResponse(
+        id=int(shard.id),
+        idx=int(shard.idx),
+        status=str(shard.status),
+        date_from=shard.date_range.start,
+        date_to=shard.date_range.end,
+        total_documents=partial.get("total"),
+        error=shard.error,
+        started_at=shard.started_at,
+        finished_at=shard.finished_at,
+    )
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from src.app.core.settings import settings
+from src.app.core.security import decode_token
+
+
+class TTLCache:
+    """
+    Небольшой потокобезопасный LRU-кэш с TTL на запись (in-process).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# token -> payload; user_id -> (account_id, role); user_id -> деактивирован недавно
+_tokens = TTLCache(settings.AUTH_CACHE_MAXSIZE, settings.AUTH_CACHE_TTL_SECONDS)
+_user_ctx = TTLCache(settings.AUTH_CACHE_MAXSIZE, settings.AUTH_CACHE_TTL_SECONDS)
+_revoked = TTLCache(
+    settings.AUTH_CACHE_MAXSIZE,
+    max(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_TRUST_CLAIMS_SECONDS),
+)
+
+
+def decode_token_cached(token: str) -> Dict[str, Any]:
+    """
+    decode_token с кэшем: подпись проверяется один раз на TTL,
+    запись живёт не дольше exp самого токена.
+    """
+    payload = _tokens.get(token)
+    if payload is not None:
+        if int(payload.get("exp", 0)) > time.time():
+            return payload
+        _tokens.pop(token)
+
+    payload = decode_token(token)
+    _tokens.set(token, payload, ttl=float(payload.get("exp", 0)) - time.time())
+    return payload
+
+
+def get_user_ctx(user_id: int) -> Optional[tuple[int, str]]:
+    return _user_ctx.get(user_id)
+
+
+def put_user_ctx(user_id: int, account_id: int, role: str) -> None:
+    if _revoked.get(user_id):
+        return
+    _user_ctx.set(user_id, (account_id, role))
+
+
+def trusted_claims_ctx(payload: Dict[str, Any]) -> Optional[tuple[int, str]]:
+    """
+    (account_id, role) из подписанных claims без похода в БД –
+    только если токен выпущен не раньше AUTH_TRUST_CLAIMS_SECONDS назад.
+    """
+    window = settings.AUTH_TRUST_CLAIMS_SECONDS
+    if window <= 0:
+        return None
+
+    try:
+        user_id = int(payload["sub"])
+        account_id = int(payload["account_id"])
+        role = str(payload["role"])
+        iat = int(payload["iat"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if time.time() - iat > window or _revoked.get(user_id):
+        return None
+    return account_id, role
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Сбрасывает контекст пользователя (деактивация, смена аккаунта/роли).
+    Инвалидация локальна для процесса: в других инстансах запись истечёт по TTL.
+    """
+    _user_ctx.pop(user_id)
+    _revoked.set(user_id, True)
+
+
+def clear() -> None:
+    _tokens.clear()
+    _user_ctx.clear()
+    _revoked.clear()
@@ -0,0 +1,285 @@
+import asyncio
+import bisect
+import math
+import threading
+import time
+from typing import Iterable, Optional
+
+from src.app.core.sql_profile import record_query
+
+# Небольшой in-process реестр метрик в текстовом формате Prometheus (exposition 0.0.4).
+# Значения живут в памяти процесса: при WORKER_EXECUTOR=process метрики задач
+# остаются в дочерних процессах и в /metrics воркера не попадают.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return super().render() + [
+            f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (счётчики по бакетам (не кумулятивные, последний – +Inf), sum)
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        item = self._values.get(self._key(labels))
+        return sum(item[0]) if item else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s)) for k, (c, s) in self._values.items())
+
+        lines = super().render()
+        for key, (counts, total) in items:
+            acc = 0
+            for le, n in zip((*self.buckets, math.inf), counts):
+                acc += n
+                le_label = 'le="' + _fmt(le) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le_label)} {acc}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {acc}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _counter(name: str, doc: str, labels: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, doc, labels))
+
+
+def _gauge(name: str, doc: str, labels: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, doc, labels))
+
+
+def _histogram(name: str, doc: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, doc, labels, buckets))
+
+
+# API
+HTTP_REQUEST_SECONDS = _histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"),
+)
+
+# БД
+DB_QUERIES = _counter("db_queries_total", "SQL statements executed", ("engine", "op"))
+DB_QUERY_SECONDS = _histogram(
+    "db_query_duration_seconds", "SQL statement latency", ("engine", "op"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0),
+)
+
+# Очередь и задачи
+QUEUE_MESSAGES = _counter("queue_messages_consumed_total", "Queue messages consumed", ("kind",))
+QUEUE_MESSAGE_SECONDS = _histogram("queue_message_duration_seconds", "Message handling time", ("kind",))
+JOB_STAGE_SECONDS = _histogram(
+    "analysis_job_stage_duration_seconds", "Analysis job time spent per stage", ("stage",),
+)
+JOBS_FINISHED = _counter("analysis_jobs_finished_total", "Analysis jobs finished by final stage", ("stage",))
+STREAM_DOCS = _counter("stream_trend_docs_total", "Documents seen by the online trend detector")
+STREAM_TREND_EVENTS = _counter("stream_trend_events_total", "Online trend events emitted", ("kind",))
+
+# Инкрементальная загрузка источников
+INGESTION_DOCS = _counter("ingestion_docs_total", "Documents fetched / inserted by source adapters", ("adapter", "result"))
+INGESTION_ERRORS = _counter("ingestion_errors_total", "Failed incremental ingestion runs", ("adapter",))
+
+# Инференс
+INFERENCE_DOCS = _counter("analysis_inference_docs_total", "Documents scored by the sentiment model")
+INFERENCE_BATCH_SECONDS = _histogram("analysis_inference_batch_duration_seconds", "Model forward pass time per batch")
+INFERENCE_DOCS_PER_SEC = _gauge("analysis_inference_docs_per_second", "Throughput of the last scored batch")
+INFERENCE_PADDING_RATIO = _histogram(
+    "analysis_inference_padding_ratio", "Share of padding tokens in a tokenized batch",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9),
+)
+MODEL_LOAD_SECONDS = _gauge("analysis_model_load_seconds", "Sentiment model load time")
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: латентность запросов по шаблону маршрута (/jobs/{job_id}, а не /jobs/42).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=route,
+                status=str(status["code"]),
+            )
+
+
+def instrument_engine(engine, name: str) -> None:
+    """
+    Счётчик и латентность SQL-запросов через события SQLAlchemy (sync Engine или AsyncEngine.sync_engine);
+    те же события питают профиль запроса (core.sql_profile).
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_metrics_started"].pop()
+        op = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        elapsed = time.perf_counter() - started
+        DB_QUERIES.inc(engine=name, op=op)
+        DB_QUERY_SECONDS.observe(elapsed, engine=name, op=op)
+        record_query(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        stack = ctx.connection.info.get("_metrics_started") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+async def start_metrics_server(port: int, host: str = "0.0.0.0") -> Optional[asyncio.AbstractServer]:
+    """
+    Минимальный HTTP-сервер для /metrics на боковом порту воркера (без веб-фреймворка).
+    """
+    if port <= 0:
+        return None
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                body, head = REGISTRY.render().encode(), f"200 OK\r\nContent-Type: {CONTENT_TYPE}"
+            else:
+                body, head = b"not found\n", "404 Not Found\r\nContent-Type: text/plain"
+
+            writer.write(
+                f"HTTP/1.1 {head}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(_handle, host, port)
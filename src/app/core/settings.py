@@ -12,6 +12,12 @@ class Settings(BaseSettings):
     JWT_ALG: str = os.environ.get("JWT_ALG")
     JWT_EXPIRE_MINUTES: int = os.environ.get("JWT_EXPIRE_MINUTES")
 
+    # Auth cache (in-process): декодированные токены и user -> account контекст
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAXSIZE: int = 10_000
+    # Доверять подписанным account_id/role из токена без БД в течение N секунд после выпуска (0 – выкл.)
+    AUTH_TRUST_CLAIMS_SECONDS: int = 0
+
     # SaaS defaults
     DEFAULT_PLAN: str = "free"
     DEFAULT_SUB_STATUS: str = "active"
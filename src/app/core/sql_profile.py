@@ -0,0 +1,134 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+# Профилирование SQL на запрос / задачу воркера: число запросов, время в БД и повторяющиеся
+# "формы" запросов (N+1). Включается явно – SQL_PROFILE_ENABLED=1.
+SQL_PROFILE_ENABLED = os.getenv("SQL_PROFILE_ENABLED", "0") == "1"
+# Предупреждение в лог, если запросов больше порога (0 – не проверять)
+SQL_PROFILE_WARN_QUERIES = int(os.getenv("SQL_PROFILE_WARN_QUERIES", "20"))
+# ... или одна форма запроса повторилась столько раз (признак N+1)
+SQL_PROFILE_WARN_REPEATS = int(os.getenv("SQL_PROFILE_WARN_REPEATS", "5"))
+
+_current: ContextVar[Optional["QueryProfile"]] = ContextVar("sql_profile", default=None)
+
+_WS = re.compile(r"\s+")
+_PARAMS_LIST = re.compile(r"\((?:\s*(?:\$\d+|%\([^)]*\)s|%s|\?|'[^']*'|-?\d+(?:\.\d+)?)\s*,?)+\)")
+_LITERAL = re.compile(r"\$\d+|%\([^)]*\)s|%s|'[^']*'|\b-?\d+(?:\.\d+)?\b")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Форма запроса: без литералов и параметров, списки IN (...) схлопнуты –
+    запросы, отличающиеся только значениями, дают одну форму.
+    """
+    s = _WS.sub(" ", statement).strip()
+    s = _PARAMS_LIST.sub("(?)", s)
+    return _LITERAL.sub("?", s)
+
+
+@dataclass
+class QueryProfile:
+    name: str
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, min_count: int = 2) -> list[tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n >= min_count]
+
+    def is_chatty(self) -> bool:
+        too_many = 0 < SQL_PROFILE_WARN_QUERIES < self.count
+        repeats = SQL_PROFILE_WARN_REPEATS > 0 and any(
+            n >= SQL_PROFILE_WARN_REPEATS for n in self.shapes.values()
+        )
+        return too_many or repeats
+
+    def log(self) -> None:
+        if self.is_chatty():
+            top = "; ".join(f"{n}x {s[:200]}" for s, n in self.repeated()[:3])
+            logging.warning(
+                "sql profile %s: %d queries, %.1f ms; repeated: %s",
+                self.name, self.count, self.seconds * 1000, top or "-",
+            )
+        else:
+            logging.debug("sql profile %s: %d queries, %.1f ms", self.name, self.count, self.seconds * 1000)
+
+
+def record_query(statement: str, seconds: float) -> None:
+    """
+    Вызывается из событий движка (core.metrics.instrument_engine) – без активного профиля ничего не делает.
+    """
+    profile = _current.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+
+
+@contextmanager
+def profile_queries(name: str, enabled: bool | None = None) -> Iterator[Optional[QueryProfile]]:
+    """
+    Профиль SQL для блока кода (задача воркера, скрипт). В конце пишет сводку в лог.
+    """
+    if not (SQL_PROFILE_ENABLED if enabled is None else enabled):
+        yield None
+        return
+
+    profile = QueryProfile(name)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        profile.log()
+
+
+class SqlProfileMiddleware:
+    """
+    ASGI-middleware: профиль SQL на HTTP-запрос. Итоги – в заголовках ответа
+    (X-DB-Queries, X-DB-Time-Ms, Server-Timing) и в логе при превышении порогов.
+    Запросы после начала ответа (streaming, background tasks) попадают только в лог.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = _current.set(profile)
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                ms = profile.seconds * 1000
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-db-queries", str(profile.count).encode()),
+                    (b"x-db-time-ms", f"{ms:.1f}".encode()),
+                    (b"server-timing", f'db;dur={ms:.1f};desc="{profile.count} queries"'.encode()),
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                profile.name = f"{scope['method']} {route}"
+            profile.name += f" ({(time.perf_counter() - started) * 1000:.0f} ms total)"
+            profile.log()
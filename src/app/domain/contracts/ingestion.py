@@ -0,0 +1,14 @@
+from typing import Any, Optional, Protocol
+
+from src.app.domain.entities.source import Source
+from src.app.domain.value_objects import FetchResult
+
+
+class SourceAdapter(Protocol):
+    """
+    Адаптер источника для инкрементальной загрузки (source.config["adapter"]).
+    fetch возвращает не больше limit документов после watermark (None – с начала источника);
+    повторный вызов с тем же watermark должен вернуть те же документы – курсор сдвигается,
+    только когда порция записана.
+    """
+    def fetch(self, source: Source, watermark: Optional[dict[str, Any]], limit: int) -> FetchResult: ...
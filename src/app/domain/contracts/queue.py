@@ -0,0 +1,16 @@
+from typing import Any, Optional, Protocol
+
+
+class JobQueue(Protocol):
+    """
+    Очередь сообщений задач анализа ({"job_id"} / {"job_id", "shard_id"}).
+    Реализации: RabbitMQ (несколько хостов) и in-process (один узел, тесты, бенчмарки).
+    """
+    async def start(self) -> None: ...
+    async def stop(self) -> None: ...
+
+    async def publish(self, payload: dict[str, Any], priority: int = 0) -> None: ...
+
+    async def publish_many(self, messages: list[tuple[dict[str, Any], int]]) -> list[Optional[Exception]]: ...
+
+    async def defer(self, payload: dict[str, Any], priority: int, delay_seconds: float) -> None: ...
@@ -7,7 +7,11 @@ from src.app.domain.entities.analysis_job import AnalysisJob
 from src.app.domain.entities.overview_report import OverviewReport
 from src.app.domain.entities.user import User
 from src.app.domain.entities.trend_event import TrendEvent
-from src.app.domain.value_objects import AuthCredentials, AnalysisScope
+from src.app.domain.entities.prediction import Prediction
+from src.app.domain.entities.analysis_shard import AnalysisShard
+from src.app.domain.entities.ingestion_job import IngestionJob
+from src.app.domain.services.aggregation import PartialAggregate
+from src.app.domain.value_objects import AuthCredentials, AnalysisScope, DateRange, IncomingDocument
 from src.app.domain.enums import JobStatus
 
 
@@ -20,6 +24,7 @@ class UserRepo(Protocol):
     def get_by_email(self, email: str) -> Optional[User]: ...
     def get_auth_credentials(self, email: str) -> Optional[AuthCredentials]: ...
     def create(self, email: str, password_hash: str) -> User: ...
+    def set_active(self, user_id: int, is_active: bool) -> None: ...
 
 
 class AccountRepo(Protocol):
@@ -48,6 +53,31 @@ class DocumentRepo(Protocol):
         ...
     def stats_by_source(self, account_id: int, source_id: int) -> dict[str, Any]: ...
 
+    def daily_counts_by_sources_and_period(
+        self,
+        source_ids: Sequence[int],
+        date_from: datetime,
+        date_to: datetime,
+    ) -> list[tuple[datetime, int]]: ...
+
+    def stream_after_id(self, source_id: int, after_id: int, limit: int) -> list[tuple[int, datetime]]: ...
+    def stream_in_ranges(self, source_id: int, ranges: Sequence[tuple[int, int]]) -> list[tuple[int, datetime]]: ...
+    def max_id(self, source_id: int) -> int: ...
+    def bucket_counts(
+        self,
+        source_id: int,
+        bucket_seconds: int,
+        date_from: datetime,
+        date_to: datetime,
+    ) -> dict[datetime, int]: ...
+
+    def day_watermarks_by_sources_and_period(
+        self,
+        source_ids: Sequence[int],
+        date_from: datetime,
+        date_to: datetime,
+    ) -> dict[tuple[int, datetime], tuple[int, int]]: ...
+
     def count_by_sources_and_period(
             self,
             source_ids: list[int],
@@ -56,11 +86,17 @@ class DocumentRepo(Protocol):
             query: str | None = None,
     ) -> int: ...
 
+    def insert_many(self, source_id: int, docs: Sequence[IncomingDocument]) -> int: ...
+
 class AnalysisJobRepo(Protocol):
     def create(
         self,
         account_id: int,
         scope: AnalysisScope,
+        fingerprint: Optional[str] = None,
+        docs_estimate: Optional[int] = None,
+        size_class: Optional[str] = None,
+        priority: int = 0,
     ) -> AnalysisJob: ...
 
     def set_status(self, job_id: int, status: JobStatus, error: Optional[str] = None) -> None: ...
@@ -71,6 +107,21 @@ class AnalysisJobRepo(Protocol):
     def list_by_account(self, account_id: int, limit: int = 50) -> list[AnalysisJob]: ...
     def get_by_id(self, account_id: int, job_id: int) -> Optional[AnalysisJob]: ...
     def get_by_id_any(self, job_id: int) -> Optional[AnalysisJob]: ...
+    def get_for_update(self, job_id: int) -> Optional[AnalysisJob]: ...
+    def list_pending(self, limit: int = 1000) -> list[AnalysisJob]: ...
+    def lock_account(self, account_id: int) -> None: ...
+    def count_running(self, account_id: int) -> int: ...
+    def set_progress(self, job_id: int, progress: dict[str, Any]) -> None: ...
+
+    def claim(
+        self,
+        job_id: int,
+        owner: Optional[str],
+        lease_seconds: Optional[float],
+    ) -> Optional[AnalysisJob]: ...
+    def renew_lease(self, job_id: int, owner: str, lease_seconds: float) -> bool: ...
+    def set_checkpoint(self, job_id: int, checkpoint: dict[str, Any]) -> None: ...
+    def list_expired_for_update(self, limit: int = 100) -> list[AnalysisJob]: ...
 
 
 class OverviewRepo(Protocol):
@@ -80,4 +131,153 @@ class OverviewRepo(Protocol):
 
 class TrendRepo(Protocol):
     def save_many(self, job_id: int, events: list[TrendEvent]) -> None: ...
-    def list_by_job(self, job_id: int, limit: int | None = None) -> list[TrendEvent]: ...
\ No newline at end of file
+    def list_by_job(self, job_id: int, limit: int | None = None) -> list[TrendEvent]: ...
+
+
+class StreamTrendRepo(Protocol):
+    def lock_states(self, limit: int = 50) -> list[tuple[int, dict[str, Any]]]: ...
+    def save_state(self, source_id: int, state: dict[str, Any]) -> None: ...
+    def save_events(self, events: list[TrendEvent]) -> None: ...
+
+
+class IngestionJobRepo(Protocol):
+    def ensure_cursors(self, now: datetime) -> None: ...
+    def claim_due(self, now: datetime, exclude: Sequence[int] = ()) -> Optional[tuple[IngestionJob, Source]]: ...
+    def get_for_update(self, job_id: int) -> Optional[IngestionJob]: ...
+    def save_run(
+        self,
+        job_id: int,
+        status: JobStatus,
+        stats: dict[str, Any],
+        next_run_at: datetime,
+        error: Optional[str] = None,
+    ) -> None: ...
+
+
+class PredictionRepo(Protocol):
+    def save_many(self, job_id: int, predictions: list[Prediction]) -> None: ...
+    def count_by_job(self, job_id: int) -> int: ...
+    def delete_for_job(self, job_id: int) -> None: ...
+
+
+class AnalysisShardRepo(Protocol):
+    def create_many(self, job_id: int, ranges: list[DateRange]) -> list[AnalysisShard]: ...
+    def claim(
+        self,
+        shard_id: int,
+        owner: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+    ) -> Optional[AnalysisShard]: ...
+    def renew_lease(self, shard_id: int, owner: str, lease_seconds: float) -> bool: ...
+    def release(self, shard_id: int) -> None: ...
+    def list_expired_for_update(self, limit: int = 100) -> list[AnalysisShard]: ...
+    def set_done(self, shard_id: int, partial: dict[str, Any]) -> None: ...
+    def set_error(self, shard_id: int, error: str) -> None: ...
+    def list_by_job(self, job_id: int) -> list[AnalysisShard]: ...
+    def list_pending(self, limit: int = 1000) -> list[tuple[AnalysisShard, int]]: ...
+
+
+class DayAggregateRepo(Protocol):
+    def save_many(
+        self,
+        job_id: int,
+        agg_key: str,
+        cells: dict[tuple[int, datetime], PartialAggregate],
+    ) -> None: ...
+
+    def latest_done(
+        self,
+        agg_key: str,
+        source_ids: Sequence[int],
+        day_from: datetime,
+        day_to: datetime,
+    ) -> dict[tuple[int, datetime], PartialAggregate]: ...
+
+
+# Async-контракты для request path (API/UI)
+class AsyncUserRepo(Protocol):
+    async def get_by_id(self, user_id: int) -> Optional[User]: ...
+    async def get_by_email(self, email: str) -> Optional[User]: ...
+    async def get_auth_credentials(self, email: str) -> Optional[AuthCredentials]: ...
+    async def create(self, email: str, password_hash: str) -> User: ...
+    async def set_active(self, user_id: int, is_active: bool) -> None: ...
+
+
+class AsyncAccountRepo(Protocol):
+    async def create(self, name: str) -> int: ...
+    async def add_user(self, account_id: int, user_id: int, role: str) -> None: ...
+    async def get_user_link(self, user_id: int) -> Optional[tuple[int, str]]: ...
+
+
+class AsyncSubscriptionRepo(Protocol):
+    async def ensure_free_active(self, account_id: int) -> None: ...
+
+
+class AsyncAccountSourceRepo(Protocol):
+    async def grant_all_global(self, account_id: int) -> None: ...
+
+
+class AsyncSourceRepo(Protocol):
+    async def list_by_account(self, account_id: int) -> list[Source]: ...
+    async def get_by_id(self, account_id: int, source_id: int) -> Optional[Source]: ...
+    async def accessible_ids(self, account_id: int, source_ids: list[int]) -> set[int]: ...
+
+
+class AsyncDocumentRepo(Protocol):
+    async def stats_by_source(self, account_id: int, source_id: int) -> dict[str, Any]: ...
+
+    async def count_by_sources_and_period(
+            self,
+            source_ids: list[int],
+            date_from: datetime,
+            date_to: datetime,
+            query: str | None = None,
+    ) -> int: ...
+
+    async def count_by_scopes(self, scopes: list[AnalysisScope]) -> list[int]: ...
+
+    async def watermark_by_sources_and_period(
+        self,
+        source_ids: Sequence[int],
+        date_from: datetime,
+        date_to: datetime,
+    ) -> tuple[int, Optional[int]]: ...
+
+
+class AsyncAnalysisJobRepo(Protocol):
+    async def create(
+        self,
+        account_id: int,
+        scope: AnalysisScope,
+        fingerprint: Optional[str] = None,
+        docs_estimate: Optional[int] = None,
+        size_class: Optional[str] = None,
+        priority: int = 0,
+    ) -> AnalysisJob: ...
+    async def create_many(self, account_id: int, items: list[dict[str, Any]]) -> list[AnalysisJob]: ...
+    async def set_status(self, job_id: int, status: JobStatus, error: Optional[str] = None) -> None: ...
+    async def set_error(self, job_id: int, error: str) -> None: ...
+    async def list_by_account(self, account_id: int, limit: int = 50) -> list[AnalysisJob]: ...
+    async def get_by_id(self, account_id: int, job_id: int) -> Optional[AnalysisJob]: ...
+    async def get_progress(self, account_id: int, job_id: int) -> Optional[tuple[JobStatus, dict[str, Any]]]: ...
+    async def cancel(self, account_id: int, job_id: int) -> bool: ...
+
+
+class AsyncOverviewRepo(Protocol):
+    async def get_by_job(self, job_id: int) -> Optional[OverviewReport]: ...
+    async def latest_done_by_fingerprint(self, fingerprint: str) -> Optional[OverviewReport]: ...
+    async def latest_done_by_fingerprints(self, fingerprints: list[str]) -> dict[str, OverviewReport]: ...
+    async def clone(self, src_job_id: int, dst_job_id: int, extra_metrics: dict[str, Any]) -> None: ...
+    async def get_breakdown(self, job_id: int) -> Optional[dict[str, Any]]: ...
+
+
+class AsyncTrendRepo(Protocol):
+    async def list_by_job(self, job_id: int, limit: int | None = None) -> list[TrendEvent]: ...
+    async def list_by_source(self, source_id: int, limit: int = 100) -> list[TrendEvent]: ...
+    async def clone(self, src_job_id: int, dst_job_id: int) -> None: ...
+
+
+class AsyncAnalysisShardRepo(Protocol):
+    async def list_by_job(self, job_id: int) -> list[AnalysisShard]: ...
+    async def cancel_by_job(self, job_id: int) -> None: ...
+    async def summary(self, job_id: int) -> dict[str, int]: ...
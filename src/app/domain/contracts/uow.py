@@ -2,7 +2,12 @@ from typing import Protocol
 from src.app.domain.contracts.repositories import (
     UserRepo, AccountRepo, SubscriptionRepo,
     SourceRepo, DocumentRepo, AnalysisJobRepo,
-    OverviewRepo, TrendRepo, AccountSourceRepo
+    OverviewRepo, TrendRepo, AccountSourceRepo,
+    PredictionRepo, AnalysisShardRepo, DayAggregateRepo, StreamTrendRepo, IngestionJobRepo,
+    AsyncUserRepo, AsyncAccountRepo, AsyncSubscriptionRepo,
+    AsyncSourceRepo, AsyncDocumentRepo, AsyncAnalysisJobRepo,
+    AsyncOverviewRepo, AsyncTrendRepo, AsyncAccountSourceRepo,
+    AsyncAnalysisShardRepo,
 )
 
 class UoW(Protocol):
@@ -15,6 +20,29 @@ class UoW(Protocol):
     overview: OverviewRepo
     trend: TrendRepo
     account_sources: AccountSourceRepo
+    predictions: PredictionRepo
+    shards: AnalysisShardRepo
+    day_aggregates: DayAggregateRepo
+    stream_trends: StreamTrendRepo
+    ingestion: IngestionJobRepo
+    read_only: bool
 
     def commit(self) -> None: ...
-    def rollback(self) -> None: ...
\ No newline at end of file
+    def rollback(self) -> None: ...
+
+
+class AsyncUoW(Protocol):
+    users: AsyncUserRepo
+    accounts: AsyncAccountRepo
+    subscriptions: AsyncSubscriptionRepo
+    sources: AsyncSourceRepo
+    documents: AsyncDocumentRepo
+    analysis: AsyncAnalysisJobRepo
+    overview: AsyncOverviewRepo
+    trend: AsyncTrendRepo
+    account_sources: AsyncAccountSourceRepo
+    shards: AsyncAnalysisShardRepo
+    read_only: bool
+
+    async def commit(self) -> None: ...
+    async def rollback(self) -> None: ...
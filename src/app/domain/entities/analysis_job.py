@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Any
 from src.app.domain.value_objects import AnalysisScope
 from src.app.domain.enums import JobStatus
 
@@ -12,4 +12,14 @@ class AnalysisJob:
     status: JobStatus
     created_at: datetime
     error: Optional[str]
-    finished_at: Optional[datetime] = None
\ No newline at end of file
+    finished_at: Optional[datetime] = None
+    progress: dict[str, Any] = field(default_factory=dict)
+    scope_fingerprint: Optional[str] = None
+    docs_estimate: Optional[int] = None
+    size_class: Optional[str] = None
+    priority: int = 0
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    attempts: int = 0
+    checkpoint: dict[str, Any] = field(default_factory=dict)
\ No newline at end of file
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Any
+from src.app.domain.value_objects import DateRange
+from src.app.domain.enums import JobStatus
+
+@dataclass
+class AnalysisShard:
+    id: int
+    job_id: int
+    idx: int
+    date_range: DateRange
+    status: JobStatus
+    partial: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    lease_owner: Optional[str] = None
+    attempts: int = 0
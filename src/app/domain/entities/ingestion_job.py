@@ -1,5 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Any, Optional
 from src.app.domain.enums import JobStatus
 
 @dataclass
@@ -7,4 +8,9 @@ class IngestionJob:
     id: int
     source_id: int
     status: JobStatus
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+    kind: str = "GENERIC"
+    # для курсора INCREMENTAL: watermark адаптера и счётчики загрузки
+    stats: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    next_run_at: Optional[datetime] = None
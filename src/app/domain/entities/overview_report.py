@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 @dataclass
 class OverviewReport:
@@ -8,4 +8,6 @@ class OverviewReport:
     total_documents: int
     sentiment_share: Dict[str, float]
     metrics: Dict[str, Any]
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+    # куб источник × тема × сутки: пишется вместе с отчётом, при чтении отчёта не загружается
+    breakdown: Optional[Dict[str, Any]] = None
@@ -1,11 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
+from typing import Optional
 
 @dataclass(frozen=True)
 class TrendEvent:
-    job_id: int
+    # job_id – тренд из отчёта задачи; source_id – онлайн-детектор STREAM-источника
+    job_id: Optional[int]
     ts: datetime
     kind: str
     value: float
     baseline: float
-    z: float
\ No newline at end of file
+    z: float
+    source_id: Optional[int] = None
+    # представительные документы всплеска (самые негативные за сутки)
+    top_doc_ids: list[int] = field(default_factory=list)
@@ -10,11 +10,22 @@ class IngestionMode(StrEnum):
     INCREMENTAL = "incremental"
     STREAM = "stream"
 
+class IngestionKind(StrEnum):
+    GENERIC = "GENERIC"
+    # курсор инкрементальной загрузки источника через адаптер (одна строка на источник)
+    INCREMENTAL = "INCREMENTAL"
+
 class JobStatus(StrEnum):
     PENDING = "PENDING"
     RUNNING = "RUNNING"
     DONE = "DONE"
     ERROR = "ERROR"
+    CANCELED = "CANCELED"
+
+class JobSize(StrEnum):
+    SMALL = "small"
+    MEDIUM = "medium"
+    LARGE = "large"
 
 class SentimentLabel(StrEnum):
     NEG = "neg"
@@ -0,0 +1,244 @@
+import heapq
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from src.app.domain.value_objects import DateRange
+
+SENTIMENT_KEYS = ("negative", "neutral", "positive")
+
+# При слиянии частей побеждает «самый тревожный» режим
+_MODE_PRIORITY = ("fallback", "model", "stub", "empty")
+
+
+def day_start(dt: datetime) -> datetime:
+    dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
+
+
+@dataclass
+class PartialAggregate:
+    """
+    Частичный результат по подмножеству документов задачи (шард, набор дней).
+    Части складываются через merge() в любом порядке.
+    """
+    total: int = 0
+    sentiment_counts: dict[str, int] = field(default_factory=lambda: {k: 0 for k in SENTIMENT_KEYS})
+    daily_counts: dict[datetime, int] = field(default_factory=dict)
+    # сутки UTC -> счётчики меток (только оценённые документы)
+    daily_sentiment: dict[datetime, dict[str, int]] = field(default_factory=dict)
+    # сутки UTC -> самые негативные документы (p_neg, id): min-heap, не больше k на (источник, сутки)
+    top_docs: dict[datetime, list[tuple[float, int]]] = field(default_factory=dict)
+    # (source_id, тема, сутки UTC) -> [документы, negative, neutral, positive] – куб разбивки отчёта
+    breakdown: dict[tuple[int, str | None, datetime], list[int]] = field(default_factory=dict)
+    sentiment_mode: str = "empty"
+    sentiment_error: str | None = None
+    # watermark данных: сколько документов загружено из диапазона и максимальный id
+    docs_fetched: int = 0
+    max_doc_id: int | None = None
+
+    def add_day(self, published_at: datetime, n: int = 1) -> None:
+        day = day_start(published_at)
+        self.daily_counts[day] = self.daily_counts.get(day, 0) + n
+
+    def add_breakdown(
+        self,
+        key: tuple[int, str | None, datetime],
+        docs: int = 0,
+        label: str | None = None,
+        n: int = 1,
+    ) -> None:
+        vals = self.breakdown.setdefault(key, [0] * (1 + len(SENTIMENT_KEYS)))
+        vals[0] += docs
+        if label is not None:
+            vals[1 + SENTIMENT_KEYS.index(label)] += n
+
+    def push_top(self, day: datetime, p_neg: float, doc_id: int, k: int) -> None:
+        """
+        Ограниченная куча на сутки: O(log k) на документ, весь период не сортируется.
+        При равных p_neg выше документ с большим id – результат не зависит от порядка и шардов.
+        """
+        if k <= 0:
+            return
+        heap = self.top_docs.setdefault(day, [])
+        item = (float(p_neg), int(doc_id))
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def top_doc_ids(self, day: datetime, k: int) -> list[int]:
+        return [doc_id for _, doc_id in heapq.nlargest(k, self.top_docs.get(day, []))]
+
+    def merge(self, other: "PartialAggregate") -> "PartialAggregate":
+        self.total += other.total
+        for k in SENTIMENT_KEYS:
+            self.sentiment_counts[k] = self.sentiment_counts.get(k, 0) + other.sentiment_counts.get(k, 0)
+        for day, n in other.daily_counts.items():
+            self.daily_counts[day] = self.daily_counts.get(day, 0) + n
+        for day, counts in other.daily_sentiment.items():
+            mine = self.daily_sentiment.setdefault(day, {k: 0 for k in SENTIMENT_KEYS})
+            for k in SENTIMENT_KEYS:
+                mine[k] = mine.get(k, 0) + counts.get(k, 0)
+        for key, vals in other.breakdown.items():
+            mine_vals = self.breakdown.setdefault(key, [0] * len(vals))
+            for i, v in enumerate(vals):
+                mine_vals[i] += v
+        for day, items in other.top_docs.items():
+            # объединение куч без обрезки: на сутки – k документов с каждого источника/шарда
+            mine_top = self.top_docs.setdefault(day, [])
+            mine_top.extend(items)
+            heapq.heapify(mine_top)
+
+        modes = {self.sentiment_mode, other.sentiment_mode}
+        self.sentiment_mode = next(m for m in _MODE_PRIORITY if m in modes)
+        self.sentiment_error = self.sentiment_error or other.sentiment_error
+
+        self.docs_fetched += other.docs_fetched
+        ids = [x for x in (self.max_doc_id, other.max_doc_id) if x is not None]
+        self.max_doc_id = max(ids) if ids else None
+        return self
+
+    def sentiment_share(self) -> dict[str, float]:
+        if self.total <= 0:
+            return {"negative": 0.0, "neutral": 1.0, "positive": 0.0}
+        return {k: self.sentiment_counts.get(k, 0) / self.total for k in SENTIMENT_KEYS}
+
+    def daily_series(self) -> list[dict]:
+        return [{"ts": ts, "value": self.daily_counts[ts]} for ts in sorted(self.daily_counts)]
+
+    def daily_sentiment_series(self) -> list[dict]:
+        out = []
+        for ts in sorted(self.daily_sentiment):
+            counts = self.daily_sentiment[ts]
+            total = sum(counts.get(k, 0) for k in SENTIMENT_KEYS)
+            if total:
+                out.append({"ts": ts, "total": total, **{k: counts.get(k, 0) for k in SENTIMENT_KEYS}})
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "sentiment_counts": dict(self.sentiment_counts),
+            "daily_counts": {ts.isoformat(): n for ts, n in sorted(self.daily_counts.items())},
+            "daily_sentiment": {ts.isoformat(): dict(c) for ts, c in sorted(self.daily_sentiment.items())},
+            "breakdown": [[sid, topic, ts.isoformat(), *vals] for (sid, topic, ts), vals in self.breakdown.items()],
+            "top_docs": {ts.isoformat(): [list(x) for x in items] for ts, items in sorted(self.top_docs.items())},
+            "sentiment_mode": self.sentiment_mode,
+            "sentiment_error": self.sentiment_error,
+            "docs_fetched": self.docs_fetched,
+            "max_doc_id": self.max_doc_id,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "PartialAggregate":
+        counts = {k: 0 for k in SENTIMENT_KEYS}
+        counts.update({k: int(v) for k, v in (d.get("sentiment_counts") or {}).items()})
+        return cls(
+            total=int(d.get("total", 0)),
+            sentiment_counts=counts,
+            daily_counts={
+                datetime.fromisoformat(ts): int(n) for ts, n in (d.get("daily_counts") or {}).items()
+            },
+            daily_sentiment={
+                datetime.fromisoformat(ts): {k: int(v) for k, v in c.items()}
+                for ts, c in (d.get("daily_sentiment") or {}).items()
+            },
+            breakdown={
+                (int(row[0]), row[1], datetime.fromisoformat(row[2])): [int(v) for v in row[3:]]
+                for row in (d.get("breakdown") or [])
+            },
+            # отсортированный по возрастанию список – корректная min-heap
+            top_docs={
+                datetime.fromisoformat(ts): sorted((float(p), int(doc_id)) for p, doc_id in items)
+                for ts, items in (d.get("top_docs") or {}).items()
+            },
+            sentiment_mode=str(d.get("sentiment_mode") or "empty"),
+            sentiment_error=d.get("sentiment_error"),
+            docs_fetched=int(d.get("docs_fetched", 0)),
+            max_doc_id=d.get("max_doc_id"),
+        )
+
+
+# (source_id, сутки UTC) -> агрегат
+DayCells = dict[tuple[int, datetime], PartialAggregate]
+
+
+def merge_partials(parts: Iterable[PartialAggregate]) -> PartialAggregate:
+    out = PartialAggregate()
+    for p in parts:
+        out.merge(p)
+    return out
+
+
+def plan_day_shards(
+    day_counts: list[tuple[datetime, int]],
+    date_range: DateRange,
+    target_docs: int,
+    max_shards: int,
+) -> list[DateRange]:
+    """
+    Режет период на смежные шарды по границам суток (UTC) так, чтобы
+    в каждом было ~target_docs документов (по дневной гистограмме).
+    Границы включительные: конец шарда – за 1 мкс до начала следующего.
+    """
+    total = sum(n for _, n in day_counts)
+    if total <= 0 or max_shards <= 1:
+        return [date_range]
+
+    per_shard = max(target_docs, math.ceil(total / max_shards), 1)
+
+    cuts: list[datetime] = []
+    acc = 0
+    for day, n in sorted(day_counts):
+        if acc >= per_shard and len(cuts) < max_shards - 1:
+            cut = day_start(day)
+            if date_range.start + timedelta(microseconds=1) < cut < date_range.end:
+                cuts.append(cut)
+                acc = 0
+        acc += n
+
+    bounds = [date_range.start, *cuts]
+    ranges: list[DateRange] = []
+    for i, start in enumerate(bounds):
+        end = bounds[i + 1] - timedelta(microseconds=1) if i + 1 < len(bounds) else date_range.end
+        ranges.append(DateRange(start=start, end=end))
+    return ranges
+
+
+def is_full_day(day: datetime, date_range: DateRange) -> bool:
+    """
+    Сутки [day, day+1) целиком внутри периода (конец периода включительный).
+    """
+    return date_range.start <= day and day + timedelta(days=1) <= date_range.end + timedelta(microseconds=1)
+
+
+def full_days(date_range: DateRange) -> list[datetime]:
+    day = day_start(date_range.start)
+    if day < date_range.start:
+        day += timedelta(days=1)
+
+    out: list[datetime] = []
+    while is_full_day(day, date_range):
+        out.append(day)
+        day += timedelta(days=1)
+    return out
+
+
+def uncovered_ranges(date_range: DateRange, covered_days: Iterable[datetime]) -> list[DateRange]:
+    """
+    Части периода, не покрытые готовыми сутками (включительные границы, как у DateRange).
+    """
+    out: list[DateRange] = []
+    cursor = date_range.start
+    for day in sorted(covered_days):
+        if day - timedelta(microseconds=1) > cursor:
+            out.append(DateRange(start=cursor, end=day - timedelta(microseconds=1)))
+        cursor = max(cursor, day + timedelta(days=1))
+
+    # хвост (в т.ч. точка конца периода, если он ровно на границе суток);
+    # лишнее отсекает filter_documents по исходному scope
+    if cursor <= date_range.end:
+        out.append(DateRange(start=cursor, end=max(date_range.end, cursor + timedelta(microseconds=1))))
+    return out
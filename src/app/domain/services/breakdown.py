@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+
+from src.app.domain.services.aggregation import SENTIMENT_KEYS
+
+# Куб (источник × тема × сутки): значения ячейки – документы и счётчики меток
+BREAKDOWN_VALUES = ("docs", *SENTIMENT_KEYS)
+BREAKDOWN_DIMS = ("source_id", "topic", "day")
+
+# (source_id, topic, сутки UTC) -> [docs, negative, neutral, positive]
+BreakdownCells = dict[tuple[int, Optional[str], datetime], list[int]]
+
+
+def _topic_order(topic: Optional[str]) -> tuple[bool, str]:
+    return topic is None, topic or ""
+
+
+def encode_breakdown(cells: BreakdownCells) -> dict[str, Any]:
+    """
+    Компактная запись куба для отчёта: измерения – словари (sources/topics/days),
+    строки – индексы в них и значения: [source_idx, topic_idx, day_idx, docs, negative, neutral, positive].
+    """
+    sources = sorted({k[0] for k in cells})
+    topics = sorted({k[1] for k in cells}, key=_topic_order)
+    days = sorted({k[2] for k in cells})
+    s_idx = {v: i for i, v in enumerate(sources)}
+    t_idx = {v: i for i, v in enumerate(topics)}
+    d_idx = {v: i for i, v in enumerate(days)}
+
+    rows = [
+        [s_idx[s], t_idx[t], d_idx[d], *map(int, vals)]
+        for (s, t, d), vals in sorted(cells.items(), key=lambda x: (x[0][2], x[0][0], _topic_order(x[0][1])))
+        if any(vals)
+    ]
+    return {
+        "sources": sources,
+        "topics": topics,
+        "days": [d.date().isoformat() for d in days],
+        "values": list(BREAKDOWN_VALUES),
+        "rows": rows,
+    }
+
+
+def query_breakdown(
+    cube: dict[str, Any],
+    group_by: Sequence[str] = BREAKDOWN_DIMS,
+    source_ids: Optional[Iterable[int]] = None,
+    topics: Optional[Iterable[Optional[str]]] = None,
+    day_from: Optional[str] = None,
+    day_to: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """
+    Фильтр и свёртка куба по подмножеству измерений (pivot) – векторно, без повторного запуска задачи.
+    day_from/day_to – ISO-даты (YYYY-MM-DD) включительно; topics может содержать None (без темы).
+    """
+    unknown = [g for g in group_by if g not in BREAKDOWN_DIMS]
+    if unknown:
+        raise ValueError(f"unknown breakdown dimensions: {unknown}")
+
+    rows = np.asarray(cube.get("rows") or [], dtype=np.int64).reshape(-1, len(BREAKDOWN_DIMS) + len(BREAKDOWN_VALUES))
+    sources, topic_names, days = cube.get("sources") or [], cube.get("topics") or [], cube.get("days") or []
+
+    mask = np.ones(len(rows), dtype=bool)
+    if source_ids is not None:
+        wanted = [i for i, s in enumerate(sources) if s in set(source_ids)]
+        mask &= np.isin(rows[:, 0], wanted)
+    if topics is not None:
+        wanted = [i for i, t in enumerate(topic_names) if t in set(topics)]
+        mask &= np.isin(rows[:, 1], wanted)
+    if day_from is not None or day_to is not None:
+        # ISO-даты сравниваются как строки
+        wanted = [i for i, d in enumerate(days) if (day_from or d) <= d <= (day_to or d)]
+        mask &= np.isin(rows[:, 2], wanted)
+    rows = rows[mask]
+    if not len(rows):
+        return []
+
+    dims = [BREAKDOWN_DIMS.index(g) for g in group_by]
+    values = rows[:, len(BREAKDOWN_DIMS):]
+    if dims:
+        groups, inverse = np.unique(rows[:, dims], axis=0, return_inverse=True)
+        sums = np.zeros((len(groups), values.shape[1]), dtype=np.int64)
+        np.add.at(sums, inverse.ravel(), values)
+    else:
+        groups, sums = np.zeros((1, 0), dtype=np.int64), values.sum(axis=0, keepdims=True)
+
+    labels = {"source_id": sources, "topic": topic_names, "day": days}
+    out: list[dict[str, Any]] = []
+    for key, vals in zip(groups.tolist(), sums.tolist()):
+        item: dict[str, Any] = {g: labels[g][i] for g, i in zip(group_by, key)}
+        item.update(zip(BREAKDOWN_VALUES, vals))
+        scored = sum(vals[1:])
+        item["neg_share"] = round(vals[1] / scored, 4) if scored else None
+        out.append(item)
+    return out
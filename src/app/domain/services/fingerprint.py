@@ -0,0 +1,44 @@
+import hashlib
+import json
+from datetime import timezone
+
+from src.app.domain.value_objects import AnalysisScope
+
+
+def scope_fingerprint(scope: AnalysisScope, model_key: str) -> str:
+    """
+    sha256 канонического представления scope + версии модели.
+    Одинаковые по смыслу запросы (порядок/дубли source_ids, регистр query,
+    таймзона дат) дают один и тот же отпечаток.
+    """
+    query = (scope.query or "").strip().lower() or None
+    canonical = {
+        "source_ids": sorted({int(x) for x in scope.source_ids}),
+        "start": scope.date_range.start.astimezone(timezone.utc).isoformat(),
+        "end": scope.date_range.end.astimezone(timezone.utc).isoformat(),
+        "query": query,
+        "model": model_key,
+    }
+    raw = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def aggregate_key(query: str | None, model_key: str) -> str:
+    """
+    Ключ совместимости дневных агрегатов: одинаковые query и модель –
+    посчитанные сутки можно переиспользовать в задаче с другим периодом.
+    """
+    raw = json.dumps(
+        {"query": (query or "").strip().lower() or None, "model": model_key},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def url_hash(url: str) -> str:
+    """
+    Ключ дедупа документа в источнике (documents.url_hash) – как в импортёре Lenta.
+    """
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
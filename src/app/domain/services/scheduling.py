@@ -0,0 +1,22 @@
+from src.app.domain.enums import JobSize
+
+# Приоритет сообщения в RabbitMQ (x-max-priority = MAX_PRIORITY): интерактивные
+# маленькие задачи обгоняют многолетние выгрузки в общей очереди.
+MAX_PRIORITY = 9
+
+PRIORITY_BY_SIZE = {
+    JobSize.SMALL: 9,
+    JobSize.MEDIUM: 5,
+    JobSize.LARGE: 1,
+}
+
+
+def size_class(docs_estimate: int, small_max: int, medium_max: int) -> JobSize:
+    """
+    Класс размера задачи по оценке числа документов (count при создании).
+    """
+    if docs_estimate <= small_max:
+        return JobSize.SMALL
+    if docs_estimate <= medium_max:
+        return JobSize.MEDIUM
+    return JobSize.LARGE
@@ -0,0 +1,195 @@
+import math
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional, Sequence
+
+from src.app.domain.value_objects import TrendSignal
+
+
+@dataclass
+class StreamTrendState:
+    """
+    Ограниченное состояние онлайн-детектора одного источника: открытая корзина времени,
+    EWMA-среднее/дисперсия числа документов по закрытым корзинам и не больше max_gaps
+    незаполненных промежутков id.
+    """
+    bucket_seconds: int
+    bucket_start: Optional[datetime] = None
+    count: int = 0
+    mean: float = 0.0
+    var: float = 0.0
+    buckets: int = 0
+    # spike по открытой корзине уже отправлен; предыдущая корзина закрылась drop'ом
+    alerted: bool = False
+    dropping: bool = False
+    # watermark: максимальный учтённый id
+    last_doc_id: int = 0
+    late_docs: int = 0
+    # id выдаётся до commit, поэтому меньший id может закоммититься позже большего:
+    # незаполненные промежутки ниже watermark – [lo, hi, когда появился (epoch)], id строго между lo и hi
+    gaps: list[list[int]] = field(default_factory=list)
+
+    def gap_ranges(self) -> list[tuple[int, int]]:
+        return [(int(lo), int(hi)) for lo, hi, _ in self.gaps]
+
+    def advance_to(self, doc_id: int, now: datetime) -> None:
+        """
+        Новый документ выше watermark: пропущенные id под ним становятся промежутком.
+        """
+        if doc_id > self.last_doc_id + 1:
+            self.gaps.append([self.last_doc_id, doc_id, int(now.timestamp())])
+        self.last_doc_id = doc_id
+
+    def fill(self, doc_id: int) -> None:
+        """
+        Опоздавший документ из промежутка: промежуток делится на части по обе стороны от него.
+        """
+        gaps = []
+        for lo, hi, seen in self.gaps:
+            if lo < doc_id < hi:
+                gaps += [[a, b, seen] for a, b in ((lo, doc_id), (doc_id, hi)) if b - a > 1]
+            else:
+                gaps.append([lo, hi, seen])
+        self.gaps = gaps
+
+    def expire_gaps(self, before: datetime, max_gaps: int) -> None:
+        """
+        Промежуток старше окна перекрытия уже не заполнится (вставляющая транзакция не держится
+        так долго); сверх max_gaps отбрасываются самые старые.
+        """
+        ts = before.timestamp()
+        self.gaps = [g for g in self.gaps if g[2] > ts][-max_gaps:] if max_gaps > 0 else []
+
+    def to_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        d["bucket_start"] = self.bucket_start.isoformat() if self.bucket_start else None
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "StreamTrendState":
+        d = dict(d)
+        if d.get("bucket_start"):
+            d["bucket_start"] = datetime.fromisoformat(d["bucket_start"])
+        return cls(**d)
+
+
+class StreamTrendDetector:
+    """
+    Онлайн rolling z-score: документы поступают по одному, корзина (например, час) сравнивается
+    с EWMA предыдущих корзин. Spike отправляется сразу, как только счётчик открытой корзины
+    превысил порог (счётчик только растёт – дожидаться конца корзины не нужно), drop – при закрытии.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.1,
+        z_threshold: float = 3.0,
+        min_buckets: int = 24,
+        max_gap_buckets: int = 24 * 7,
+    ):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_buckets = min_buckets
+        self.max_gap_buckets = max_gap_buckets
+
+    @staticmethod
+    def bucket_of(state: StreamTrendState, ts: datetime) -> datetime:
+        epoch = math.floor(ts.timestamp() / state.bucket_seconds) * state.bucket_seconds
+        return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+    def warm_up(self, state: StreamTrendState, counts: Sequence[int]) -> None:
+        """
+        Прогрев по историческим счётчикам закрытых корзин (по возрастанию времени), без сигналов.
+        """
+        for x in counts:
+            self._update(state, float(x))
+
+    def observe(self, state: StreamTrendState, ts: datetime) -> list[TrendSignal]:
+        bucket = self.bucket_of(state, ts)
+        if state.bucket_start is None:
+            state.bucket_start = bucket
+
+        if bucket < state.bucket_start:
+            # опоздавший документ: корзина уже закрыта и учтена в EWMA
+            state.late_docs += 1
+            return []
+
+        signals = self.advance(state, bucket)
+        state.count += 1
+
+        if not state.alerted:
+            z = self._z(state, state.count)
+            if z is not None and z >= self.z_threshold:
+                state.alerted = True
+                signals.append(self._signal(state, "spike", z))
+        return signals
+
+    def advance(self, state: StreamTrendState, until: datetime) -> list[TrendSignal]:
+        """
+        Закрывает все корзины раньше корзины, содержащей until (в т.ч. пустые – тишина источника).
+        """
+        target = self.bucket_of(state, until)
+        if state.bucket_start is None:
+            state.bucket_start = target
+            return []
+
+        signals: list[TrendSignal] = []
+        closed = 0
+        while state.bucket_start < target:
+            if closed >= self.max_gap_buckets:
+                # длинный простой: дальше пустые корзины не разбираем по одной
+                state.bucket_start = target
+                break
+            signal = self._close(state)
+            if signal:
+                signals.append(signal)
+            state.bucket_start = datetime.fromtimestamp(
+                state.bucket_start.timestamp() + state.bucket_seconds, tz=timezone.utc
+            )
+            closed += 1
+        return signals
+
+    def _close(self, state: StreamTrendState) -> Optional[TrendSignal]:
+        signal = None
+        if not state.alerted:
+            z = self._z(state, state.count)
+            # подряд идущие провальные корзины – одно событие
+            if z is not None and z <= -self.z_threshold and not state.dropping:
+                signal = self._signal(state, "drop", z)
+            state.dropping = z is not None and z <= -self.z_threshold
+        else:
+            state.dropping = False
+
+        self._update(state, float(state.count))
+        state.count = 0
+        state.alerted = False
+        return signal
+
+    def _z(self, state: StreamTrendState, x: float) -> Optional[float]:
+        if state.buckets < self.min_buckets:
+            return None
+        std = math.sqrt(state.var)
+        if std < 1e-9:
+            return None
+        return (x - state.mean) / std
+
+    def _update(self, state: StreamTrendState, x: float) -> None:
+        # EWMA среднего и дисперсии (инкрементальная форма, O(1))
+        if state.buckets == 0:
+            state.mean, state.var = x, 0.0
+        else:
+            diff = x - state.mean
+            incr = self.alpha * diff
+            state.mean += incr
+            state.var = (1 - self.alpha) * (state.var + diff * incr)
+        state.buckets += 1
+
+    @staticmethod
+    def _signal(state: StreamTrendState, kind: str, z: float) -> TrendSignal:
+        return TrendSignal(
+            ts=state.bucket_start,
+            kind=kind,
+            value=float(state.count),
+            baseline=state.mean,
+            z=z,
+        )
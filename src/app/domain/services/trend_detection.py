@@ -1,5 +1,129 @@
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 from src.app.domain.value_objects import TrendSignal
 
+# Std окна ниже порога – окно считается плоским, сигнал не ищется
+_MIN_STD = 1e-9
+
+
+def _min_history(window: int) -> int:
+    return max(3, window // 2)
+
+
+def rolling_zscore(values, window: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling z-score: точка i сравнивается с окном values[i-window:i]
+    (выборочное std, ddof=1). values – 1-D ряд или 2-D массив (ряд на строку).
+    NaN в values – пропуск (например, день со слишком малой выборкой): окно остаётся позиционным
+    (window соседних точек), пропуски в нём не учитываются, для самой точки сигнал не ищется.
+    Возвращает (z, baseline) той же формы; NaN – где окно слишком короткое или плоское.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    one_d = x.ndim == 1
+    x = np.atleast_2d(x)
+    n = x.shape[1]
+
+    z = np.full(x.shape, np.nan)
+    baseline = np.full(x.shape, np.nan)
+    if n == 0:
+        return (z[0], baseline[0]) if one_d else (z, baseline)
+
+    idx = np.arange(n)
+    left = np.maximum(0, idx - window)
+    cnt = idx - left
+
+    ok = cnt >= _min_history(window)
+    i, lo, m = idx[ok], left[ok], cnt[ok]
+
+    # Счётчики документов целые: кумулятивные суммы в int64 точные – O(n), и z на границе
+    # порога совпадает с эталоном. Дробные ряды и ряды с пропусками – двухпроходно по окнам
+    # (stride tricks, O(n·window)): кумулятивные суммы float теряют точность на почти плоских окнах
+    # больших значений.
+    peak = float(np.abs(x).max())
+    if bool(np.all(x == np.rint(x))) and max(n, window * window) * peak * peak < 2.0**62:
+        xi = x.astype(np.int64)
+        zeros = np.zeros((x.shape[0], 1), dtype=np.int64)
+        c1 = np.concatenate([zeros, np.cumsum(xi, axis=1)], axis=1)
+        c2 = np.concatenate([zeros, np.cumsum(xi * xi, axis=1)], axis=1)
+
+        s1 = c1[:, i] - c1[:, lo]
+        s2 = c2[:, i] - c2[:, lo]
+        mean = s1 / m
+        # sum((x - mean)^2) = (m·S2 − S1²) / m – числитель целый
+        var = (m * s2 - s1 * s1) / (m * (m - 1))
+    else:
+        padded = np.concatenate([np.full((x.shape[0], window), np.nan), x[:, :-1]], axis=1)
+        mean = np.empty((x.shape[0], len(i)))
+        var = np.empty_like(mean)
+        # построчно: (окна × window) на ряд, а не на весь 2-D массив сразу
+        for r in range(x.shape[0]):
+            hist = sliding_window_view(padded[r], window)[i]
+            # непропущенных точек в окне; без пропусков совпадает с m
+            valid = np.sum(~np.isnan(hist), axis=1)
+            cnt = np.where(valid >= _min_history(window), valid, np.nan)
+            mean[r] = np.nansum(hist, axis=1) / cnt
+            var[r] = np.nansum((hist - mean[r][:, None]) ** 2, axis=1) / (cnt - 1)
+    std = np.sqrt(var)
+
+    # changes[j] – сколько раз значение менялось на позициях 1..j: окно плоское ровно тогда,
+    # когда внутри него нет смен (без ошибок округления)
+    changes = np.concatenate(
+        [np.zeros((x.shape[0], 1), dtype=np.int64), np.cumsum(x[:, 1:] != x[:, :-1], axis=1)], axis=1
+    )
+    flat = (changes[:, i - 1] - changes[:, lo]) == 0
+    std = np.where(flat | (std < _MIN_STD), np.nan, std)
+
+    z[:, ok] = (x[:, ok] - mean) / std
+    baseline[:, ok] = np.where(np.isnan(std), np.nan, mean)
+
+    return (z[0], baseline[0]) if one_d else (z, baseline)
+
+
+def _signals(
+    values: np.ndarray,
+    z: np.ndarray,
+    baseline: np.ndarray,
+    tss: Sequence[datetime],
+    z_threshold: float,
+) -> list[TrendSignal]:
+    hits = np.flatnonzero(np.abs(np.nan_to_num(z)) >= z_threshold)
+    return [
+        TrendSignal(
+            ts=tss[i],
+            kind="spike" if z[i] > 0 else "drop",
+            value=float(values[i]),
+            baseline=float(baseline[i]),
+            z=float(z[i]),
+        )
+        for i in hits
+    ]
+
+
+def detect_trends_array(
+    values,
+    tss: Sequence[datetime],
+    window: int = 5,
+    z_threshold: float = 2.0,
+    min_points: int = 8,
+) -> list[TrendSignal] | list[list[TrendSignal]]:
+    """
+    Векторная версия detect_trends: values – 1-D ряд или 2-D массив рядов с общей осью времени tss
+    (например, все источники или темы задачи). Для 2-D – список сигналов на каждую строку.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if x.shape[-1] < max(1, min_points):
+        return [] if x.ndim == 1 else [[] for _ in range(x.shape[0])]
+
+    z, baseline = rolling_zscore(x, window)
+    if x.ndim == 1:
+        return _signals(x, z, baseline, tss, z_threshold)
+    return [_signals(x[r], z[r], baseline[r], tss, z_threshold) for r in range(x.shape[0])]
+
+
 def detect_trends(
     time_series: list[dict],
     window: int = 5,
@@ -7,7 +131,24 @@ def detect_trends(
     min_points: int = 8,
 ) -> list[TrendSignal]:
     """
-    MVP: rolling z-score.
+    MVP: rolling z-score. value=None – пропуск: точка остаётся на оси времени, но не входит в окна.
+    """
+    if not time_series or sum(p["value"] is not None for p in time_series) < min_points:
+        return []
+
+    values = [np.nan if p["value"] is None else float(p["value"]) for p in time_series]
+    tss = [p["ts"] for p in time_series]
+    return detect_trends_array(values, tss, window=window, z_threshold=z_threshold, min_points=min_points)
+
+
+def detect_trends_reference(
+    time_series: list[dict],
+    window: int = 5,
+    z_threshold: float = 2.0,
+    min_points: int = 8,
+) -> list[TrendSignal]:
+    """
+    Исходная реализация O(n·window) на чистом Python – эталон для тестов и бенчмарка.
     """
     if not time_series or len(time_series) < min_points:
         return []
@@ -20,7 +161,7 @@ def detect_trends(
     for i in range(len(values)):
         left = max(0, i - window)
         right = i
-        if right - left < max(3, window // 2):
+        if right - left < _min_history(window):
             continue
 
         hist = values[left:right]
@@ -28,7 +169,7 @@ def detect_trends(
         var = sum((x - mean) ** 2 for x in hist) / max(1, (len(hist) - 1))
         std = var ** 0.5
 
-        if std < 1e-9:
+        if std < _MIN_STD:
             continue
 
         z = (values[i] - mean) / std
@@ -38,4 +179,4 @@ def detect_trends(
         elif z <= -z_threshold:
             events.append(TrendSignal(ts=tss[i], kind="drop", value=values[i], baseline=mean, z=z))
 
-    return events
\ No newline at end of file
+    return events
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List
 
 
 @dataclass(frozen=True)
@@ -50,4 +50,28 @@ class TrendSignal:
     kind: str
     value: float
     baseline: float
-    z: float
\ No newline at end of file
+    z: float
+
+
+@dataclass(frozen=True)
+class IncomingDocument:
+    """
+    Документ от адаптера источника до записи в documents (id и url_hash назначаются при вставке).
+    """
+    url: str
+    text: str
+    published_at: datetime
+    title: Optional[str] = None
+    topic: Optional[str] = None
+    meta: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """
+    Порция документов адаптера и watermark сразу после неё (JSON-совместимый, хранится в курсоре).
+    has_more – у источника есть ещё документы после watermark.
+    """
+    docs: List[IncomingDocument]
+    watermark: Optional[dict[str, Any]]
+    has_more: bool = False
@@ -0,0 +1,565 @@
+from typing import Any, Optional
+from datetime import datetime, timezone
+
+from sqlalchemy import select, insert, update, func, or_, literal, true, cast, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.infra.models import (
+    UserORM, AccountORM, AccountUserORM,
+    SubscriptionORM, SourceORM, AccountSourceORM,
+    DocumentORM, AnalysisJobORM, OverviewReportORM,
+    TrendEventORM, AnalysisShardORM,
+)
+from src.app.infra.repositories import (
+    _user_dom, _auth_creds_dom, _source_dom,
+    _job_dom, _overview_dom, _scope_to_dict,
+    _shard_dom,
+)
+
+from src.app.domain.enums import JobStatus
+from src.app.domain.value_objects import AnalysisScope, AuthCredentials
+from src.app.domain.entities.user import User
+from src.app.domain.entities.source import Source
+from src.app.domain.entities.analysis_job import AnalysisJob
+from src.app.domain.entities.overview_report import OverviewReport
+from src.app.domain.entities.trend_event import TrendEvent
+from src.app.domain.entities.analysis_shard import AnalysisShard
+
+
+# Async-репозитории для request path (FastAPI). Маппинг ORM -> Domain общий с sync-версией.
+class AsyncSqlUserRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        u = (await self.db.execute(select(UserORM).where(UserORM.email == email))).scalars().first()
+        return _user_dom(u) if u else None
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        u = await self.db.get(UserORM, user_id)
+        return _user_dom(u) if u else None
+
+    async def get_auth_credentials(self, email: str) -> Optional[AuthCredentials]:
+        u = (await self.db.execute(select(UserORM).where(UserORM.email == email))).scalars().first()
+        return _auth_creds_dom(u) if u else None
+
+    async def create(self, email: str, password_hash: str) -> User:
+        u = UserORM(email=email, password_hash=password_hash, is_active=True)
+        self.db.add(u)
+        await self.db.flush()
+        await self.db.refresh(u)
+        return _user_dom(u)
+
+    async def set_active(self, user_id: int, is_active: bool) -> None:
+        await self.db.execute(
+            update(UserORM).where(UserORM.id == user_id).values(is_active=bool(is_active))
+        )
+
+
+class AsyncSqlAccountRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, name: str) -> int:
+        acc = AccountORM(name=name)
+        self.db.add(acc)
+        await self.db.flush()
+        return int(acc.id)
+
+    async def add_user(self, account_id: int, user_id: int, role: str) -> None:
+        self.db.add(AccountUserORM(account_id=account_id, user_id=user_id, role=role))
+        await self.db.flush()
+
+    async def get_user_link(self, user_id: int) -> Optional[tuple[int, str]]:
+        row = (
+            await self.db.execute(select(AccountUserORM).where(AccountUserORM.user_id == user_id))
+        ).scalars().first()
+        if not row:
+            return None
+        return int(row.account_id), str(row.role)
+
+
+class AsyncSqlSubscriptionRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def ensure_free_active(self, account_id: int) -> None:
+        stmt = (
+            pg_insert(SubscriptionORM)
+            .values(account_id=account_id, plan="free", status="active")
+            .on_conflict_do_nothing(index_elements=[SubscriptionORM.account_id])
+        )
+        await self.db.execute(stmt)
+
+
+class AsyncSqlAccountSourceRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def grant_all_global(self, account_id: int) -> None:
+        """
+        Выдаёт доступ ко всем существующим sources (enabled=True) одним INSERT ... SELECT.
+        """
+        stmt = pg_insert(AccountSourceORM).from_select(
+            ["account_id", "source_id", "is_enabled"],
+            select(literal(account_id), SourceORM.id, true()),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AccountSourceORM.account_id, AccountSourceORM.source_id],
+            set_={"is_enabled": True},
+        )
+        await self.db.execute(stmt)
+
+
+class AsyncSqlSourceRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_by_account(self, account_id: int) -> list[Source]:
+        rows = (
+            await self.db.execute(
+                select(SourceORM)
+                .join(AccountSourceORM, AccountSourceORM.source_id == SourceORM.id)
+                .where(
+                    AccountSourceORM.account_id == account_id,
+                    AccountSourceORM.is_enabled.is_(True),
+                )
+                .order_by(SourceORM.created_at.desc())
+            )
+        ).scalars().all()
+        return [_source_dom(s) for s in rows]
+
+    async def get_by_id(self, account_id: int, source_id: int) -> Optional[Source]:
+        s = (
+            await self.db.execute(
+                select(SourceORM)
+                .join(AccountSourceORM, AccountSourceORM.source_id == SourceORM.id)
+                .where(
+                    SourceORM.id == source_id,
+                    AccountSourceORM.account_id == account_id,
+                    AccountSourceORM.is_enabled.is_(True),
+                )
+            )
+        ).scalars().first()
+        return _source_dom(s) if s else None
+
+    async def accessible_ids(self, account_id: int, source_ids: list[int]) -> set[int]:
+        """
+        Какие из source_ids доступны аккаунту – одним запросом для пачки scope.
+        """
+        if not source_ids:
+            return set()
+        rows = await self.db.execute(
+            select(AccountSourceORM.source_id).where(
+                AccountSourceORM.account_id == account_id,
+                AccountSourceORM.source_id.in_(source_ids),
+                AccountSourceORM.is_enabled.is_(True),
+            )
+        )
+        return {int(x) for x in rows.scalars().all()}
+
+
+def _scope_count_query(source_ids, date_from, date_to, query=None):
+    q = select(func.count(DocumentORM.id)).where(
+        DocumentORM.source_id.in_(list(source_ids)),
+        DocumentORM.published_at >= date_from,
+        DocumentORM.published_at <= date_to,
+    )
+
+    if query:
+        qq = f"%{query.strip().lower()}%"
+        q = q.where(
+            or_(
+                func.lower(func.coalesce(DocumentORM.title, "")).like(qq),
+                func.lower(DocumentORM.text).like(qq),
+            )
+        )
+    return q
+
+
+class AsyncSqlDocumentRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def count_by_sources_and_period(self, source_ids, date_from, date_to, query=None) -> int:
+        q = _scope_count_query(source_ids, date_from, date_to, query)
+        return int((await self.db.execute(q)).scalar() or 0)
+
+    async def count_by_scopes(self, scopes: list[AnalysisScope]) -> list[int]:
+        """
+        count по каждому scope одним round-trip'ом (UNION ALL), порядок как у scopes.
+        """
+        if not scopes:
+            return []
+        parts = [
+            _scope_count_query(s.source_ids, s.date_range.start, s.date_range.end, s.query)
+            .add_columns(literal(i).label("idx"))
+            for i, s in enumerate(scopes)
+        ]
+        counts = [0] * len(scopes)
+        for n, idx in (await self.db.execute(union_all(*parts))).all():
+            counts[int(idx)] = int(n or 0)
+        return counts
+
+    async def watermark_by_sources_and_period(self, source_ids, date_from, date_to) -> tuple[int, Optional[int]]:
+        """
+        (count, max(id)) документов диапазона – дешёвая проверка, не изменились ли данные.
+        """
+        total, max_id = (
+            await self.db.execute(
+                select(func.count(DocumentORM.id), func.max(DocumentORM.id)).where(
+                    DocumentORM.source_id.in_(list(source_ids)),
+                    DocumentORM.published_at >= date_from,
+                    DocumentORM.published_at <= date_to,
+                )
+            )
+        ).one()
+        return int(total or 0), (int(max_id) if max_id is not None else None)
+
+    async def stats_by_source(self, account_id: int, source_id: int) -> dict:
+        """
+        Статистика по source – только если source доступен аккаунту.
+        """
+        access = (
+            await self.db.execute(
+                select(AccountSourceORM.source_id).where(
+                    AccountSourceORM.account_id == account_id,
+                    AccountSourceORM.source_id == source_id,
+                    AccountSourceORM.is_enabled.is_(True),
+                )
+            )
+        ).first()
+        if not access:
+            raise ValueError("Источник не найден или запрещён.")
+
+        total, dmin, dmax = (
+            await self.db.execute(
+                select(
+                    func.count(DocumentORM.id),
+                    func.min(DocumentORM.published_at),
+                    func.max(DocumentORM.published_at),
+                ).where(DocumentORM.source_id == source_id)
+            )
+        ).one()
+        return {
+            "total_documents": int(total or 0),
+            "date_min": dmin,
+            "date_max": dmax,
+        }
+
+
+class AsyncSqlAnalysisJobRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(
+        self,
+        account_id: int,
+        scope: AnalysisScope,
+        fingerprint: Optional[str] = None,
+        docs_estimate: Optional[int] = None,
+        size_class: Optional[str] = None,
+        priority: int = 0,
+    ) -> AnalysisJob:
+        j = AnalysisJobORM(
+            account_id=account_id,
+            status=JobStatus.PENDING.value,
+            scope=_scope_to_dict(scope),
+            scope_fingerprint=fingerprint,
+            docs_estimate=docs_estimate,
+            size_class=size_class,
+            priority=priority,
+        )
+        self.db.add(j)
+        await self.db.flush()
+        await self.db.refresh(j)
+        return _job_dom(j)
+
+    async def create_many(self, account_id: int, items: list[dict[str, Any]]) -> list[AnalysisJob]:
+        """
+        Пачка задач одним multi-row INSERT ... RETURNING (серверные default'ы – сразу в ответе).
+        items – аргументы create(): scope, fingerprint, docs_estimate, size_class, priority.
+        """
+        if not items:
+            return []
+        rows = (
+            await self.db.scalars(
+                insert(AnalysisJobORM).returning(AnalysisJobORM, sort_by_parameter_order=True),
+                [
+                    {
+                        "account_id": account_id,
+                        "status": JobStatus.PENDING.value,
+                        "scope": _scope_to_dict(it["scope"]),
+                        "scope_fingerprint": it.get("fingerprint"),
+                        "docs_estimate": it.get("docs_estimate"),
+                        "size_class": it.get("size_class"),
+                        "priority": it.get("priority", 0),
+                    }
+                    for it in items
+                ],
+            )
+        ).all()
+        return [_job_dom(j) for j in rows]
+
+    async def set_status(self, job_id: int, status: JobStatus, error: str | None = None) -> None:
+        j = await self.db.get(AnalysisJobORM, job_id)
+        if not j:
+            raise ValueError("Задача не найдена.")
+
+        j.status = status.value
+
+        if status in (JobStatus.DONE, JobStatus.ERROR, JobStatus.CANCELED):
+            j.finished_at = datetime.now(timezone.utc)
+
+        if error is not None:
+            j.error = error or None
+
+        await self.db.flush()
+
+    async def set_error(self, job_id: int, error: str) -> None:
+        await self.set_status(job_id, JobStatus.ERROR, error=error)
+
+    async def list_by_account(self, account_id: int, limit: int = 50) -> list[AnalysisJob]:
+        rows = (
+            await self.db.execute(
+                select(AnalysisJobORM)
+                .where(AnalysisJobORM.account_id == account_id)
+                .order_by(AnalysisJobORM.created_at.desc())
+                .limit(limit)
+            )
+        ).scalars().all()
+        return [_job_dom(j) for j in rows]
+
+    async def get_by_id(self, account_id: int, job_id: int) -> Optional[AnalysisJob]:
+        j = (
+            await self.db.execute(
+                select(AnalysisJobORM).where(
+                    AnalysisJobORM.id == job_id,
+                    AnalysisJobORM.account_id == account_id,
+                )
+            )
+        ).scalars().first()
+        return _job_dom(j) if j else None
+
+    async def cancel(self, account_id: int, job_id: int) -> bool:
+        """
+        PENDING/RUNNING -> CANCELED одним UPDATE. Воркер увидит статус на ближайшем heartbeat
+        и остановится. False – задача уже завершена (или не найдена).
+        """
+        canceled_id = (
+            await self.db.execute(
+                update(AnalysisJobORM)
+                .where(
+                    AnalysisJobORM.id == job_id,
+                    AnalysisJobORM.account_id == account_id,
+                    AnalysisJobORM.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value]),
+                )
+                .values(
+                    status=JobStatus.CANCELED.value,
+                    finished_at=func.now(),
+                    lease_expires_at=None,
+                    progress=AnalysisJobORM.progress.op("||")(cast({"stage": "canceled"}, JSONB)),
+                )
+                .returning(AnalysisJobORM.id)
+                .execution_options(synchronize_session="fetch")
+            )
+        ).scalar_one_or_none()
+        return canceled_id is not None
+
+    async def get_progress(self, account_id: int, job_id: int) -> Optional[tuple[JobStatus, dict]]:
+        """
+        Только status + progress (без scope и отчёта) – для частого polling.
+        """
+        row = (
+            await self.db.execute(
+                select(AnalysisJobORM.status, AnalysisJobORM.progress).where(
+                    AnalysisJobORM.id == job_id,
+                    AnalysisJobORM.account_id == account_id,
+                )
+            )
+        ).first()
+        if not row:
+            return None
+        return JobStatus(str(row.status)), dict(row.progress or {})
+
+
+class AsyncSqlOverviewRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_job(self, job_id: int) -> Optional[OverviewReport]:
+        r = await self.db.get(OverviewReportORM, job_id)
+        return _overview_dom(r) if r else None
+
+    async def latest_done_by_fingerprint(self, fingerprint: str) -> Optional[OverviewReport]:
+        r = (
+            await self.db.execute(
+                select(OverviewReportORM)
+                .join(AnalysisJobORM, AnalysisJobORM.id == OverviewReportORM.job_id)
+                .where(
+                    AnalysisJobORM.scope_fingerprint == fingerprint,
+                    AnalysisJobORM.status == JobStatus.DONE.value,
+                )
+                .order_by(AnalysisJobORM.finished_at.desc())
+                .limit(1)
+            )
+        ).scalars().first()
+        return _overview_dom(r) if r else None
+
+    async def latest_done_by_fingerprints(self, fingerprints: list[str]) -> dict[str, OverviewReport]:
+        """
+        latest_done_by_fingerprint для пачки отпечатков: DISTINCT ON по отпечатку.
+        """
+        if not fingerprints:
+            return {}
+        rows = (
+            await self.db.execute(
+                select(AnalysisJobORM.scope_fingerprint, OverviewReportORM)
+                .join(AnalysisJobORM, AnalysisJobORM.id == OverviewReportORM.job_id)
+                .where(
+                    AnalysisJobORM.scope_fingerprint.in_(set(fingerprints)),
+                    AnalysisJobORM.status == JobStatus.DONE.value,
+                )
+                .order_by(AnalysisJobORM.scope_fingerprint, AnalysisJobORM.finished_at.desc())
+                .distinct(AnalysisJobORM.scope_fingerprint)
+            )
+        ).all()
+        return {fp: _overview_dom(r) for fp, r in rows}
+
+    async def clone(self, src_job_id: int, dst_job_id: int, extra_metrics: dict) -> None:
+        """
+        Копия отчёта одним INSERT ... SELECT на стороне БД.
+        """
+        stmt = pg_insert(OverviewReportORM).from_select(
+            ["job_id", "total_documents", "sentiment_share", "metrics", "breakdown"],
+            select(
+                literal(dst_job_id),
+                OverviewReportORM.total_documents,
+                OverviewReportORM.sentiment_share,
+                OverviewReportORM.metrics.op("||")(cast(extra_metrics, JSONB)),
+                OverviewReportORM.breakdown,
+            ).where(OverviewReportORM.job_id == src_job_id),
+        )
+        await self.db.execute(stmt)
+
+    async def get_breakdown(self, job_id: int) -> Optional[dict[str, Any]]:
+        """
+        Только куб разбивки (deferred-колонка) – без остального отчёта.
+        """
+        return (
+            await self.db.execute(select(OverviewReportORM.breakdown).where(OverviewReportORM.job_id == job_id))
+        ).scalar_one_or_none()
+
+
+class AsyncSqlTrendRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_by_job(self, job_id: int, limit: int | None = None) -> list[TrendEvent]:
+        q = (
+            select(TrendEventORM)
+            .where(TrendEventORM.job_id == job_id)
+            .order_by(TrendEventORM.ts.asc())
+        )
+        if limit:
+            q = q.limit(limit)
+
+        rows = (await self.db.execute(q)).scalars().all()
+        return [
+            TrendEvent(
+                job_id=row.job_id,
+                ts=row.ts,
+                kind=row.kind,
+                value=row.value,
+                baseline=row.baseline,
+                z=row.z,
+                top_doc_ids=list(row.top_doc_ids or []),
+            )
+            for row in rows
+        ]
+
+    async def list_by_source(self, source_id: int, limit: int = 100) -> list[TrendEvent]:
+        """
+        Онлайн-события STREAM-источника, новые первыми.
+        """
+        rows = (
+            await self.db.execute(
+                select(TrendEventORM)
+                .where(TrendEventORM.source_id == source_id)
+                .order_by(TrendEventORM.ts.desc(), TrendEventORM.id.desc())
+                .limit(limit)
+            )
+        ).scalars().all()
+        return [
+            TrendEvent(
+                job_id=row.job_id,
+                ts=row.ts,
+                kind=row.kind,
+                value=row.value,
+                baseline=row.baseline,
+                z=row.z,
+                source_id=row.source_id,
+            )
+            for row in rows
+        ]
+
+    async def clone(self, src_job_id: int, dst_job_id: int) -> None:
+        cols = ["ts", "kind", "value", "baseline", "z", "top_doc_ids"]
+        stmt = pg_insert(TrendEventORM).from_select(
+            ["job_id", *cols],
+            select(literal(dst_job_id), *(getattr(TrendEventORM, c) for c in cols))
+            .where(TrendEventORM.job_id == src_job_id),
+        )
+        await self.db.execute(stmt)
+
+
+class AsyncSqlAnalysisShardRepo:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_by_job(self, job_id: int) -> list[AnalysisShard]:
+        rows = (
+            await self.db.execute(
+                select(AnalysisShardORM)
+                .where(AnalysisShardORM.job_id == job_id)
+                .order_by(AnalysisShardORM.idx.asc())
+            )
+        ).scalars().all()
+        return [_shard_dom(s) for s in rows]
+
+    async def cancel_by_job(self, job_id: int) -> None:
+        """
+        Незавершённые шарды отменённой задачи: PENDING не будут взяты, RUNNING остановятся на heartbeat'е.
+        """
+        await self.db.execute(
+            update(AnalysisShardORM)
+            .where(
+                AnalysisShardORM.job_id == job_id,
+                AnalysisShardORM.status.in_([JobStatus.PENDING.value, JobStatus.RUNNING.value]),
+            )
+            .values(
+                status=JobStatus.CANCELED.value,
+                lease_expires_at=None,
+                finished_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def summary(self, job_id: int) -> dict[str, int]:
+        """
+        Агрегат по шардам одним запросом: сколько всего, сколько готово, документов посчитано.
+        """
+        done = AnalysisShardORM.status == JobStatus.DONE.value
+        total, n_done, docs = (
+            await self.db.execute(
+                select(
+                    func.count(AnalysisShardORM.id),
+                    func.count(AnalysisShardORM.id).filter(done),
+                    func.coalesce(
+                        func.sum(AnalysisShardORM.partial["total"].as_integer()).filter(done), 0
+                    ),
+                ).where(AnalysisShardORM.job_id == job_id)
+            )
+        ).one()
+        return {"shards_total": int(total), "shards_done": int(n_done), "docs_scored": int(docs)}
@@ -0,0 +1,32 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.infra.async_repositories import (
+    AsyncSqlUserRepo, AsyncSqlAccountRepo, AsyncSqlSubscriptionRepo,
+    AsyncSqlSourceRepo, AsyncSqlDocumentRepo, AsyncSqlAnalysisJobRepo,
+    AsyncSqlOverviewRepo, AsyncSqlTrendRepo, AsyncSqlAccountSourceRepo,
+    AsyncSqlAnalysisShardRepo,
+)
+
+class SqlAlchemyAsyncUoW:
+    def __init__(self, db: AsyncSession, read_only: bool = False):
+        self.db = db
+        self.read_only = read_only
+
+        self.users = AsyncSqlUserRepo(db)
+        self.accounts = AsyncSqlAccountRepo(db)
+        self.subscriptions = AsyncSqlSubscriptionRepo(db)
+        self.sources = AsyncSqlSourceRepo(db)
+        self.documents = AsyncSqlDocumentRepo(db)
+        self.analysis = AsyncSqlAnalysisJobRepo(db)
+        self.overview = AsyncSqlOverviewRepo(db)
+        self.trend = AsyncSqlTrendRepo(db)
+        self.account_sources = AsyncSqlAccountSourceRepo(db)
+        self.shards = AsyncSqlAnalysisShardRepo(db)
+
+    async def commit(self) -> None:
+        if self.read_only:
+            raise RuntimeError("Read-only UoW cannot commit")
+        await self.db.commit()
+
+    async def rollback(self) -> None:
+        await self.db.rollback()
@@ -1,8 +1,12 @@
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
 import dotenv
 
+from src.app.core.metrics import instrument_engine
+
 dotenv.load_dotenv()
 
 NAMING_CONVENTION = {
@@ -17,15 +21,55 @@ class Base(DeclarativeBase):
     # Задаем naming convention для стабильных diff'ов и корректного drop/alter
     metadata = MetaData(naming_convention=NAMING_CONVENTION)
 
-def make_engine(dsn: str):
-    return create_engine(dsn, pool_pre_ping=True)
+def make_engine(dsn: str, read_only: bool = False):
+    eng = create_engine(dsn, pool_pre_ping=True)
+    if read_only:
+        # Реплика: все транзакции открываются как READ ONLY
+        eng = eng.execution_options(postgresql_readonly=True)
+    return eng
 
 def make_session_factory(engine_):
     return sessionmaker(bind=engine_, autoflush=False, autocommit=False, expire_on_commit=False)
 
+def to_async_dsn(dsn: str) -> str:
+    """
+    postgresql:// | postgresql+psycopg2:// -> postgresql+asyncpg://
+    """
+    url = make_url(dsn)
+    return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+def make_async_engine(dsn: str, read_only: bool = False, **kwargs):
+    eng = create_async_engine(to_async_dsn(dsn), pool_pre_ping=True, **kwargs)
+    if read_only:
+        eng = eng.execution_options(postgresql_readonly=True)
+    return eng
+
+def make_async_session_factory(engine_):
+    return async_sessionmaker(bind=engine_, autoflush=False, expire_on_commit=False)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
 engine = make_engine(DATABASE_URL)
-SessionLocal = make_session_factory(engine)
\ No newline at end of file
+SessionLocal = make_session_factory(engine)
+
+# Read-only реплика для отчётов, рядов и статистики.
+# Если DATABASE_URL_RO не задан – читаем с primary (тот же DSN, отдельный пул).
+DATABASE_URL_RO = os.getenv("DATABASE_URL_RO") or DATABASE_URL
+
+engine_ro = make_engine(DATABASE_URL_RO, read_only=True)
+SessionLocalRO = make_session_factory(engine_ro)
+
+# Async-движки для request path (FastAPI), синхронные выше – для воркера и скриптов
+async_engine = make_async_engine(DATABASE_URL)
+AsyncSessionLocal = make_async_session_factory(async_engine)
+
+async_engine_ro = make_async_engine(DATABASE_URL_RO, read_only=True)
+AsyncSessionLocalRO = make_async_session_factory(async_engine_ro)
+
+# Метрики SQL (db_queries_total, db_query_duration_seconds) по движкам
+instrument_engine(engine, "primary")
+instrument_engine(engine_ro, "replica")
+instrument_engine(async_engine.sync_engine, "primary_async")
+instrument_engine(async_engine_ro.sync_engine, "replica_async")
@@ -0,0 +1,80 @@
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class LocalJobQueue:
+    """
+    In-process очередь для одноузловых инсталляций и бенчмарков: asyncio.PriorityQueue
+    и пул консьюмеров в том же event loop. Семантика та же, что у RabbitMQ:
+    приоритет сообщений, отложенная повторная доставка, до concurrency задач одновременно.
+    Сообщения живут в памяти – после рестарта PENDING задачи заново ставятся из БД.
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.PriorityQueue | None = None
+        self._seq = itertools.count()
+        self._consumers: list[asyncio.Task] = []
+        self._timers: set[asyncio.TimerHandle] = set()
+
+    async def start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+
+    async def stop(self) -> None:
+        for t in self._timers:
+            t.cancel()
+        self._timers.clear()
+        for task in self._consumers:
+            task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers.clear()
+
+    def consume(self, handler: Handler, concurrency: int) -> None:
+        """
+        Запускает concurrency консьюмеров. Ошибка обработчика логируется и не останавливает консьюмер.
+        """
+        for _ in range(concurrency):
+            self._consumers.append(asyncio.create_task(self._consume(handler)))
+
+    async def _consume(self, handler: Handler) -> None:
+        assert self._queue is not None
+        while True:
+            _, _, payload = await self._queue.get()
+            try:
+                await handler(payload)
+            except Exception as exc:
+                logging.exception("local queue handler failed for %s: %s", payload, exc)
+            finally:
+                self._queue.task_done()
+
+    def _put(self, payload: dict[str, Any], priority: int) -> None:
+        assert self._queue is not None, "queue is not started"
+        # PriorityQueue – min-heap: больший приоритет раньше, при равенстве – FIFO
+        self._queue.put_nowait((-priority, next(self._seq), payload))
+
+    async def publish(self, payload: dict[str, Any], priority: int = 0) -> None:
+        self._put(payload, priority)
+
+    async def publish_many(self, messages: list[tuple[dict[str, Any], int]]) -> list[Optional[Exception]]:
+        for payload, priority in messages:
+            self._put(payload, priority)
+        return [None] * len(messages)
+
+    async def defer(self, payload: dict[str, Any], priority: int, delay_seconds: float) -> None:
+        def _fire() -> None:
+            self._timers.discard(timer)
+            self._put(payload, priority)
+
+        timer = asyncio.get_running_loop().call_later(delay_seconds, _fire)
+        self._timers.add(timer)
+
+    async def join(self) -> None:
+        """
+        Ждёт, пока все поставленные сообщения будут обработаны (тесты, бенчмарки).
+        """
+        if self._queue is not None:
+            await self._queue.join()
@@ -2,8 +2,9 @@ from sqlalchemy import (
     Column, String, Boolean,
     DateTime, BigInteger, ForeignKey,
     Text, Float, Integer,
-    UniqueConstraint, Index, Identity, text as sa_text,
+    UniqueConstraint, Index, Identity, CheckConstraint, text as sa_text,
 )
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -127,6 +128,8 @@ class DocumentORM(Base):
     __table_args__ = (
         UniqueConstraint("source_id", "url_hash", name="uq_documents_source_url_hash"),
         Index("idx_documents_source_published", "source_id", "published_at"),
+        # выборка новых документов источника по watermark id (онлайн-детектор трендов)
+        Index("idx_documents_source_id", "source_id", "id"),
         Index("idx_documents_topic", "topic"),
     )
 
@@ -145,9 +148,113 @@ class AnalysisJobORM(Base):
     finished_at = Column(DateTime(timezone=True), nullable=True)
     scope = Column(JSONB, nullable=False)
     error = Column(Text, nullable=True)
+    # Прогресс выполнения (stage, docs_*, docs_per_sec, eta_seconds) – пишется воркером с троттлингом
+    progress = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))
+    # sha256(канонический scope + версия модели) – переиспользование готовых результатов
+    scope_fingerprint = Column(String, nullable=True)
+    # планирование: оценка объёма при создании -> класс размера -> приоритет в очереди
+    docs_estimate = Column(Integer, nullable=True)
+    size_class = Column(String, nullable=True)
+    priority = Column(Integer, nullable=False, server_default=sa_text("0"))
+    # lease воркера: продлевается heartbeat'ом, просроченный lease забирает reaper
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default=sa_text("0"))
+    # чекпоинт инференса (last_doc_id, счётчики) – перезапущенная задача продолжает с него
+    checkpoint = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))
 
     __table_args__ = (
         Index("idx_analysis_jobs_account_created", "account_id", "created_at"),
+        Index("idx_analysis_jobs_account_status", "account_id", "status"),
+        Index(
+            "idx_analysis_jobs_fingerprint_done",
+            "scope_fingerprint",
+            "finished_at",
+            postgresql_where=sa_text("status = 'DONE'"),
+        ),
+        Index(
+            "idx_analysis_jobs_lease_running",
+            "lease_expires_at",
+            postgresql_where=sa_text("status = 'RUNNING'"),
+        ),
+    )
+
+
+class AnalysisShardORM(Base):
+    """
+    Часть задачи анализа (диапазон дат). Воркеры считают шарды независимо,
+    частичные агрегаты сливаются reduce-шагом в OverviewReport.
+    """
+    __tablename__ = "analysis_job_shards"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    job_id = Column(
+        BigInteger,
+        ForeignKey("analysis_jobs.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    idx = Column(Integer, nullable=False)
+    date_from = Column(DateTime(timezone=True), nullable=False)
+    date_to = Column(DateTime(timezone=True), nullable=False)
+    status = Column(String, nullable=False)
+    partial = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, server_default=sa_text("0"))
+
+    __table_args__ = (
+        UniqueConstraint("job_id", "idx", name="uq_analysis_job_shards_job_idx"),
+        Index("idx_analysis_job_shards_job_status", "job_id", "status"),
+        Index(
+            "idx_analysis_job_shards_lease_running",
+            "lease_expires_at",
+            postgresql_where=sa_text("status = 'RUNNING'"),
+        ),
+    )
+
+
+class DayAggregateORM(Base):
+    """
+    Частичные агрегаты задачи по (источник, сутки UTC) – только полные сутки периода.
+    Готовые сутки переиспользуются задачами с тем же agg_key (query + модель).
+    """
+    __tablename__ = "analysis_day_aggregates"
+
+    job_id = Column(
+        BigInteger,
+        ForeignKey("analysis_jobs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    source_id = Column(
+        BigInteger,
+        ForeignKey("sources.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day = Column(DateTime(timezone=True), primary_key=True)
+    agg_key = Column(String, nullable=False)
+
+    # watermark данных суток: документов в источнике за день (до query) и max(id)
+    docs_fetched = Column(Integer, nullable=False)
+    max_doc_id = Column(BigInteger, nullable=True)
+
+    docs_matched = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    neg = Column(Integer, nullable=False)
+    neu = Column(Integer, nullable=False)
+    pos = Column(Integer, nullable=False)
+    sentiment_mode = Column(String, nullable=False)
+    # самые негативные документы суток: [[p_neg, doc_id], ...] – для top_doc_ids трендов
+    top_docs = Column(JSONB, nullable=False, server_default=sa_text("'[]'::jsonb"))
+    # разбивка суток по темам: [[topic, docs, neg, neu, pos], ...]
+    topics = Column(JSONB, nullable=False, server_default=sa_text("'[]'::jsonb"))
+
+    __table_args__ = (
+        Index("idx_analysis_day_aggregates_lookup", "agg_key", "source_id", "day"),
     )
 
 
@@ -188,6 +295,8 @@ class OverviewReportORM(Base):
     total_documents = Column(Integer, nullable=False)
     sentiment_share = Column(JSONB, nullable=False)
     metrics = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))
+    # куб источник × тема × сутки (domain.services.breakdown); deferred – отчёт читается без него
+    breakdown = deferred(Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb")))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
@@ -199,9 +308,15 @@ class TrendEventORM(Base):
     job_id = Column(
         BigInteger,
         ForeignKey("analysis_jobs.id", ondelete="CASCADE"),
-        nullable=False,
+        nullable=True,
         index=True,
     )
+    # онлайн-события STREAM-источников – без задачи
+    source_id = Column(
+        BigInteger,
+        ForeignKey("sources.id", ondelete="CASCADE"),
+        nullable=True,
+    )
 
     ts = Column(DateTime(timezone=True), nullable=False)
     kind = Column(String, nullable=False)
@@ -209,10 +324,29 @@ class TrendEventORM(Base):
     baseline = Column(Float, nullable=False)
     z = Column(Float, nullable=False)
     top_doc_ids = Column(JSONB, nullable=False, server_default=sa_text("'[]'::jsonb"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     __table_args__ = (
         Index("idx_trend_events_job_ts", "job_id", "ts"),
+        Index("idx_trend_events_source_ts", "source_id", "ts", postgresql_where=sa_text("source_id IS NOT NULL")),
+        CheckConstraint("job_id IS NOT NULL OR source_id IS NOT NULL", name="owner"),
+    )
+
+
+class StreamTrendStateORM(Base):
+    """
+    Состояние онлайн-детектора трендов STREAM-источника (EWMA по корзинам, watermark документов).
+    Пустой state – детектор ещё не прогрет.
+    """
+    __tablename__ = "stream_trend_states"
+
+    source_id = Column(
+        BigInteger,
+        ForeignKey("sources.id", ondelete="CASCADE"),
+        primary_key=True,
     )
+    state = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
 class IngestionJobORM(Base):
@@ -233,7 +367,16 @@ class IngestionJobORM(Base):
 
     error = Column(Text, nullable=True)
     stats = Column(JSONB, nullable=False, server_default=sa_text("'{}'::jsonb"))
+    # курсор инкрементальной загрузки (kind INCREMENTAL): когда источник опрашивается в следующий раз
+    next_run_at = Column(DateTime(timezone=True), nullable=True)
 
     __table_args__ = (
         Index("idx_ingestion_jobs_source_kind", "source_id", "kind"),
+        Index(
+            "uq_ingestion_jobs_incremental_source",
+            "source_id",
+            "kind",
+            unique=True,
+            postgresql_where=sa_text("kind = 'INCREMENTAL'"),
+        ),
     )
\ No newline at end of file
@@ -1,18 +1,103 @@
 import os
 import json
-from typing import Any
-from faststream.rabbit import RabbitBroker
+import asyncio
+from typing import Any, Optional
+from faststream.rabbit import RabbitBroker, RabbitQueue
+
+from src.app.domain.contracts.queue import JobQueue
+from src.app.domain.services.scheduling import MAX_PRIORITY
+from src.app.infra.local_queue import LocalJobQueue
 
 RABBIT_URL = os.getenv("RABBIT_URL")
 QUEUE_NAME = os.getenv("QUEUE_NAME")
 
+# rabbit – RabbitMQ и отдельные воркеры; local – in-process очередь и пул воркеров в процессе API
+QUEUE_BACKEND = os.getenv("QUEUE_BACKEND", "rabbit")
+
+# Сколько задача, упёршаяся в лимит RUNNING аккаунта, ждёт до повторной попытки
+ANALYSIS_DEFER_SECONDS = int(os.getenv("ANALYSIS_DEFER_SECONDS", "15"))
+
+# Аргументы очереди в RabbitMQ неизменяемы: повторное объявление QUEUE_NAME с x-max-priority
+# падает с PRECONDITION_FAILED на существующем брокере. Поэтому приоритетная очередь живёт под
+# новым именем, а старую очередь переносит scripts/migrate_analysis_queue.py
+ANALYSIS_QUEUE_NAME = os.getenv("ANALYSIS_QUEUE_NAME", f"{QUEUE_NAME}.prio")
+
+# Приоритетная очередь: маленькие интерактивные задачи обгоняют большие выгрузки
+analysis_queue = RabbitQueue(
+    ANALYSIS_QUEUE_NAME,
+    arguments={"x-max-priority": MAX_PRIORITY},
+)
+
+# Отложенные задачи: сообщение живёт ANALYSIS_DEFER_SECONDS и по dead-letter
+# возвращается в основную очередь (консьюмеров у этой очереди нет)
+deferred_queue = RabbitQueue(
+    f"{ANALYSIS_QUEUE_NAME}.deferred",
+    arguments={
+        "x-dead-letter-exchange": "",
+        "x-dead-letter-routing-key": ANALYSIS_QUEUE_NAME,
+    },
+)
+
+# publisher confirms включены по умолчанию (Channel.publisher_confirms=True):
+# publish возвращается после подтверждения брокером
 broker = RabbitBroker(RABBIT_URL)
 
+
+class RabbitJobQueue:
+    def __init__(self, broker: RabbitBroker):
+        self.broker = broker
+
+    async def start(self) -> None:
+        await self.broker.start()
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+    async def publish(self, payload: dict[str, Any], priority: int = 0) -> None:
+        await self.broker.publish(json.dumps(payload), queue=analysis_queue, priority=priority)
+
+    async def publish_many(self, messages: list[tuple[dict[str, Any], int]]) -> list[Optional[Exception]]:
+        """
+        Сообщения уходят в канал сразу, подтверждения брокера ожидаются вместе.
+        """
+        results = await asyncio.gather(
+            *(self.publish(p, prio) for p, prio in messages),
+            return_exceptions=True,
+        )
+        return [r if isinstance(r, Exception) else None for r in results]
+
+    async def defer(self, payload: dict[str, Any], priority: int, delay_seconds: float) -> None:
+        # TTL в deferred-очереди -> dead-letter в основную
+        await self.broker.publish(
+            json.dumps(payload),
+            queue=deferred_queue,
+            priority=priority,
+            expiration=delay_seconds,
+        )
+
+
+def _make_job_queue() -> JobQueue:
+    if QUEUE_BACKEND == "local":
+        return LocalJobQueue()
+    if QUEUE_BACKEND == "rabbit":
+        return RabbitJobQueue(broker)
+    raise ValueError(f"Unknown QUEUE_BACKEND: {QUEUE_BACKEND}")
+
+
+job_queue: JobQueue = _make_job_queue()
+
 async def start_broker() -> None:
-    await broker.start()
+    await job_queue.start()
 
 async def stop_broker() -> None:
-    await broker.stop()
+    await job_queue.stop()
+
+async def enqueue_analysis_job(payload: dict[str, Any], priority: int = 0) -> None:
+    await job_queue.publish(payload, priority=priority)
+
 
-async def enqueue_analysis_job(payload: dict[str, Any]) -> None:
-    await broker.publish(json.dumps(payload), queue=QUEUE_NAME)
\ No newline at end of file
+async def enqueue_analysis_jobs(messages: list[tuple[dict[str, Any], int]]) -> list[Optional[Exception]]:
+    """
+    Пакетная публикация (payload, priority). Ошибка – по каждому сообщению (None – успех).
+    """
+    return await job_queue.publish_many(messages)
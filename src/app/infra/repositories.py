@@ -1,24 +1,37 @@
 from typing import Optional, Sequence, Type
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import DateTime, and_, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from src.app.infra.models import (
     UserORM, AccountORM, AccountUserORM,
     SubscriptionORM, SourceORM, AccountSourceORM,
     DocumentORM, AnalysisJobORM, OverviewReportORM,
-    TrendEventORM,
+    TrendEventORM, PredictionORM, AnalysisShardORM,
+    DayAggregateORM, StreamTrendStateORM, IngestionJobORM,
 )
 
-from src.app.domain.enums import JobStatus
-from src.app.domain.value_objects import AnalysisScope, DateRange, AuthCredentials
+from src.app.domain.enums import IngestionKind, IngestionMode, JobStatus
+from src.app.domain.value_objects import AnalysisScope, DateRange, AuthCredentials, IncomingDocument
 from src.app.domain.entities.user import User
 from src.app.domain.entities.source import Source
 from src.app.domain.entities.document import Document
 from src.app.domain.entities.analysis_job import AnalysisJob
 from src.app.domain.entities.overview_report import OverviewReport
 from src.app.domain.entities.trend_event import TrendEvent
+from src.app.domain.entities.prediction import Prediction
+from src.app.domain.entities.analysis_shard import AnalysisShard
+from src.app.domain.entities.ingestion_job import IngestionJob
+from src.app.domain.services.aggregation import PartialAggregate
+from src.app.domain.services.fingerprint import url_hash
+
+# Ограничение на размер одного multi-row INSERT (лимит Postgres – 65535 bind-параметров)
+BULK_CHUNK_ROWS = 5000
+
+# Пространство ключей pg_advisory_xact_lock(ns, id) – чтобы не пересекаться с другими блокировками
+ADVISORY_NS_ACCOUNT_JOBS = 1
 
 
 # mappers ORM -> Domain
@@ -99,6 +112,16 @@ def _job_dom(j: AnalysisJobORM | Type[AnalysisJobORM]) -> AnalysisJob:
         created_at=j.created_at,
         error=j.error or "",
         finished_at=j.finished_at,
+        progress=j.progress or {},
+        scope_fingerprint=j.scope_fingerprint,
+        docs_estimate=j.docs_estimate,
+        size_class=j.size_class,
+        priority=int(j.priority or 0),
+        lease_owner=j.lease_owner,
+        lease_expires_at=j.lease_expires_at,
+        heartbeat_at=j.heartbeat_at,
+        attempts=int(j.attempts or 0),
+        checkpoint=j.checkpoint or {},
     )
 
 
@@ -111,6 +134,39 @@ def _overview_dom(r: OverviewReportORM | Type[OverviewReportORM]) -> OverviewRep
         created_at=r.created_at,
     )
 
+def _shard_dom(s: AnalysisShardORM | Type[AnalysisShardORM]) -> AnalysisShard:
+    return AnalysisShard(
+        id=int(s.id),
+        job_id=int(s.job_id),
+        idx=int(s.idx),
+        date_range=DateRange(start=s.date_from, end=s.date_to),
+        status=JobStatus(str(s.status)),
+        partial=s.partial,
+        error=s.error,
+        started_at=s.started_at,
+        finished_at=s.finished_at,
+        lease_owner=s.lease_owner,
+        attempts=int(s.attempts or 0),
+    )
+
+def _ingestion_dom(j: IngestionJobORM | Type[IngestionJobORM]) -> IngestionJob:
+    return IngestionJob(
+        id=int(j.id),
+        source_id=int(j.source_id),
+        status=JobStatus(str(j.status)),
+        created_at=j.created_at,
+        kind=str(j.kind),
+        stats=dict(j.stats or {}),
+        error=j.error,
+        next_run_at=j.next_run_at,
+    )
+
+
+def _chunks(rows: list[dict], size: int = BULK_CHUNK_ROWS):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
 # repos
 class SqlUserRepo:
     def __init__(self, db: Session):
@@ -134,6 +190,11 @@ class SqlUserRepo:
         self.db.flush()
         return _user_dom(u)
 
+    def set_active(self, user_id: int, is_active: bool) -> None:
+        self.db.query(UserORM).filter(UserORM.id == user_id).update(
+            {UserORM.is_active: bool(is_active)}, synchronize_session=False
+        )
+
 
 class SqlAccountRepo:
     def __init__(self, db: Session):
@@ -289,6 +350,113 @@ class SqlDocumentRepo:
             q = q.limit(limit)
         return [_doc_dom(d) for d in q.all()]
 
+    def daily_counts_by_sources_and_period(
+        self,
+        source_ids: Sequence[int],
+        date_from: datetime,
+        date_to: datetime,
+    ) -> list[tuple[datetime, int]]:
+        """
+        Гистограмма документов по суткам (UTC) – для нарезки задачи на шарды.
+        """
+        day = func.date_trunc("day", func.timezone("UTC", DocumentORM.published_at))
+        rows = (
+            self.db.query(day, func.count(DocumentORM.id))
+            .filter(
+                DocumentORM.source_id.in_([int(x) for x in source_ids]),
+                DocumentORM.published_at >= date_from,
+                DocumentORM.published_at <= date_to,
+            )
+            .group_by(day)
+            .order_by(day)
+            .all()
+        )
+        return [(d.replace(tzinfo=timezone.utc), int(n)) for d, n in rows]
+
+    def stream_after_id(self, source_id: int, after_id: int, limit: int) -> list[tuple[int, datetime]]:
+        """
+        (id, published_at) новых документов источника после watermark – по возрастанию id.
+        """
+        rows = (
+            self.db.query(DocumentORM.id, DocumentORM.published_at)
+            .filter(DocumentORM.source_id == int(source_id), DocumentORM.id > int(after_id))
+            .order_by(DocumentORM.id.asc())
+            .limit(limit)
+            .all()
+        )
+        return [(int(i), ts) for i, ts in rows]
+
+    def stream_in_ranges(self, source_id: int, ranges: Sequence[tuple[int, int]]) -> list[tuple[int, datetime]]:
+        """
+        (id, published_at) документов источника строго внутри промежутков (lo, hi) – по возрастанию id.
+        """
+        rows = (
+            self.db.query(DocumentORM.id, DocumentORM.published_at)
+            .filter(
+                DocumentORM.source_id == int(source_id),
+                or_(*(and_(DocumentORM.id > int(lo), DocumentORM.id < int(hi)) for lo, hi in ranges)),
+            )
+            .order_by(DocumentORM.id.asc())
+            .all()
+        )
+        return [(int(i), ts) for i, ts in rows]
+
+    def max_id(self, source_id: int) -> int:
+        return int(
+            self.db.query(func.max(DocumentORM.id)).filter(DocumentORM.source_id == int(source_id)).scalar() or 0
+        )
+
+    def bucket_counts(
+        self,
+        source_id: int,
+        bucket_seconds: int,
+        date_from: datetime,
+        date_to: datetime,
+    ) -> dict[datetime, int]:
+        """
+        Число документов источника по корзинам bucket_seconds (от эпохи, UTC) в [date_from, date_to).
+        """
+        k = func.floor(func.extract("epoch", DocumentORM.published_at) / bucket_seconds)
+        rows = (
+            self.db.query(k, func.count(DocumentORM.id))
+            .filter(
+                DocumentORM.source_id == int(source_id),
+                DocumentORM.published_at >= date_from,
+                DocumentORM.published_at < date_to,
+            )
+            .group_by(k)
+            .all()
+        )
+        return {
+            datetime.fromtimestamp(int(b) * bucket_seconds, tz=timezone.utc): int(n)
+            for b, n in rows
+        }
+
+    def day_watermarks_by_sources_and_period(
+        self,
+        source_ids: Sequence[int],
+        date_from: datetime,
+        date_to: datetime,
+    ) -> dict[tuple[int, datetime], tuple[int, int]]:
+        """
+        (source_id, сутки UTC) -> (count, max(id)): актуальность готовых дневных агрегатов.
+        """
+        day = func.date_trunc("day", func.timezone("UTC", DocumentORM.published_at))
+        rows = (
+            self.db.query(DocumentORM.source_id, day, func.count(DocumentORM.id), func.max(DocumentORM.id))
+            .filter(
+                DocumentORM.source_id.in_([int(x) for x in source_ids]),
+                DocumentORM.published_at >= date_from,
+                DocumentORM.published_at <= date_to,
+            )
+            .group_by(DocumentORM.source_id, day)
+            .all()
+        )
+        return {
+            (int(sid), d.replace(tzinfo=timezone.utc)): (int(n), int(max_id))
+            for sid, d, n, max_id in rows
+        }
+
     def stats_by_source(self, account_id: int, source_id: int) -> dict:
         """
         Статистика по source – только если source доступен аккаунту.
@@ -320,6 +488,33 @@ class SqlDocumentRepo:
             "date_max": dmax,
         }
 
+    def insert_many(self, source_id: int, docs: Sequence[IncomingDocument]) -> int:
+        """
+        Батч новых документов источника с дедупом по (source_id, url_hash); возвращает число вставленных.
+        """
+        rows = [
+            {
+                "source_id": int(source_id),
+                "published_at": d.published_at,
+                "title": d.title,
+                "text": d.text,
+                "topic": d.topic,
+                "url": d.url,
+                "url_hash": url_hash(d.url),
+                "meta": d.meta,
+            }
+            for d in docs
+        ]
+        inserted = 0
+        for chunk in _chunks(rows):
+            result = self.db.execute(
+                pg_insert(DocumentORM)
+                .values(chunk)
+                .on_conflict_do_nothing(index_elements=[DocumentORM.source_id, DocumentORM.url_hash])
+            )
+            inserted += int(result.rowcount or 0)
+        return inserted
+
 
 class SqlAnalysisJobRepo:
     def __init__(self, db: Session):
@@ -329,11 +524,19 @@ class SqlAnalysisJobRepo:
         self,
         account_id: int,
         scope: AnalysisScope,
+        fingerprint: Optional[str] = None,
+        docs_estimate: Optional[int] = None,
+        size_class: Optional[str] = None,
+        priority: int = 0,
     ) -> AnalysisJob:
         j = AnalysisJobORM(
             account_id=account_id,
             status=JobStatus.PENDING.value,
             scope=_scope_to_dict(scope),
+            scope_fingerprint=fingerprint,
+            docs_estimate=docs_estimate,
+            size_class=size_class,
+            priority=priority,
         )
         self.db.add(j)
         self.db.flush()
@@ -345,8 +548,10 @@ class SqlAnalysisJobRepo:
             raise ValueError("Задача не найдена.")
 
         j.status = status.value
+        if status != JobStatus.RUNNING:
+            j.lease_expires_at = None
 
-        if status in (JobStatus.DONE, JobStatus.ERROR):
+        if status in (JobStatus.DONE, JobStatus.ERROR, JobStatus.CANCELED):
             j.finished_at = datetime.now(timezone.utc)
 
         if error is not None:
@@ -383,26 +588,169 @@ class SqlAnalysisJobRepo:
         j = self.db.query(AnalysisJobORM).filter(AnalysisJobORM.id == job_id).first()
         return _job_dom(j) if j else None
 
+    def set_progress(self, job_id: int, progress: dict) -> None:
+        self.db.query(AnalysisJobORM).filter(AnalysisJobORM.id == job_id).update(
+            {"progress": progress},
+            synchronize_session=False,
+        )
+
+    def claim(
+        self,
+        job_id: int,
+        owner: Optional[str],
+        lease_seconds: Optional[float],
+    ) -> Optional[AnalysisJob]:
+        """
+        Атомарно переводит задачу PENDING -> RUNNING под lease воркера owner.
+        None – задачу уже взял другой воркер. lease_seconds=None – без lease
+        (шардированная задача: lease держат шарды).
+        """
+        updated = (
+            self.db.query(AnalysisJobORM)
+            .filter(
+                AnalysisJobORM.id == job_id,
+                AnalysisJobORM.status == JobStatus.PENDING.value,
+            )
+            .update(
+                {
+                    "status": JobStatus.RUNNING.value,
+                    "lease_owner": owner,
+                    "lease_expires_at": (
+                        func.now() + timedelta(seconds=lease_seconds) if lease_seconds is not None else None
+                    ),
+                    "heartbeat_at": func.now(),
+                    "attempts": AnalysisJobORM.attempts + 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            return None
+        return self._get_fresh(job_id)
+
+    def renew_lease(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        """
+        Heartbeat: продлевает lease, если задача всё ещё RUNNING у этого воркера.
+        False – lease забрал reaper.
+        """
+        updated = (
+            self.db.query(AnalysisJobORM)
+            .filter(
+                AnalysisJobORM.id == job_id,
+                AnalysisJobORM.status == JobStatus.RUNNING.value,
+                AnalysisJobORM.lease_owner == owner,
+            )
+            .update(
+                {
+                    "lease_expires_at": func.now() + timedelta(seconds=lease_seconds),
+                    "heartbeat_at": func.now(),
+                },
+                synchronize_session=False,
+            )
+        )
+        return bool(updated)
+
+    def set_checkpoint(self, job_id: int, checkpoint: dict) -> None:
+        self.db.query(AnalysisJobORM).filter(AnalysisJobORM.id == job_id).update(
+            {"checkpoint": checkpoint},
+            synchronize_session=False,
+        )
+
+    def list_expired_for_update(self, limit: int = 100) -> list[AnalysisJob]:
+        """
+        RUNNING задачи с просроченным lease (воркер умер или завис). Строки блокируются
+        с SKIP LOCKED – несколько reaper'ов не обрабатывают одну задачу дважды.
+        """
+        rows = (
+            self.db.query(AnalysisJobORM)
+            .filter(
+                AnalysisJobORM.status == JobStatus.RUNNING.value,
+                AnalysisJobORM.lease_expires_at < func.now(),
+            )
+            .order_by(AnalysisJobORM.lease_expires_at.asc())
+            .limit(limit)
+            .populate_existing()
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        return [_job_dom(j) for j in rows]
+
+    def _get_fresh(self, job_id: int) -> Optional[AnalysisJob]:
+        j = (
+            self.db.query(AnalysisJobORM)
+            .filter(AnalysisJobORM.id == job_id)
+            .populate_existing()
+            .first()
+        )
+        return _job_dom(j) if j else None
+
+    def lock_account(self, account_id: int) -> None:
+        """
+        pg_advisory_xact_lock на аккаунт: проверка лимита RUNNING и переход в RUNNING
+        атомарны относительно других воркеров. Снимается на commit/rollback.
+        """
+        self.db.execute(select(func.pg_advisory_xact_lock(ADVISORY_NS_ACCOUNT_JOBS, int(account_id))))
+
+    def count_running(self, account_id: int) -> int:
+        return int(
+            self.db.query(func.count(AnalysisJobORM.id))
+            .filter(
+                AnalysisJobORM.account_id == account_id,
+                AnalysisJobORM.status == JobStatus.RUNNING.value,
+            )
+            .scalar() or 0
+        )
+
+    def list_pending(self, limit: int = 1000) -> list[AnalysisJob]:
+        rows = (
+            self.db.query(AnalysisJobORM)
+            .filter(AnalysisJobORM.status == JobStatus.PENDING.value)
+            .order_by(AnalysisJobORM.id.asc())
+            .limit(limit)
+            .all()
+        )
+        return [_job_dom(j) for j in rows]
+
+    def get_for_update(self, job_id: int) -> Optional[AnalysisJob]:
+        """
+        SELECT ... FOR UPDATE: сериализует переходы состояния задачи (reduce шардов).
+        Блокировка держится до commit/rollback.
+        """
+        j = (
+            self.db.query(AnalysisJobORM)
+            .filter(AnalysisJobORM.id == job_id)
+            .populate_existing()
+            .with_for_update()
+            .first()
+        )
+        return _job_dom(j) if j else None
+
 
 class SqlOverviewRepo:
     def __init__(self, db: Session):
         self.db = db
 
     def upsert(self, report: OverviewReport) -> None:
-        row = self.db.query(OverviewReportORM).filter(OverviewReportORM.job_id == report.job_id).first()
-        if not row:
-            row = OverviewReportORM(
-                job_id=report.job_id,
-                total_documents=report.total_documents,
-                sentiment_share=report.sentiment_share,
-                metrics=report.metrics,
-            )
-            self.db.add(row)
-        else:
-            row.total_documents = report.total_documents
-            row.sentiment_share = report.sentiment_share
-            row.metrics = report.metrics
-        self.db.flush()
+        """
+        Один INSERT ... ON CONFLICT вместо select + insert/update.
+        """
+        stmt = pg_insert(OverviewReportORM).values(
+            job_id=report.job_id,
+            total_documents=report.total_documents,
+            sentiment_share=report.sentiment_share,
+            metrics=report.metrics,
+            breakdown=report.breakdown or {},
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OverviewReportORM.job_id],
+            set_={
+                "total_documents": stmt.excluded.total_documents,
+                "sentiment_share": stmt.excluded.sentiment_share,
+                "metrics": stmt.excluded.metrics,
+                "breakdown": stmt.excluded.breakdown,
+            },
+        )
+        self.db.execute(stmt)
 
     def get_by_job(self, job_id: int) -> Optional[OverviewReport]:
         r = self.db.query(OverviewReportORM).filter(OverviewReportORM.job_id == job_id).first()
@@ -423,19 +771,20 @@ class SqlTrendRepo:
             .filter(TrendEventORM.job_id == job_id)\
             .delete(synchronize_session=False)
 
-        for ev in events:
-            self.db.add(
-                TrendEventORM(
-                    job_id=job_id,
-                    ts=ev.ts,
-                    kind=ev.kind,
-                    value=float(ev.value),
-                    baseline=float(ev.baseline),
-                    z=float(ev.z),
-                )
-            )
-
-        self.db.flush()
+        rows = [
+            {
+                "job_id": job_id,
+                "ts": ev.ts,
+                "kind": ev.kind,
+                "value": float(ev.value),
+                "baseline": float(ev.baseline),
+                "z": float(ev.z),
+                "top_doc_ids": [int(x) for x in ev.top_doc_ids],
+            }
+            for ev in events
+        ]
+        for chunk in _chunks(rows):
+            self.db.execute(pg_insert(TrendEventORM).values(chunk))
 
     def list_by_job(self, job_id: int, limit: int | None = None) -> list[TrendEvent]:
         """
@@ -460,6 +809,417 @@ class SqlTrendRepo:
                 value=row.value,
                 baseline=row.baseline,
                 z=row.z,
+                top_doc_ids=list(row.top_doc_ids or []),
             )
             for row in rows
         ]
+
+
+
+class SqlPredictionRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save_many(self, job_id: int, predictions: list[Prediction]) -> None:
+        """
+        Пакетная запись предсказаний: multi-row INSERT ... ON CONFLICT (job_id, document_id).
+        """
+        rows = [
+            {
+                "job_id": job_id,
+                "document_id": int(p.document_id),
+                "label": str(p.label),
+                "p_neg": float(p.probs.p_neg),
+                "p_neu": float(p.probs.p_neu),
+                "p_pos": float(p.probs.p_pos),
+            }
+            for p in predictions
+        ]
+        for chunk in _chunks(rows):
+            stmt = pg_insert(PredictionORM).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[PredictionORM.job_id, PredictionORM.document_id],
+                set_={
+                    "label": stmt.excluded.label,
+                    "p_neg": stmt.excluded.p_neg,
+                    "p_neu": stmt.excluded.p_neu,
+                    "p_pos": stmt.excluded.p_pos,
+                },
+            )
+            self.db.execute(stmt)
+
+    def count_by_job(self, job_id: int) -> int:
+        return int(
+            self.db.query(func.count(PredictionORM.id))
+            .filter(PredictionORM.job_id == job_id)
+            .scalar() or 0
+        )
+
+    def delete_for_job(self, job_id: int) -> None:
+        self.db.query(PredictionORM).filter(PredictionORM.job_id == int(job_id)).delete(synchronize_session=False)
+
+
+class SqlAnalysisShardRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_many(self, job_id: int, ranges: list[DateRange]) -> list[AnalysisShard]:
+        rows = [
+            AnalysisShardORM(
+                job_id=job_id,
+                idx=i,
+                date_from=r.start,
+                date_to=r.end,
+                status=JobStatus.PENDING.value,
+            )
+            for i, r in enumerate(ranges)
+        ]
+        self.db.add_all(rows)
+        self.db.flush()
+        return [_shard_dom(s) for s in rows]
+
+    def claim(
+        self,
+        shard_id: int,
+        owner: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+    ) -> Optional[AnalysisShard]:
+        """
+        Атомарно переводит шард PENDING -> RUNNING под lease воркера. None – шард уже
+        взят другим воркером (повторная доставка сообщения) или не существует.
+        """
+        s = (
+            self.db.query(AnalysisShardORM)
+            .filter(
+                AnalysisShardORM.id == shard_id,
+                AnalysisShardORM.status == JobStatus.PENDING.value,
+            )
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not s:
+            return None
+
+        s.status = JobStatus.RUNNING.value
+        s.started_at = datetime.now(timezone.utc)
+        s.lease_owner = owner
+        # часы БД – общие для всех воркеров и reaper'а
+        s.lease_expires_at = func.now() + timedelta(seconds=lease_seconds) if lease_seconds is not None else None
+        s.attempts = (s.attempts or 0) + 1
+        self.db.flush()
+        return _shard_dom(s)
+
+    def renew_lease(self, shard_id: int, owner: str, lease_seconds: float) -> bool:
+        updated = (
+            self.db.query(AnalysisShardORM)
+            .filter(
+                AnalysisShardORM.id == shard_id,
+                AnalysisShardORM.status == JobStatus.RUNNING.value,
+                AnalysisShardORM.lease_owner == owner,
+            )
+            .update(
+                {"lease_expires_at": func.now() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False,
+            )
+        )
+        return bool(updated)
+
+    def release(self, shard_id: int) -> None:
+        """
+        Возвращает шард в PENDING (lease истёк) – его возьмёт следующий воркер.
+        """
+        self.db.query(AnalysisShardORM).filter(AnalysisShardORM.id == shard_id).update(
+            {
+                "status": JobStatus.PENDING.value,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "started_at": None,
+            },
+            synchronize_session=False,
+        )
+
+    def list_expired_for_update(self, limit: int = 100) -> list[AnalysisShard]:
+        rows = (
+            self.db.query(AnalysisShardORM)
+            .filter(
+                AnalysisShardORM.status == JobStatus.RUNNING.value,
+                AnalysisShardORM.lease_expires_at < func.now(),
+            )
+            .order_by(AnalysisShardORM.lease_expires_at.asc())
+            .limit(limit)
+            .populate_existing()
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        return [_shard_dom(s) for s in rows]
+
+    def set_done(self, shard_id: int, partial: dict) -> None:
+        self.db.query(AnalysisShardORM).filter(AnalysisShardORM.id == shard_id).update(
+            {
+                "status": JobStatus.DONE.value,
+                "partial": partial,
+                "error": None,
+                "lease_expires_at": None,
+                "finished_at": datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+
+    def set_error(self, shard_id: int, error: str) -> None:
+        self.db.query(AnalysisShardORM).filter(AnalysisShardORM.id == shard_id).update(
+            {
+                "status": JobStatus.ERROR.value,
+                "error": error,
+                "lease_expires_at": None,
+                "finished_at": datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+
+    def list_by_job(self, job_id: int) -> list[AnalysisShard]:
+        rows = (
+            self.db.query(AnalysisShardORM)
+            .filter(AnalysisShardORM.job_id == job_id)
+            .order_by(AnalysisShardORM.idx.asc())
+            .all()
+        )
+        return [_shard_dom(s) for s in rows]
+
+    def list_pending(self, limit: int = 1000) -> list[tuple[AnalysisShard, int]]:
+        """
+        PENDING шарды выполняющихся задач вместе с приоритетом задачи.
+        """
+        rows = (
+            self.db.query(AnalysisShardORM, AnalysisJobORM.priority)
+            .join(AnalysisJobORM, AnalysisJobORM.id == AnalysisShardORM.job_id)
+            .filter(
+                AnalysisShardORM.status == JobStatus.PENDING.value,
+                AnalysisJobORM.status == JobStatus.RUNNING.value,
+            )
+            .order_by(AnalysisShardORM.id.asc())
+            .limit(limit)
+            .all()
+        )
+        return [(_shard_dom(s), int(prio or 0)) for s, prio in rows]
+
+
+class SqlDayAggregateRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save_many(
+        self,
+        job_id: int,
+        agg_key: str,
+        cells: dict[tuple[int, datetime], PartialAggregate],
+    ) -> None:
+        rows = [
+            {
+                "job_id": job_id,
+                "source_id": int(source_id),
+                "day": day,
+                "agg_key": agg_key,
+                "docs_fetched": p.docs_fetched,
+                "max_doc_id": p.max_doc_id,
+                "docs_matched": sum(p.daily_counts.values()),
+                "total": p.total,
+                "neg": p.sentiment_counts.get("negative", 0),
+                "neu": p.sentiment_counts.get("neutral", 0),
+                "pos": p.sentiment_counts.get("positive", 0),
+                "sentiment_mode": p.sentiment_mode,
+                "top_docs": [[score, doc_id] for score, doc_id in sorted(p.top_docs.get(day, []))],
+                "topics": [[topic, *vals] for (_, topic, _), vals in p.breakdown.items()],
+            }
+            for (source_id, day), p in cells.items()
+        ]
+        for chunk in _chunks(rows):
+            stmt = pg_insert(DayAggregateORM).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DayAggregateORM.job_id, DayAggregateORM.source_id, DayAggregateORM.day],
+                set_={c: stmt.excluded[c] for c in rows[0] if c not in ("job_id", "source_id", "day")},
+            )
+            self.db.execute(stmt)
+
+    def latest_done(
+        self,
+        agg_key: str,
+        source_ids: Sequence[int],
+        day_from: datetime,
+        day_to: datetime,
+    ) -> dict[tuple[int, datetime], PartialAggregate]:
+        """
+        Самые свежие агрегаты суток из завершённых (DONE) задач с тем же agg_key:
+        DISTINCT ON (source_id, day) по убыванию job_id.
+        """
+        rows = (
+            self.db.query(DayAggregateORM)
+            .join(AnalysisJobORM, AnalysisJobORM.id == DayAggregateORM.job_id)
+            .filter(
+                DayAggregateORM.agg_key == agg_key,
+                DayAggregateORM.source_id.in_([int(x) for x in source_ids]),
+                DayAggregateORM.day >= day_from,
+                DayAggregateORM.day <= day_to,
+                AnalysisJobORM.status == JobStatus.DONE.value,
+            )
+            .distinct(DayAggregateORM.source_id, DayAggregateORM.day)
+            .order_by(DayAggregateORM.source_id, DayAggregateORM.day, DayAggregateORM.job_id.desc())
+            .all()
+        )
+        return {
+            (int(r.source_id), r.day): PartialAggregate(
+                total=int(r.total),
+                sentiment_counts={"negative": int(r.neg), "neutral": int(r.neu), "positive": int(r.pos)},
+                daily_counts={r.day: int(r.docs_matched)} if r.docs_matched else {},
+                daily_sentiment=(
+                    {r.day: {"negative": int(r.neg), "neutral": int(r.neu), "positive": int(r.pos)}}
+                    if r.total else {}
+                ),
+                breakdown={(int(r.source_id), row[0], r.day): [int(v) for v in row[1:]] for row in r.topics},
+                top_docs=(
+                    {r.day: sorted((float(score), int(doc_id)) for score, doc_id in r.top_docs)}
+                    if r.top_docs else {}
+                ),
+                sentiment_mode=str(r.sentiment_mode),
+                docs_fetched=int(r.docs_fetched),
+                max_doc_id=int(r.max_doc_id) if r.max_doc_id is not None else None,
+            )
+            for r in rows
+        }
+
+
+class SqlStreamTrendRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def lock_states(self, limit: int = 50) -> list[tuple[int, dict]]:
+        """
+        Состояния детектора STREAM-источников под FOR UPDATE SKIP LOCKED: источник в один момент
+        обрабатывает один воркер. Недостающие строки (новые STREAM-источники) создаются пустыми.
+        """
+        stream_ids = select(SourceORM.id).where(SourceORM.ingestion_mode == IngestionMode.STREAM.value)
+        self.db.execute(
+            pg_insert(StreamTrendStateORM)
+            .from_select(["source_id"], stream_ids)
+            .on_conflict_do_nothing(index_elements=[StreamTrendStateORM.source_id])
+        )
+
+        rows = (
+            self.db.query(StreamTrendStateORM.source_id, StreamTrendStateORM.state)
+            .filter(StreamTrendStateORM.source_id.in_(stream_ids))
+            .order_by(StreamTrendStateORM.updated_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        return [(int(sid), dict(state or {})) for sid, state in rows]
+
+    def save_state(self, source_id: int, state: dict) -> None:
+        self.db.query(StreamTrendStateORM)\
+            .filter(StreamTrendStateORM.source_id == int(source_id))\
+            .update({"state": state, "updated_at": func.now()}, synchronize_session=False)
+
+    def save_events(self, events: list[TrendEvent]) -> None:
+        rows = [
+            {
+                "source_id": int(ev.source_id),
+                "ts": ev.ts,
+                "kind": ev.kind,
+                "value": float(ev.value),
+                "baseline": float(ev.baseline),
+                "z": float(ev.z),
+            }
+            for ev in events
+        ]
+        for chunk in _chunks(rows):
+            self.db.execute(pg_insert(TrendEventORM).values(chunk))
+
+
+class SqlIngestionJobRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _incremental_sources():
+        return select(SourceORM.id).where(
+            SourceORM.ingestion_mode.in_([IngestionMode.INCREMENTAL.value, IngestionMode.STREAM.value]),
+            SourceORM.config.has_key("adapter"),
+        )
+
+    def ensure_cursors(self, now: datetime) -> None:
+        """
+        Курсоры (kind INCREMENTAL) для INCREMENTAL/STREAM-источников с адаптером, у которых их ещё нет:
+        новый курсор без watermark и сразу к запуску.
+        """
+        sources = self._incremental_sources().subquery()
+        self.db.execute(
+            pg_insert(IngestionJobORM)
+            .from_select(
+                ["source_id", "kind", "status", "next_run_at"],
+                select(
+                    sources.c.id,
+                    literal(IngestionKind.INCREMENTAL.value),
+                    literal(JobStatus.PENDING.value),
+                    literal(now, DateTime(timezone=True)),
+                ),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[IngestionJobORM.source_id, IngestionJobORM.kind],
+                index_where=IngestionJobORM.kind == IngestionKind.INCREMENTAL.value,
+            )
+        )
+
+    def claim_due(self, now: datetime, exclude: Sequence[int] = ()) -> Optional[tuple[IngestionJob, Source]]:
+        """
+        Курсор источника, которому пора за новыми документами (самый просроченный), под FOR UPDATE SKIP LOCKED:
+        источник в один момент загружает один воркер, блокировка держится до commit/rollback.
+        """
+        q = (
+            self.db.query(IngestionJobORM, SourceORM)
+            .join(SourceORM, SourceORM.id == IngestionJobORM.source_id)
+            .filter(
+                IngestionJobORM.kind == IngestionKind.INCREMENTAL.value,
+                IngestionJobORM.next_run_at <= now,
+                IngestionJobORM.source_id.in_(self._incremental_sources()),
+            )
+        )
+        if exclude:
+            q = q.filter(IngestionJobORM.id.not_in([int(x) for x in exclude]))
+        row = (
+            q.order_by(IngestionJobORM.next_run_at.asc())
+            .limit(1)
+            .populate_existing()
+            .with_for_update(of=IngestionJobORM, skip_locked=True)
+            .first()
+        )
+        return (_ingestion_dom(row[0]), _source_dom(row[1])) if row else None
+
+    def get_for_update(self, job_id: int) -> Optional[IngestionJob]:
+        j = (
+            self.db.query(IngestionJobORM)
+            .filter(IngestionJobORM.id == int(job_id))
+            .populate_existing()
+            .with_for_update()
+            .first()
+        )
+        return _ingestion_dom(j) if j else None
+
+    def save_run(
+        self,
+        job_id: int,
+        status: JobStatus,
+        stats: dict,
+        next_run_at: datetime,
+        error: Optional[str] = None,
+    ) -> None:
+        self.db.query(IngestionJobORM)\
+            .filter(IngestionJobORM.id == int(job_id))\
+            .update(
+                {
+                    "status": status.value,
+                    "stats": stats,
+                    "error": error,
+                    "next_run_at": next_run_at,
+                    "finished_at": func.now(),
+                },
+                synchronize_session=False,
+            )
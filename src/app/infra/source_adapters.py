@@ -0,0 +1,125 @@
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+
+from src.app.domain.contracts.ingestion import SourceAdapter
+from src.app.domain.entities.source import Source
+from src.app.domain.value_objects import FetchResult, IncomingDocument
+
+# Адаптеры источников для инкрементальной загрузки (IngestionService).
+# Документ во всех адаптерах – JSON-объект: url, text, published_at (ISO 8601) обязательны,
+# title, topic, meta – по желанию. Записи без обязательных полей пропускаются.
+
+
+def parse_item(item: Any) -> Optional[IncomingDocument]:
+    if not isinstance(item, dict):
+        return None
+    url = str(item.get("url") or "").strip()
+    text = str(item.get("text") or "").strip()
+    if not url or not text or not item.get("published_at"):
+        return None
+    try:
+        published_at = datetime.fromisoformat(str(item["published_at"]))
+    except ValueError:
+        return None
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+
+    meta = item.get("meta")
+    return IncomingDocument(
+        url=url,
+        text=text,
+        published_at=published_at,
+        title=str(item.get("title") or "").strip() or None,
+        topic=str(item.get("topic") or "").strip() or None,
+        meta=dict(meta) if isinstance(meta, dict) else {},
+    )
+
+
+class FileDropAdapter:
+    """
+    Каталог, куда складываются JSONL-файлы (документ на строку): config = {"path": ..., "pattern": "*.jsonl"}.
+    Файлы читаются в порядке имён (имена должны расти – например, с меткой времени), watermark –
+    {"file": имя, "offset": байт после последней прочитанной строки}. Файл можно дописывать:
+    незавершённая последняя строка (без перевода строки) ждёт следующего опроса.
+    """
+
+    def fetch(self, source: Source, watermark: Optional[dict[str, Any]], limit: int) -> FetchResult:
+        root = Path(str(source.config["path"]))
+        pattern = str(source.config.get("pattern", "*.jsonl"))
+        current = (watermark or {}).get("file")
+        offset = int((watermark or {}).get("offset", 0))
+
+        files = sorted(p for p in root.glob(pattern) if p.is_file() and (current is None or p.name >= current))
+        docs: list[IncomingDocument] = []
+        for path in files:
+            pos = offset if path.name == current else 0
+            with path.open("rb") as f:
+                f.seek(pos)
+                for raw in iter(f.readline, b""):
+                    if not raw.endswith(b"\n"):
+                        break
+                    pos += len(raw)
+                    doc = self._parse_line(raw, path.name)
+                    if doc is not None:
+                        docs.append(doc)
+                    if len(docs) >= limit:
+                        return FetchResult(docs, {"file": path.name, "offset": pos}, has_more=True)
+            current, offset = path.name, pos
+
+        return FetchResult(docs, {"file": current, "offset": offset} if current else watermark)
+
+    @staticmethod
+    def _parse_line(raw: bytes, name: str) -> Optional[IncomingDocument]:
+        line = raw.strip()
+        if not line:
+            return None
+        try:
+            doc = parse_item(json.loads(line))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            doc = None
+        if doc is None:
+            logging.warning("file drop %s: skip malformed record", name)
+        return doc
+
+
+class HttpFeedAdapter:
+    """
+    HTTP-лента с курсором: GET config["url"]?limit=N&cursor=C ->
+    {"items": [...], "next_cursor": "...", "has_more": bool}. Watermark – {"cursor": next_cursor}.
+    config: url, headers (опционально), timeout (секунды, по умолчанию 10).
+    """
+
+    def fetch(self, source: Source, watermark: Optional[dict[str, Any]], limit: int) -> FetchResult:
+        params: dict[str, Any] = {"limit": limit}
+        cursor = (watermark or {}).get("cursor")
+        if cursor is not None:
+            params["cursor"] = cursor
+
+        r = httpx.get(
+            str(source.config["url"]),
+            params=params,
+            headers=source.config.get("headers") or {},
+            timeout=float(source.config.get("timeout", 10)),
+        )
+        r.raise_for_status()
+        body = r.json()
+
+        docs = [d for d in (parse_item(x) for x in body.get("items") or []) if d is not None]
+        next_cursor = body.get("next_cursor")
+        return FetchResult(
+            docs,
+            {"cursor": next_cursor} if next_cursor is not None else watermark,
+            has_more=bool(body.get("has_more")),
+        )
+
+
+# source.config["adapter"] -> адаптер; новые источники (Telegram, VK) подключаются сюда
+SOURCE_ADAPTERS: dict[str, SourceAdapter] = {
+    "file_drop": FileDropAdapter(),
+    "http_feed": HttpFeedAdapter(),
+}
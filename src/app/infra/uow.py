@@ -3,12 +3,15 @@ from sqlalchemy.orm import Session
 from src.app.infra.repositories import (
     SqlUserRepo, SqlAccountRepo, SqlSubscriptionRepo,
     SqlSourceRepo, SqlDocumentRepo, SqlAnalysisJobRepo,
-    SqlOverviewRepo, SqlTrendRepo, SqlAccountSourceRepo
+    SqlOverviewRepo, SqlTrendRepo, SqlAccountSourceRepo,
+    SqlPredictionRepo, SqlAnalysisShardRepo, SqlDayAggregateRepo,
+    SqlStreamTrendRepo, SqlIngestionJobRepo,
 )
 
 class SqlAlchemyUoW:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_only: bool = False):
         self.db = db
+        self.read_only = read_only
 
         self.users = SqlUserRepo(db)
         self.accounts = SqlAccountRepo(db)
@@ -19,8 +22,15 @@ class SqlAlchemyUoW:
         self.overview = SqlOverviewRepo(db)
         self.trend = SqlTrendRepo(db)
         self.account_sources = SqlAccountSourceRepo(db)
+        self.predictions = SqlPredictionRepo(db)
+        self.shards = SqlAnalysisShardRepo(db)
+        self.day_aggregates = SqlDayAggregateRepo(db)
+        self.stream_trends = SqlStreamTrendRepo(db)
+        self.ingestion = SqlIngestionJobRepo(db)
 
     def commit(self) -> None:
+        if self.read_only:
+            raise RuntimeError("Read-only UoW cannot commit")
         self.db.commit()
 
     def rollback(self) -> None:
@@ -2,19 +2,35 @@ from contextlib import asynccontextmanager
 import os
 
 from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from starlette.middleware.sessions import SessionMiddleware
 
 from src.app.api.routers import auth_router, sources_router, analysis_router
 from src.app.ui.router import router as ui_router
-from src.app.infra.mq import start_broker, stop_broker
+from src.app.infra.mq import QUEUE_BACKEND, job_queue, start_broker, stop_broker
+from src.app.worker.local import LocalWorker
+from src.app.infra.db import async_engine, async_engine_ro
+from src.app.core.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from src.app.core.sql_profile import SQL_PROFILE_ENABLED, SqlProfileMiddleware
+
+# /metrics в формате Prometheus (латентность API, SQL, очередь, инференс)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# QUEUE_BACKEND=local: задачи выполняются в этом же процессе, без RabbitMQ и отдельного воркера
+local_worker = LocalWorker(job_queue) if QUEUE_BACKEND == "local" else None
 
 # Определение жизненного цикла
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await start_broker()
+    if local_worker:
+        await local_worker.start()
     yield
+    if local_worker:
+        await local_worker.stop()
     await stop_broker()
+    await async_engine.dispose()
+    await async_engine_ro.dispose()
 
 app = FastAPI(
     title="NLP-Insight",
@@ -30,6 +46,11 @@ app.add_middleware(
     same_site="lax",
     https_only=False,
 )
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if SQL_PROFILE_ENABLED:
+    # число SQL-запросов и время в БД на запрос (X-DB-Queries, Server-Timing), N+1 – в лог
+    app.add_middleware(SqlProfileMiddleware)
 
 app.include_router(ui_router)
 app.include_router(auth_router)
@@ -40,6 +61,11 @@ app.include_router(analysis_router)
 def health():
     return {"status": "ok"}
 
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/{path:path}")
 def catch_all(path: str, request: Request):
     return RedirectResponse(url="/login", status_code=302)
\ No newline at end of file
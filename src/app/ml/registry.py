@@ -1,12 +1,16 @@
+import threading
+import time
 from typing import Tuple
 from transformers import PreTrainedTokenizer, PreTrainedModel
 
+from src.app.core.metrics import MODEL_LOAD_SECONDS
 from src.app.ml.model_loader import load_rubert_custom
 
 
 _tokenizer: PreTrainedTokenizer | None = None
 _model: PreTrainedModel | None = None
 _id2label: dict[int, str] | None = None
+_lock = threading.Lock()
 
 
 def get_sentiment_model() -> Tuple[
@@ -16,12 +20,17 @@ def get_sentiment_model() -> Tuple[
 ]:
     """
     Возвращает singleton sentiment model (RuBERT-tiny2).
-    Гарантирует, что модель загружена один раз на процесс.
+    Гарантирует, что модель загружена один раз на процесс
+    (в т.ч. при параллельных задачах в пуле потоков воркера).
     """
 
     global _tokenizer, _model, _id2label
 
     if _tokenizer is None or _model is None:
-        _tokenizer, _model, _id2label = load_rubert_custom()
+        with _lock:
+            if _tokenizer is None or _model is None:
+                started = time.perf_counter()
+                _tokenizer, _model, _id2label = load_rubert_custom()
+                MODEL_LOAD_SECONDS.set(time.perf_counter() - started)
 
     return _tokenizer, _model, _id2label
\ No newline at end of file
@@ -1,16 +1,118 @@
-from datetime import datetime, timezone
-from collections import defaultdict, Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Sequence
+from datetime import datetime, timezone, timedelta
 import os
+import socket
+import time
+import uuid
+import numpy as np
 import torch
 
-from src.app.domain.contracts.uow import UoW
-from src.app.domain.value_objects import AnalysisScope
+from src.app.domain.contracts.uow import UoW, AsyncUoW
+from src.app.domain.value_objects import AnalysisScope, DateRange
 from src.app.domain.services.scope_filter import filter_documents
 from src.app.domain.services.trend_detection import detect_trends
+from src.app.domain.services.aggregation import (
+    DayCells, PartialAggregate, day_start, full_days, is_full_day,
+    merge_partials, plan_day_shards, uncovered_ranges,
+)
+from src.app.domain.services.breakdown import BREAKDOWN_DIMS, encode_breakdown, query_breakdown
+from src.app.domain.services.fingerprint import scope_fingerprint, aggregate_key
+from src.app.domain.services.scheduling import PRIORITY_BY_SIZE, size_class
+from src.app.domain.entities.analysis_job import AnalysisJob
 from src.app.domain.entities.overview_report import OverviewReport
 from src.app.domain.entities.trend_event import TrendEvent
-from src.app.domain.enums import JobStatus
+from src.app.domain.entities.prediction import Prediction
+from src.app.domain.entities.document import Document
+from src.app.domain.enums import JobStatus, SentimentLabel
+from src.app.domain.value_objects import SentimentProbs
+from src.app.core.metrics import (
+    INFERENCE_BATCH_SECONDS,
+    INFERENCE_DOCS,
+    INFERENCE_DOCS_PER_SEC,
+    INFERENCE_PADDING_RATIO,
+)
 from src.app.ml.registry import get_sentiment_model
+from src.app.services.checkpoint import ScoringCheckpoint
+from src.app.services.progress import ProgressTracker
+
+
+_LABEL_TO_ENUM = {
+    "negative": SentimentLabel.NEG,
+    "neutral": SentimentLabel.NEU,
+    "positive": SentimentLabel.POS,
+}
+
+
+def current_model_key() -> str:
+    """
+    Версия модели, которой будут посчитаны результаты, – часть отпечатка scope.
+    """
+    if os.getenv("SENTIMENT_ENABLED", "0") != "1":
+        return "stub"
+    explicit = os.getenv("SENTIMENT_MODEL_VERSION")
+    if explicit:
+        return f"model:{explicit}"
+    return f"model:{os.getenv('RUBERT_BASE_MODEL')}@{os.getenv('RUBERT_ARTIFACT_DIR')}"
+
+
+def job_scheduling(docs_estimate: int) -> dict[str, Any]:
+    """
+    Класс размера и приоритет в очереди по оценке объёма задачи.
+    """
+    small_max = int(os.getenv("ANALYSIS_SMALL_JOB_DOCS", "5000"))
+    medium_max = int(os.getenv("ANALYSIS_LARGE_JOB_DOCS", "50000"))
+    size = size_class(docs_estimate, small_max, medium_max)
+    return {
+        "docs_estimate": docs_estimate,
+        "size_class": size.value,
+        "priority": PRIORITY_BY_SIZE[size],
+    }
+
+
+class LeaseLostError(RuntimeError):
+    """
+    Lease задачи или шарда забрал reaper – результат этого воркера больше не нужен.
+    """
+
+
+class JobCanceledError(LeaseLostError):
+    """
+    Задачу отменил пользователь – воркер останавливается на ближайшем heartbeat'е.
+    """
+
+
+@dataclass
+class StartResult:
+    """
+    Что воркеру делать после start_job: опубликовать шарды или отложить задачу
+    (у аккаунта уже ANALYSIS_MAX_RUNNING_PER_ACCOUNT выполняющихся задач).
+    """
+    shard_ids: list[int] = field(default_factory=list)
+    deferred: bool = False
+    priority: int = 0
+
+
+@dataclass
+class BatchItemResult:
+    """
+    Результат одного элемента пакетного создания: задача или текст ошибки.
+    """
+    index: int
+    job: Optional[AnalysisJob] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class OverviewResult:
+    """
+    Результат расчёта по задаче, собранный в памяти до записи в БД.
+    """
+    report: OverviewReport
+    events: list[TrendEvent]
+    predictions: list[Prediction] = field(default_factory=list)
+    # посчитанные полные сутки – для переиспользования следующими задачами
+    cells: DayCells = field(default_factory=dict)
 
 
 class AnalysisService:
@@ -20,6 +122,31 @@ class AnalysisService:
         # Feature flags
         self.sentiment_enabled = os.getenv("SENTIMENT_ENABLED", "0") == "1"
         self.sentiment_fail_open = os.getenv("SENTIMENT_FAIL_OPEN", "1") == "1"
+        self.persist_predictions = os.getenv("SENTIMENT_PERSIST_PREDICTIONS", "1") == "1"
+        # Тренды доли негатива: сутки с меньшим числом оценённых документов не учитываются (шум)
+        self.neg_share_min_docs = int(os.getenv("ANALYSIS_NEG_SHARE_MIN_DOCS", "5"))
+        # сколько самых негативных документов дня прикладывать к всплеску (top_doc_ids)
+        self.trend_top_docs = int(os.getenv("ANALYSIS_TREND_TOP_DOCS", "10"))
+
+        # Шардирование больших задач по датам
+        self.shard_min_docs = int(os.getenv("ANALYSIS_SHARD_MIN_DOCS", "20000"))
+        self.shard_target_docs = int(os.getenv("ANALYSIS_SHARD_TARGET_DOCS", "10000"))
+        self.shard_max = int(os.getenv("ANALYSIS_SHARD_MAX", "32"))
+
+        # Переиспользование готовых суток из прошлых задач (инкрементальный пересчёт)
+        self.incremental_enabled = os.getenv("ANALYSIS_INCREMENTAL_ENABLED", "1") == "1"
+
+        # Как часто воркер пишет прогресс задачи в БД
+        self.progress_interval = float(os.getenv("ANALYSIS_PROGRESS_INTERVAL_SECONDS", "2"))
+
+        # Справедливость между аккаунтами: не больше N RUNNING задач на аккаунт (0 – без лимита)
+        self.max_running_per_account = int(os.getenv("ANALYSIS_MAX_RUNNING_PER_ACCOUNT", "2"))
+
+        # Восстановление после падения воркера: lease с heartbeat'ом, reaper, чекпоинты инференса
+        self.worker_id = f"{os.getenv('WORKER_ID') or f'{socket.gethostname()}:{os.getpid()}'}/{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = float(os.getenv("ANALYSIS_LEASE_SECONDS", "120"))
+        self.max_attempts = int(os.getenv("ANALYSIS_MAX_ATTEMPTS", "3"))
+        self.checkpoint_interval = float(os.getenv("ANALYSIS_CHECKPOINT_INTERVAL_SECONDS", "30"))
 
         self._tokenizer = None
         self._model = None
@@ -33,9 +160,7 @@ class AnalysisService:
         return self._tokenizer, self._model, self._id2label
 
     def estimate_scope_docs_count(self, account_id: int, scope: AnalysisScope) -> int:
-        for sid in scope.source_ids:
-            if not self.uow.sources.get_by_id(account_id, int(sid)):
-                raise ValueError(f"Источник не найден или недоступен: {sid}")
+        self._check_scope_access(account_id, scope)
 
         return self.uow.documents.count_by_sources_and_period(
             source_ids=scope.source_ids,
@@ -49,123 +174,658 @@ class AnalysisService:
         if cnt == 0:
             raise ValueError("За выбранный период документов не найдено. Измените даты или источники.")
 
-        job = self.uow.analysis.create(account_id, scope)
+        job = self.uow.analysis.create(
+            account_id,
+            scope,
+            fingerprint=scope_fingerprint(scope, current_model_key()),
+            **job_scheduling(cnt),
+        )
         self.uow.analysis.set_status(job.id, JobStatus.PENDING)
         self.uow.commit()
         return self.uow.analysis.get_by_id(account_id, job.id)
 
-    def run_job(self, job_id: int) -> None:
+    def start_job(self, job_id: int) -> StartResult:
+        """
+        Точка входа воркера. Небольшие задачи считаются сразу (run_job),
+        большие режутся на шарды по датам – возвращаются id шардов для публикации в очередь.
+        Если у аккаунта уже максимум выполняющихся задач – задача остаётся PENDING и откладывается.
+        """
         job = self.uow.analysis.get_by_id_any(job_id)
-        if not job:
+        if not job or job.status != JobStatus.PENDING:
+            return StartResult()
+
+        # планирование – самые тяжёлые чтения задачи – до блокировки слота: под advisory-lock
+        # аккаунта остаются только count_running и claim, другие задачи аккаунта не ждут
+        ranges, docs_total = self._plan_shards(job.account_id, job.scope)
+
+        if not self._acquire_running_slot(job.account_id):
+            return StartResult(deferred=True, priority=job.priority)
+
+        if len(ranges) <= 1:
+            self.run_job(job_id)
+            return StartResult(priority=job.priority)
+
+        # lease у шардированной задачи нет – его держат шарды
+        if not self.uow.analysis.claim(job.id, self.worker_id, lease_seconds=None):
+            self.uow.rollback()
+            return StartResult()
+
+        shards = self.uow.shards.create_many(job.id, ranges)
+        # прогресс шардированной задачи считается по таблице шардов (get_progress)
+        self.uow.analysis.set_progress(
+            job.id,
+            {
+                "stage": "sharded",
+                "sharded": True,
+                "docs_total": docs_total,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+        self.uow.commit()
+        return StartResult(shard_ids=[s.id for s in shards], priority=job.priority)
+
+    def _acquire_running_slot(self, account_id: int) -> bool:
+        """
+        Проверяет лимит RUNNING задач аккаунта под advisory-lock; при успехе
+        блокировка держится до commit, в котором задача переходит в RUNNING.
+        """
+        if self.max_running_per_account <= 0:
+            return True
+
+        self.uow.analysis.lock_account(account_id)
+        if self.uow.analysis.count_running(account_id) >= self.max_running_per_account:
+            self.uow.rollback()
+            return False
+        return True
+
+    def _plan_shards(self, account_id: int, scope: AnalysisScope) -> tuple[list[DateRange], int]:
+        self._check_scope_access(account_id, scope)
+
+        day_counts = self.uow.documents.daily_counts_by_sources_and_period(
+            source_ids=scope.source_ids,
+            date_from=scope.date_range.start,
+            date_to=scope.date_range.end,
+        )
+        docs_total = sum(n for _, n in day_counts)
+        if docs_total < self.shard_min_docs:
+            return [scope.date_range], docs_total
+
+        # почти весь период уже посчитан – дешевле досчитать новые сутки целиком в run_job
+        reused_docs = sum(c.docs_fetched for c in self._reusable_cells(scope).values())
+        if docs_total - reused_docs < self.shard_min_docs:
+            return [scope.date_range], docs_total
+
+        ranges = plan_day_shards(
+            day_counts,
+            scope.date_range,
+            target_docs=self.shard_target_docs,
+            max_shards=self.shard_max,
+        )
+        return ranges, docs_total
+
+    def _progress_tracker(self, job_id: int) -> ProgressTracker:
+        def _sink(progress: dict) -> None:
+            # отдельная короткая транзакция: в момент записи прогресса других изменений нет;
+            # она же – heartbeat lease задачи
+            self._renew_job_lease(job_id)
+            self.uow.analysis.set_progress(job_id, progress)
+            self.uow.commit()
+
+        return ProgressTracker(_sink, interval=self.progress_interval)
+
+    def _renew_job_lease(self, job_id: int) -> None:
+        if self.uow.analysis.renew_lease(job_id, self.worker_id, self.lease_seconds):
             return
+        self.uow.rollback()
+        job = self.uow.analysis.get_by_id_any(job_id)
+        if job and job.status == JobStatus.CANCELED:
+            raise JobCanceledError(f"job {job_id}: canceled")
+        raise LeaseLostError(f"job {job_id}: lease lost")
+
+    def _heartbeat_job(self, job_id: int) -> None:
+        self._renew_job_lease(job_id)
+        self.uow.commit()
+
+    def _checkpointer(self, job: AnalysisJob) -> ScoringCheckpoint:
+        def _sink(state: dict, predictions: list[Prediction]) -> None:
+            self._renew_job_lease(job.id)
+            if predictions:
+                self.uow.predictions.save_many(job.id, predictions)
+            self.uow.analysis.set_checkpoint(job.id, state)
+            self.uow.commit()
+
+        return ScoringCheckpoint(_sink, interval=self.checkpoint_interval, state=job.checkpoint)
 
-        if job.status in (JobStatus.DONE, JobStatus.ERROR):
+    def run_job(self, job_id: int) -> None:
+        job = self.uow.analysis.get_by_id_any(job_id)
+        if not job or job.status != JobStatus.PENDING:
+            # DONE/ERROR или уже выполняется (просроченный lease вернёт в PENDING reaper)
             return
 
-        if job.status == JobStatus.RUNNING:
+        job = self.uow.analysis.claim(job.id, self.worker_id, self.lease_seconds)
+        if not job:
+            self.uow.rollback()
             return
+        # задача уже RUNNING: фиксируем claim сразу – это же снимает advisory-lock
+        # слота аккаунта (_acquire_running_slot), который не должен держаться на загрузке
+        self.uow.commit()
+
+        progress = self._progress_tracker(job.id)
 
         try:
-            self.uow.analysis.set_status(job.id, JobStatus.RUNNING)
+            progress.set_stage("loading")
+
+            docs, reused = self._load_incremental(
+                account_id=job.account_id,
+                scope=job.scope,
+                heartbeat=lambda: self._heartbeat_job(job.id),
+            )
+            # Документы уже в памяти: продлеваем lease (загрузка могла идти долго) и закрываем
+            # читающую транзакцию, чтобы не держать соединение "idle in transaction" на время инференса.
+            self._renew_job_lease(job.id)
             self.uow.commit()
 
-            self._run_overview(job_id=job.id, account_id=job.account_id, scope=job.scope)
+            result = self._run_overview(
+                job_id=job.id,
+                scope=job.scope,
+                docs=docs,
+                progress=progress,
+                reused=reused,
+                checkpoint=self._checkpointer(job),
+            )
 
+            # Финальный переход состояния – одна короткая транзакция с пакетной записью.
+            progress.set_stage("saving")
+            self._renew_job_lease(job.id)
+            self._save_results(job.id, result, scope=job.scope)
             self.uow.analysis.set_done(job.id)
+            self.uow.analysis.set_progress(job.id, progress.final("done"))
+            self.uow.analysis.set_checkpoint(job.id, {})
             self.uow.commit()
 
+        except LeaseLostError:
+            # задачу отменили или уже перезапустил reaper – ничего не пишем
+            self.uow.rollback()
+
         except Exception as e:
             try:
+                self.uow.rollback()
                 self.uow.analysis.set_error(job.id, str(e))
+                self.uow.analysis.set_progress(job.id, progress.final("error"))
                 self.uow.commit()
             except Exception:
                 self.uow.rollback()
             raise
 
-    def _run_overview(self, job_id: int, account_id: int, scope: AnalysisScope) -> None:
+    def run_shard(self, job_id: int, shard_id: int) -> None:
+        """
+        Считает один шард (частичный агрегат) и, если он последний, запускает reduce.
+        """
+        shard = self.uow.shards.claim(shard_id, self.worker_id, self.lease_seconds)
+        if not shard or shard.job_id != job_id:
+            self.uow.rollback()
+            return
+
+        job = self.uow.analysis.get_by_id_any(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            # задача уже упала – шард не считаем
+            self.uow.rollback()
+            return
+        self.uow.commit()
+
+        scope = AnalysisScope(
+            source_ids=job.scope.source_ids,
+            date_range=shard.date_range,
+            query=job.scope.query,
+        )
+
+        try:
+            docs = self._load_scope_documents(account_id=job.account_id, scope=scope)
+            self._renew_shard_lease(shard.id)
+            self.uow.commit()
+
+            cells, predictions = self._score_documents(scope, docs, progress=self._shard_heartbeat(shard.id))
+            partial = merge_partials(cells.values())
+
+            self._renew_shard_lease(shard.id)
+            if predictions:
+                self.uow.predictions.save_many(job.id, predictions)
+            self._save_cells(job.id, job.scope, cells)
+            self.uow.shards.set_done(shard.id, partial.to_dict())
+            self.uow.commit()
+
+        except LeaseLostError:
+            # задачу отменили или шард уже отдан другому воркеру
+            self.uow.rollback()
+            return
+
+        except Exception as e:
+            try:
+                self.uow.rollback()
+                self.uow.shards.set_error(shard.id, str(e))
+                if self.uow.analysis.get_for_update(job.id).status == JobStatus.RUNNING:
+                    self.uow.analysis.set_error(job.id, f"shard {shard.idx}: {e}")
+                self.uow.commit()
+            except Exception:
+                self.uow.rollback()
+            raise
+
+        self._reduce_if_complete(job.id)
+
+    def _renew_shard_lease(self, shard_id: int) -> None:
+        if not self.uow.shards.renew_lease(shard_id, self.worker_id, self.lease_seconds):
+            raise LeaseLostError(f"shard {shard_id}: lease lost")
+
+    def _shard_heartbeat(self, shard_id: int) -> ProgressTracker:
+        """
+        Прогресс шарда не пишется в задачу (он собирается по таблице шардов) –
+        трекер используется только как троттлинг heartbeat'а lease.
+        """
+        def _sink(_: dict) -> None:
+            self._renew_shard_lease(shard_id)
+            self.uow.commit()
+
+        return ProgressTracker(_sink, interval=self.progress_interval)
+
+    def reap_expired_leases(self, limit: int = 100) -> list[tuple[dict[str, int], int]]:
+        """
+        Reaper: задачи и шарды с просроченным lease (воркер умер или завис) возвращаются
+        в PENDING – задача продолжит с чекпоинта; после ANALYSIS_MAX_ATTEMPTS попыток – ERROR.
+        Возвращает сообщения (payload, priority) для повторной публикации в очередь.
+        """
+        messages: list[tuple[dict[str, int], int]] = []
+
+        for job in self.uow.analysis.list_expired_for_update(limit):
+            if job.attempts >= self.max_attempts:
+                self.uow.analysis.set_error(job.id, f"lease expired after {job.attempts} attempts")
+                continue
+            self.uow.analysis.set_status(job.id, JobStatus.PENDING)
+            messages.append(({"job_id": job.id}, job.priority))
+
+        for shard in self.uow.shards.list_expired_for_update(limit):
+            job = self.uow.analysis.get_for_update(shard.job_id)
+            if not job or job.status != JobStatus.RUNNING:
+                self.uow.shards.set_error(shard.id, "job is not running")
+                continue
+            if shard.attempts >= self.max_attempts:
+                error = f"lease expired after {shard.attempts} attempts"
+                self.uow.shards.set_error(shard.id, error)
+                self.uow.analysis.set_error(job.id, f"shard {shard.idx}: {error}")
+                continue
+            self.uow.shards.release(shard.id)
+            messages.append(({"job_id": job.id, "shard_id": shard.id}, job.priority))
+
+        self.uow.commit()
+        return messages
+
+    def pending_messages(self) -> list[tuple[dict[str, int], int]]:
+        """
+        Сообщения для PENDING задач и шардов – in-process очередь не переживает рестарт,
+        поэтому при старте она заполняется заново из БД (дубли безопасны: claim атомарен).
+        """
+        messages: list[tuple[dict[str, int], int]] = [
+            ({"job_id": j.id}, j.priority) for j in self.uow.analysis.list_pending()
+        ]
+        messages += [
+            ({"job_id": s.job_id, "shard_id": s.id}, prio) for s, prio in self.uow.shards.list_pending()
+        ]
+        return messages
+
+    def _reduce_if_complete(self, job_id: int) -> None:
+        """
+        Reduce: сливает частичные агрегаты шардов и пишет отчёт.
+        Блокировка строки задачи сериализует конкурирующих воркеров –
+        reduce выполняет тот, кто увидел все шарды DONE первым.
+        """
+        try:
+            job = self.uow.analysis.get_for_update(job_id)
+            if not job or job.status != JobStatus.RUNNING:
+                self.uow.rollback()
+                return
+
+            shards = self.uow.shards.list_by_job(job_id)
+            if not shards or any(s.status != JobStatus.DONE for s in shards):
+                self.uow.rollback()
+                return
+
+            agg = merge_partials(PartialAggregate.from_dict(s.partial or {}) for s in shards)
+            result = self._build_result(job_id, job.scope, agg)
+            result.report.metrics["shards"] = len(shards)
+
+            self._save_results(job_id, result)
+            self.uow.analysis.set_done(job_id)
+            self.uow.analysis.set_progress(
+                job_id,
+                {
+                    **job.progress,
+                    "stage": "done",
+                    "docs_scored": agg.total,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                },
+            )
+            self.uow.commit()
+
+        except Exception as e:
+            try:
+                self.uow.rollback()
+                self.uow.analysis.set_error(job_id, f"reduce: {e}")
+                self.uow.commit()
+            except Exception:
+                self.uow.rollback()
+            raise
+
+    def _check_scope_access(self, account_id: int, scope: AnalysisScope) -> None:
         for sid in scope.source_ids:
             if not self.uow.sources.get_by_id(account_id, int(sid)):
                 raise ValueError(f"Источник не найден или недоступен: {sid}")
 
-        docs = self.uow.documents.list_by_sources_and_period(
+    def _load_scope_documents(self, account_id: int, scope: AnalysisScope) -> list[Document]:
+        self._check_scope_access(account_id, scope)
+
+        return self.uow.documents.list_by_sources_and_period(
             source_ids=scope.source_ids,
             date_from=scope.date_range.start,
             date_to=scope.date_range.end,
         )
 
-        filtered = filter_documents(docs, scope)
+    def _reusable_cells(self, scope: AnalysisScope) -> DayCells:
+        """
+        Готовые агрегаты полных суток периода из DONE-задач с тем же query и моделью,
+        у которых watermark (count, max id) совпадает с текущими данными.
+        """
+        days = full_days(scope.date_range) if self.incremental_enabled else []
+        if not days:
+            return {}
+
+        stored = self.uow.day_aggregates.latest_done(
+            aggregate_key(scope.query, current_model_key()),
+            scope.source_ids,
+            day_from=days[0],
+            day_to=days[-1],
+        )
+        if not stored:
+            return {}
+
+        current = self.uow.documents.day_watermarks_by_sources_and_period(
+            source_ids=scope.source_ids,
+            date_from=days[0],
+            date_to=days[-1] + timedelta(days=1) - timedelta(microseconds=1),
+        )
+        return {k: c for k, c in stored.items() if current.get(k) == (c.docs_fetched, c.max_doc_id)}
+
+    def _load_incremental(
+        self,
+        account_id: int,
+        scope: AnalysisScope,
+        heartbeat: Callable[[], None] | None = None,
+    ) -> tuple[list[Document], DayCells]:
+        """
+        Документы только за непокрытые части периода (по каждому источнику) + готовые сутки.
+        heartbeat вызывается между выборками, чтобы lease не истёк на долгой загрузке.
+        """
+        self._check_scope_access(account_id, scope)
+
+        reused = self._reusable_cells(scope)
+        if not reused:
+            return self._load_scope_documents(account_id, scope), {}
+
+        docs: list[Document] = []
+        for sid in sorted({int(x) for x in scope.source_ids}):
+            covered = [day for (s, day) in reused if s == sid]
+            for r in uncovered_ranges(scope.date_range, covered):
+                docs.extend(self.uow.documents.list_by_sources_and_period([sid], r.start, r.end))
+                if heartbeat:
+                    heartbeat()
+        return docs, reused
+
+    def _save_cells(self, job_id: int, scope: AnalysisScope, cells: DayCells) -> None:
+        # только полные сутки и только реальный инференс/заглушка (fallback не кэшируем)
+        full = {
+            k: c for k, c in cells.items()
+            if is_full_day(k[1], scope.date_range) and c.sentiment_mode != "fallback"
+        }
+        if full:
+            self.uow.day_aggregates.save_many(job_id, aggregate_key(scope.query, current_model_key()), full)
+
+    def _save_results(self, job_id: int, result: OverviewResult, scope: AnalysisScope | None = None) -> None:
+        if any(c.sentiment_mode == "fallback" for c in result.cells.values()):
+            # модель упала посреди задачи: предсказания, уже записанные чекпоинтами, к отчёту-заглушке
+            # не относятся; чекпоинт сбрасывается в той же транзакции
+            self.uow.predictions.delete_for_job(job_id)
+            self.uow.analysis.set_checkpoint(job_id, {})
+        self.uow.trend.save_many(job_id, result.events)
+        if result.predictions:
+            self.uow.predictions.save_many(job_id, result.predictions)
+        if scope is not None and result.cells:
+            self._save_cells(job_id, scope, result.cells)
+        self.uow.overview.upsert(result.report)
+
+    def _run_overview(
+        self,
+        job_id: int,
+        scope: AnalysisScope,
+        docs: list[Document],
+        progress: ProgressTracker | None = None,
+        reused: DayCells | None = None,
+        checkpoint: ScoringCheckpoint | None = None,
+    ) -> OverviewResult:
+        cells, predictions = self._score_documents(scope, docs, progress=progress, checkpoint=checkpoint)
+        agg = merge_partials([*cells.values(), *(reused or {}).values()])
+
+        result = self._build_result(job_id, scope, agg)
+        result.predictions = predictions
+        result.cells = cells
+        if reused:
+            result.report.metrics["days_reused"] = len(reused)
+        return result
+
+    def _score_documents(
+        self,
+        scope: AnalysisScope,
+        docs: list[Document],
+        progress: ProgressTracker | None = None,
+        checkpoint: ScoringCheckpoint | None = None,
+    ) -> tuple[DayCells, list[Prediction]]:
+        """
+        Map-шаг: фильтрация, инференс и счётчики по (источник, сутки) для части документов задачи.
+        С чекпоинтом документы скорятся по возрастанию id, уже посчитанные пропускаются;
+        возвращаются только предсказания, не записанные чекпоинтом.
+        """
+        in_scope = filter_documents(docs, scope)
+        filtered = in_scope
 
         if scope.query:
             q = scope.query.strip().lower()
             filtered = [d for d in filtered if q in (d.title or "").lower() or q in d.text.lower()]
 
-        texts = [d.text for d in filtered if d.text]
-        total = len(texts)
+        scored_docs = sorted((d for d in filtered if d.text), key=lambda d: d.id)
+        total = len(scored_docs)
+
+        cells: DayCells = {}
+
+        def cell(d: Document) -> PartialAggregate:
+            return cells.setdefault((d.source_id, day_start(d.published_at)), PartialAggregate())
+
+        def cube_key(d: Document) -> tuple[int, str | None, datetime]:
+            return d.source_id, d.topic or None, day_start(d.published_at)
+
+        for d in in_scope:
+            c = cell(d)
+            c.docs_fetched += 1
+            c.max_doc_id = d.id if c.max_doc_id is None else max(c.max_doc_id, d.id)
+        for d in filtered:
+            c = cell(d)
+            c.add_day(d.published_at)
+            c.add_breakdown(cube_key(d), docs=1)
+        for d in scored_docs:
+            cell(d).total += 1
+
+        if progress:
+            progress.set_stage("scoring", docs_fetched=len(docs), docs_total=total)
 
         # SENTIMENT
-        sentiment_share = None
-        sentiment_mode = "disabled"
-        sentiment_error = None
+        predictions: list[Prediction] = []
 
         if total == 0:
-            sentiment_share = {"negative": 0.0, "neutral": 1.0, "positive": 0.0}
-            sentiment_mode = "empty"
+            pass
         elif not self.sentiment_enabled:
             # заглушка
-            sentiment_share = {"negative": 0.0, "neutral": 1.0, "positive": 0.0}
-            sentiment_mode = "stub"
+            for c in cells.values():
+                c.sentiment_counts["neutral"] = c.total
+                c.sentiment_mode = "stub" if c.total else "empty"
+            for d in scored_docs:
+                cell(d).add_breakdown(cube_key(d), label="neutral")
+            if progress:
+                progress.add_scored(total)
         else:
             try:
                 tokenizer, model, id2label = self._get_model()
-                counts = Counter({"negative": 0, "neutral": 0, "positive": 0})
+                labels = [self._normalize_label(id2label[i]) for i in sorted(id2label)]
+                now = datetime.now(timezone.utc)
 
                 device = next(model.parameters()).device
 
-                for batch in _batch(texts, size=32):
+                todo = scored_docs
+                if checkpoint:
+                    todo = checkpoint.resume(scored_docs, cells)
+                    if progress and len(todo) < total:
+                        progress.add_resumed(total - len(todo))
+
+                # счётчики меток по (источник, тема, сутки) – bincount по индексу ячейки куба,
+                # без цикла по документам; счётчики (источник, сутки) – их суммы
+                key_idx: dict[tuple[int, str | None, datetime], int] = {}
+                todo_cells = np.fromiter(
+                    (key_idx.setdefault(cube_key(d), len(key_idx)) for d in todo),
+                    dtype=np.int64,
+                    count=len(todo),
+                )
+                keys = list(key_idx)
+                n_labels = len(labels)
+                neg_col = labels.index("negative") if "negative" in labels else None
+                offset = 0
+
+                for batch_docs in _batch(todo, size=32):
                     inputs = tokenizer(
-                        batch,
+                        [d.text for d in batch_docs],
                         padding=True,
                         truncation=True,
                         max_length=384,
                         return_tensors="pt",
                     )
+                    mask = inputs.get("attention_mask")
+                    if mask is not None and mask.numel():
+                        INFERENCE_PADDING_RATIO.observe(1.0 - float(mask.sum()) / mask.numel())
                     inputs = {k: v.to(device) for k, v in inputs.items()}
 
+                    batch_started = time.perf_counter()
                     with torch.no_grad():
                         out = model(**inputs)
                         logits = out.logits if hasattr(out, "logits") else out["logits"]
-                        pred_ids = torch.argmax(logits, dim=-1).tolist()
+                        probs_t = torch.softmax(logits, dim=-1)
+                        label_idx = probs_t.argmax(dim=-1).cpu().numpy()
+                        probs = probs_t.tolist()
+                    batch_seconds = time.perf_counter() - batch_started
+
+                    INFERENCE_DOCS.inc(len(batch_docs))
+                    INFERENCE_BATCH_SECONDS.observe(batch_seconds)
+                    if batch_seconds > 0:
+                        INFERENCE_DOCS_PER_SEC.set(len(batch_docs) / batch_seconds)
+
+                    if progress:
+                        progress.add_scored(len(batch_docs))
+
+                    batch_cells = todo_cells[offset : offset + len(batch_docs)]
+                    offset += len(batch_docs)
+                    batch_counts = np.bincount(batch_cells * n_labels + label_idx, minlength=len(keys) * n_labels)
+                    for k in np.flatnonzero(batch_counts):
+                        key, label, n = keys[k // n_labels], labels[k % n_labels], int(batch_counts[k])
+                        c = cells[(key[0], key[2])]
+                        c.sentiment_counts[label] += n
+                        c.add_breakdown(key, label=label, n=n)
+
+                    if neg_col is not None and self.trend_top_docs > 0:
+                        p_neg = probs_t[:, neg_col].cpu().numpy()
+                        for d, ci, p in zip(batch_docs, batch_cells, p_neg):
+                            key = keys[ci]
+                            cells[(key[0], key[2])].push_top(key[2], float(p), d.id, self.trend_top_docs)
+
+                    if self.persist_predictions:
+                        for d, row, li in zip(batch_docs, probs, label_idx):
+                            by_label = dict(zip(labels, row))
+                            predictions.append(
+                                Prediction(
+                                    document_id=d.id,
+                                    label=_LABEL_TO_ENUM[labels[li]],
+                                    probs=SentimentProbs(
+                                        p_neg=by_label.get("negative", 0.0),
+                                        p_neu=by_label.get("neutral", 0.0),
+                                        p_pos=by_label.get("positive", 0.0),
+                                    ),
+                                    created_at=now,
+                                )
+                            )
 
-                    for pid in pred_ids:
-                        lbl = self._normalize_label(id2label[int(pid)])
-                        counts[lbl] += 1
+                    if checkpoint:
+                        checkpoint.record(batch_docs, cells, predictions)
 
-                sentiment_share = {k: counts[k] / total for k in counts}
-                sentiment_mode = "model"
+                for c in cells.values():
+                    c.sentiment_mode = "model" if c.total else "empty"
 
+            except LeaseLostError:
+                raise
             except Exception as e:
-                sentiment_error = str(e)
                 if not self.sentiment_fail_open:
                     raise
                 # заглушка
-                sentiment_share = {"negative": 0.0, "neutral": 1.0, "positive": 0.0}
-                sentiment_mode = "fallback"
+                for c in cells.values():
+                    c.sentiment_counts = {"negative": 0, "neutral": c.total, "positive": 0}
+                    c.sentiment_mode = "fallback" if c.total else "empty"
+                    c.sentiment_error = str(e)
+                    for vals in c.breakdown.values():
+                        vals[1:] = [0] * (len(vals) - 1)
+                    # ранжирование по частичному прогону модели не выдаём за результат
+                    c.top_docs.clear()
+                for d in scored_docs:
+                    cell(d).add_breakdown(cube_key(d), label="neutral")
+                predictions = []
 
-        # TRENDS
-        ts = _build_daily_count_series(filtered)
-        signals = detect_trends(ts)
+        # дневной ряд тональности – из тех же счётчиков ячеек (источник, сутки), без второго прохода
+        for (_, day), c in cells.items():
+            if c.total:
+                c.daily_sentiment = {day: dict(c.sentiment_counts)}
+
+        return cells, predictions
+
+    def _build_result(self, job_id: int, scope: AnalysisScope, agg: PartialAggregate) -> OverviewResult:
+        """
+        Reduce-шаг: тренды и отчёт по полному (слитому) агрегату задачи.
+        """
+        # TRENDS: объём публикаций и доля негатива по дням
+        ts = agg.daily_series()
+        sentiment_series = agg.daily_sentiment_series()
+        # дни с малой выборкой – пропуски, а не выброшенные точки: окно остаётся из соседних дней
+        neg_share = [
+            {"ts": x["ts"], "value": x["negative"] / x["total"] if x["total"] >= self.neg_share_min_docs else None}
+            for x in sentiment_series
+        ]
+        signals = [(s, s.kind) for s in detect_trends(ts)]
+        signals += [(s, f"neg_{s.kind}") for s in detect_trends(neg_share)]
         events = [
             TrendEvent(
                 job_id=job_id,
                 ts=s.ts,
-                kind=s.kind,
+                kind=kind,
                 value=s.value,
                 baseline=s.baseline,
                 z=s.z,
+                # всплеск объясняют самые негативные документы дня – из куч, собранных при инференсе
+                top_doc_ids=agg.top_doc_ids(s.ts, self.trend_top_docs) if s.kind == "spike" else [],
             )
-            for s in signals
+            for s, kind in sorted(signals, key=lambda x: x[0].ts)
         ]
-        self.uow.trend.save_many(job_id, events)
+
+        # BREAKDOWN: куб источник × тема × сутки – из счётчиков ячеек, собранных при инференсе
+        breakdown = encode_breakdown(agg.breakdown)
 
         # OVERVIEW
         metrics = {
@@ -175,21 +835,37 @@ class AnalysisService:
             "query": scope.query,
             "timeseries_days": len(ts),
             "trends_found": len(events),
-            "sentiment_mode": sentiment_mode,
-            "daily_series": [{"ts": x["ts"].isoformat(), "value": int(x["value"])} for x in ts]
+            "sentiment_mode": agg.sentiment_mode,
+            "daily_series": [{"ts": x["ts"].isoformat(), "value": int(x["value"])} for x in ts],
+            "daily_sentiment": [
+                {
+                    "ts": x["ts"].isoformat(),
+                    "negative": x["negative"],
+                    "neutral": x["neutral"],
+                    "positive": x["positive"],
+                    "neg_share": round(x["negative"] / x["total"], 4),
+                }
+                for x in sentiment_series
+            ],
+            "negativity_trends_found": sum(1 for e in events if e.kind.startswith("neg_")),
+            "breakdown_rows": len(breakdown["rows"]),
+            "topics": len(breakdown["topics"]),
+            # по нему create_job проверяет, что отчёт ещё актуален для переиспользования
+            "data_watermark": {"docs": agg.docs_fetched, "max_doc_id": agg.max_doc_id},
         }
 
-        if sentiment_error:
-            metrics["sentiment_error"] = sentiment_error  # чтобы видеть в UI причину
+        if agg.sentiment_error:
+            metrics["sentiment_error"] = agg.sentiment_error  # чтобы видеть в UI причину
 
         report = OverviewReport(
             job_id=job_id,
-            total_documents=total,
-            sentiment_share=sentiment_share,
+            total_documents=agg.total,
+            sentiment_share=agg.sentiment_share(),
             metrics=metrics,
             created_at=datetime.now(timezone.utc),
+            breakdown=breakdown,
         )
-        self.uow.overview.upsert(report)
+        return OverviewResult(report=report, events=events)
 
     def _normalize_label(self, lbl: str) -> str:
         lbl = lbl.lower()
@@ -218,15 +894,217 @@ class AnalysisService:
         return self.uow.trend.list_by_job(job_id)
 
 
-def _batch(items: list[str], size: int):
+class AsyncAnalysisService:
+    """
+    Request path (API/UI): создание задач и чтение результатов без блокировки event loop.
+    Выполнение задач (run_job) остаётся в синхронном AnalysisService воркера.
+    """
+    def __init__(self, uow: AsyncUoW):
+        self.uow = uow
+        self.reuse_enabled = os.getenv("ANALYSIS_REUSE_ENABLED", "1") == "1"
+
+    async def estimate_scope_docs_count(self, account_id: int, scope: AnalysisScope) -> int:
+        for sid in scope.source_ids:
+            if not await self.uow.sources.get_by_id(account_id, int(sid)):
+                raise ValueError(f"Источник не найден или недоступен: {sid}")
+
+        return await self.uow.documents.count_by_sources_and_period(
+            source_ids=scope.source_ids,
+            date_from=scope.date_range.start,
+            date_to=scope.date_range.end,
+            query=scope.query,
+        )
+
+    async def create_job(self, account_id: int, scope: AnalysisScope):
+        cnt = await self.estimate_scope_docs_count(account_id, scope)
+        if cnt == 0:
+            raise ValueError("За выбранный период документов не найдено. Измените даты или источники.")
+
+        fingerprint = scope_fingerprint(scope, current_model_key())
+        job = await self.uow.analysis.create(
+            account_id, scope, fingerprint=fingerprint, **job_scheduling(cnt),
+        )
+
+        # Такой же scope уже посчитан и данные не менялись – копируем результат,
+        # задача сразу DONE и в очередь не ставится.
+        source = await self._find_reusable_report(fingerprint, scope) if self.reuse_enabled else None
+        if source:
+            await self.uow.overview.clone(source.job_id, job.id, {"reused_from_job_id": source.job_id})
+            await self.uow.trend.clone(source.job_id, job.id)
+            await self.uow.analysis.set_status(job.id, JobStatus.DONE, error="")
+            job = await self.uow.analysis.get_by_id(account_id, job.id)
+
+        await self.uow.commit()
+        return job
+
+    async def create_jobs(self, account_id: int, scopes: list[AnalysisScope]) -> list[BatchItemResult]:
+        """
+        Пакетное создание: общий ACL-запрос и один count-запрос на все scope,
+        все задачи – одним INSERT в одной транзакции. Ошибки – по элементам.
+        """
+        results = [BatchItemResult(index=i) for i in range(len(scopes))]
+
+        allowed = await self.uow.sources.accessible_ids(
+            account_id, sorted({int(sid) for s in scopes for sid in s.source_ids})
+        )
+        pending: list[int] = []
+        for i, s in enumerate(scopes):
+            denied = [sid for sid in s.source_ids if int(sid) not in allowed]
+            if denied:
+                results[i].error = f"Источник не найден или недоступен: {denied[0]}"
+            else:
+                pending.append(i)
+
+        counts = await self.uow.documents.count_by_scopes([scopes[i] for i in pending])
+        valid: list[int] = []
+        for i, cnt in zip(pending, counts):
+            if cnt == 0:
+                results[i].error = "За выбранный период документов не найдено. Измените даты или источники."
+            else:
+                valid.append(i)
+        if not valid:
+            return results
+
+        model_key = current_model_key()
+        items = [
+            {
+                "scope": scopes[i],
+                "fingerprint": scope_fingerprint(scopes[i], model_key),
+                **job_scheduling(cnt),
+            }
+            for i, cnt in zip(pending, counts)
+            if cnt
+        ]
+        jobs = await self.uow.analysis.create_many(account_id, items)
+
+        reports = (
+            await self.uow.overview.latest_done_by_fingerprints([it["fingerprint"] for it in items])
+            if self.reuse_enabled else {}
+        )
+        for i, it, job in zip(valid, items, jobs):
+            source = reports.get(it["fingerprint"])
+            if source and await self._is_fresh(source, it["scope"]):
+                await self.uow.overview.clone(source.job_id, job.id, {"reused_from_job_id": source.job_id})
+                await self.uow.trend.clone(source.job_id, job.id)
+                await self.uow.analysis.set_status(job.id, JobStatus.DONE, error="")
+                job.status, job.finished_at = JobStatus.DONE, datetime.now(timezone.utc)
+            results[i].job = job
+
+        await self.uow.commit()
+        return results
+
+    async def _find_reusable_report(self, fingerprint: str, scope: AnalysisScope) -> Optional[OverviewReport]:
+        report = await self.uow.overview.latest_done_by_fingerprint(fingerprint)
+        if not report or not await self._is_fresh(report, scope):
+            return None
+        return report
+
+    async def _is_fresh(self, report: OverviewReport, scope: AnalysisScope) -> bool:
+        seen = (report.metrics or {}).get("data_watermark")
+        if not seen:
+            return False
+
+        # freshness: новые/удалённые документы в диапазоне меняют count или max(id)
+        docs, max_id = await self.uow.documents.watermark_by_sources_and_period(
+            source_ids=scope.source_ids,
+            date_from=scope.date_range.start,
+            date_to=scope.date_range.end,
+        )
+        return docs == seen.get("docs") and max_id == seen.get("max_doc_id")
+
+    async def list_jobs(self, account_id: int, limit: int = 50):
+        return await self.uow.analysis.list_by_account(account_id, limit)
+
+    async def get_job(self, account_id: int, job_id: int):
+        return await self.uow.analysis.get_by_id(account_id, job_id)
+
+    async def get_overview(self, account_id: int, job_id: int):
+        j = await self.uow.analysis.get_by_id(account_id, job_id)
+        if not j or j.status != JobStatus.DONE:
+            return None
+        return await self.uow.overview.get_by_job(job_id)
+
+    async def get_trends(self, account_id: int, job_id: int):
+        j = await self.uow.analysis.get_by_id(account_id, job_id)
+        if not j:
+            return []
+        return await self.uow.trend.list_by_job(job_id)
+
+    async def get_breakdown(
+        self,
+        account_id: int,
+        job_id: int,
+        group_by: Sequence[str] = BREAKDOWN_DIMS,
+        source_ids: Optional[Sequence[int]] = None,
+        topics: Optional[Sequence[Optional[str]]] = None,
+        day_from: Optional[str] = None,
+        day_to: Optional[str] = None,
+    ) -> Optional[list[dict[str, Any]]]:
+        """
+        Срез куба источник × тема × сутки готового отчёта: фильтр и свёртка по выбранным измерениям.
+        None – задача не найдена или ещё не готова; ValueError – неизвестное измерение.
+        """
+        j = await self.uow.analysis.get_by_id(account_id, job_id)
+        if not j or j.status != JobStatus.DONE:
+            return None
+        cube = await self.uow.overview.get_breakdown(job_id)
+        return query_breakdown(
+            cube or {},
+            group_by=group_by,
+            source_ids=source_ids,
+            topics=topics,
+            day_from=day_from,
+            day_to=day_to,
+        )
+
+    async def cancel_job(self, account_id: int, job_id: int):
+        """
+        Отмена PENDING/RUNNING задачи. Сообщение из очереди воркер пропустит без загрузки модели,
+        выполняющаяся задача остановится между батчами инференса (на heartbeat'е).
+        Возвращает задачу или None; ValueError – задача уже завершена.
+        """
+        job = await self.uow.analysis.get_by_id(account_id, job_id)
+        if not job:
+            return None
+
+        if not await self.uow.analysis.cancel(account_id, job_id):
+            raise ValueError(f"Задача уже завершена ({job.status}).")
+        await self.uow.shards.cancel_by_job(job_id)
+        await self.uow.commit()
+        return await self.uow.analysis.get_by_id(account_id, job_id)
+
+    async def get_progress(self, account_id: int, job_id: int) -> Optional[dict[str, Any]]:
+        """
+        Дешёвый снимок прогресса для polling: status + progress, без scope и отчёта.
+        Для шардированных задач счётчики собираются по таблице шардов.
+        """
+        row = await self.uow.analysis.get_progress(account_id, job_id)
+        if not row:
+            return None
+
+        status, progress = row
+        out: dict[str, Any] = {"job_id": job_id, "status": str(status), **progress}
+
+        if progress.get("sharded"):
+            out.update(await self.uow.shards.summary(job_id))
+            started_at = progress.get("started_at")
+            if started_at and progress.get("stage") == "sharded":
+                elapsed = (datetime.now(timezone.utc) - datetime.fromisoformat(started_at)).total_seconds()
+                rate = out["docs_scored"] / elapsed if elapsed > 0 else 0.0
+                remaining = max(0, int(progress.get("docs_total", 0)) - out["docs_scored"])
+                out["docs_per_sec"] = round(rate, 2)
+                out["eta_seconds"] = round(remaining / rate, 1) if rate > 0 else None
+
+        return out
+
+    async def get_shards(self, account_id: int, job_id: int):
+        j = await self.uow.analysis.get_by_id(account_id, job_id)
+        if not j:
+            return []
+        return await self.uow.shards.list_by_job(job_id)
+
+
+def _batch(items: list, size: int):
     for i in range(0, len(items), size):
         yield items[i : i + size]
 
-
-def _build_daily_count_series(docs) -> list[dict]:
-    buckets = defaultdict(int)
-    for d in docs:
-        dt = d.published_at.astimezone(timezone.utc)
-        day = datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
-        buckets[day] += 1
-    return [{"ts": ts, "value": buckets[ts]} for ts in sorted(buckets)]
\ No newline at end of file
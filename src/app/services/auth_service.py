@@ -1,5 +1,8 @@
+import asyncio
+
 from src.app.core.security import hash_password, verify_password, create_access_token
-from src.app.domain.contracts.uow import UoW
+from src.app.core import auth_cache
+from src.app.domain.contracts.uow import UoW, AsyncUoW
 
 class AuthService:
     def __init__(self, uow: UoW):
@@ -43,7 +46,7 @@ class AuthService:
             # Возвращаем токен
             return create_access_token(
                 subject=str(user.id),
-                extra={"account_id": account_id},
+                extra={"account_id": account_id, "role": "owner"},
             )
 
         except Exception:
@@ -59,9 +62,78 @@ class AuthService:
         if not link:
             raise ValueError("У пользователя нет аккаунта.")
 
-        account_id, _role = link
+        account_id, role = link
+
+        return create_access_token(
+            subject=str(creds.user_id),
+            extra={"account_id": account_id, "role": role},
+        )
+
+
+    def deactivate_user(self, user_id: int) -> None:
+        """
+        Деактивирует пользователя и сбрасывает его закэшированный auth-контекст.
+        """
+        self.uow.users.set_active(user_id, False)
+        self.uow.commit()
+        auth_cache.invalidate_user(user_id)
+
+
+class AsyncAuthService:
+    """
+    Async-версия AuthService для request path.
+    bcrypt – CPU-bound, поэтому хеширование/проверка пароля уходят в поток.
+    """
+    def __init__(self, uow: AsyncUoW):
+        self.uow = uow
+
+    async def register(self, email: str, password: str, account_name: str) -> str:
+        try:
+            if await self.uow.users.get_by_email(email):
+                raise ValueError("Пользователь уже существует.")
+
+            if len(password.encode("utf-8")) > 72:
+                raise ValueError("Пароль должен быть не длиннее 72 байт.")
+
+            password_hash = await asyncio.to_thread(hash_password, password)
+            user = await self.uow.users.create(email=email, password_hash=password_hash)
+
+            account_id = await self.uow.accounts.create(name=account_name)
+            await self.uow.accounts.add_user(account_id=account_id, user_id=user.id, role="owner")
+            await self.uow.subscriptions.ensure_free_active(account_id)
+            await self.uow.account_sources.grant_all_global(account_id)
+
+            await self.uow.commit()
+
+            return create_access_token(
+                subject=str(user.id),
+                extra={"account_id": account_id, "role": "owner"},
+            )
+
+        except Exception:
+            await self.uow.rollback()
+            raise
+
+    async def login(self, email: str, password: str) -> str:
+        creds = await self.uow.users.get_auth_credentials(email)
+        if not creds or not await asyncio.to_thread(verify_password, password, creds.password_hash):
+            raise ValueError("Неверные учетные данные.")
+
+        link = await self.uow.accounts.get_user_link(creds.user_id)
+        if not link:
+            raise ValueError("У пользователя нет аккаунта.")
+
+        account_id, role = link
 
         return create_access_token(
             subject=str(creds.user_id),
-            extra={"account_id": account_id},
-        )
\ No newline at end of file
+            extra={"account_id": account_id, "role": role},
+        )
+
+    async def deactivate_user(self, user_id: int) -> None:
+        """
+        Деактивирует пользователя и сбрасывает его закэшированный auth-контекст.
+        """
+        await self.uow.users.set_active(user_id, False)
+        await self.uow.commit()
+        auth_cache.invalidate_user(user_id)
@@ -0,0 +1,111 @@
+import bisect
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from src.app.domain.entities.document import Document
+from src.app.domain.entities.prediction import Prediction
+from src.app.domain.services.aggregation import SENTIMENT_KEYS, DayCells
+
+
+def _cell_key(key: tuple[int, datetime]) -> str:
+    return f"{key[0]}|{key[1].isoformat()}"
+
+
+def _parse_cell_key(raw: str) -> tuple[int, datetime]:
+    sid, day = raw.split("|", 1)
+    return int(sid), datetime.fromisoformat(day)
+
+
+class ScoringCheckpoint:
+    """
+    Чекпоинт инференса задачи. Документы скорятся по возрастанию id; после каждого батча
+    запоминаются последний id, счётчики тональности (в т.ч. по темам) и кучи самых негативных документов
+    по (источник, сутки).
+    Запись (sink) – не чаще раза в interval секунд, вместе с ещё не сохранёнными предсказаниями.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[dict[str, Any], list[Prediction]], None],
+        interval: float = 30.0,
+        state: Optional[dict[str, Any]] = None,
+    ):
+        state = state or {}
+        self.sink = sink
+        self.interval = interval
+
+        self.last_doc_id: Optional[int] = state.get("last_doc_id")
+        self.scored = int(state.get("scored", 0))
+        self.sentiment: dict[str, dict[str, int]] = state.get("sentiment") or {}
+        self.top_docs: dict[str, list] = state.get("top_docs") or {}
+        self.breakdown: dict[str, list] = state.get("breakdown") or {}
+
+        self._last_flush = time.monotonic()
+
+    def resume(self, docs: list[Document], cells: DayCells) -> list[Document]:
+        """
+        docs – отсортированы по id. Переносит сохранённые счётчики в cells и возвращает
+        ещё не посчитанные документы. Если набор документов изменился – считаем заново.
+        """
+        if self.last_doc_id is None:
+            return docs
+
+        done = bisect.bisect_right([d.id for d in docs], self.last_doc_id)
+        restored = {_parse_cell_key(k): v for k, v in self.sentiment.items()}
+        if done != self.scored or any(k not in cells for k in restored):
+            self.last_doc_id, self.scored, self.sentiment, self.top_docs, self.breakdown = None, 0, {}, {}, {}
+            return docs
+
+        for key, counts in restored.items():
+            for label, n in counts.items():
+                cells[key].sentiment_counts[label] = cells[key].sentiment_counts.get(label, 0) + int(n)
+        for raw, rows in self.breakdown.items():
+            sid, day = _parse_cell_key(raw)
+            for topic, *counts in rows:
+                for label, n in zip(SENTIMENT_KEYS, counts):
+                    cells[(sid, day)].add_breakdown((sid, topic, day), label=label, n=int(n))
+        for raw, items in self.top_docs.items():
+            key = _parse_cell_key(raw)
+            if key in cells:
+                cells[key].top_docs[key[1]] = sorted((float(p), int(doc_id)) for p, doc_id in items)
+        return docs[done:]
+
+    def record(self, batch: list[Document], cells: DayCells, predictions: list[Prediction]) -> None:
+        self.last_doc_id = batch[-1].id
+        self.scored += len(batch)
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush(cells, predictions)
+
+    def flush(self, cells: DayCells, predictions: list[Prediction]) -> None:
+        """
+        Пишет состояние и накопленные предсказания; список predictions очищается –
+        в итоговую запись результата попадут только предсказания после чекпоинта.
+        """
+        self._last_flush = time.monotonic()
+        self.sentiment = {
+            _cell_key(k): dict(c.sentiment_counts)
+            for k, c in cells.items()
+            if any(c.sentiment_counts.values())
+        }
+        self.breakdown = {
+            _cell_key(k): [[topic, *vals[1:]] for (_, topic, _), vals in c.breakdown.items() if any(vals[1:])]
+            for k, c in cells.items()
+            if any(c.sentiment_counts.values())
+        }
+        self.top_docs = {
+            _cell_key(k): [list(x) for x in c.top_docs.get(k[1], [])]
+            for k, c in cells.items()
+            if c.top_docs.get(k[1])
+        }
+        self.sink(
+            {
+                "last_doc_id": self.last_doc_id,
+                "scored": self.scored,
+                "sentiment": self.sentiment,
+                "top_docs": self.top_docs,
+                "breakdown": self.breakdown,
+            },
+            list(predictions),
+        )
+        predictions.clear()
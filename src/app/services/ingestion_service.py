@@ -0,0 +1,138 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from src.app.core.metrics import INGESTION_DOCS, INGESTION_ERRORS
+from src.app.domain.contracts.ingestion import SourceAdapter
+from src.app.domain.contracts.uow import UoW
+from src.app.domain.entities.ingestion_job import IngestionJob
+from src.app.domain.entities.source import Source
+from src.app.domain.enums import JobStatus
+
+
+@dataclass
+class IngestionRun:
+    source_id: int
+    fetched: int = 0
+    inserted: int = 0
+    # упёрлись в INGESTION_MAX_DOCS_PER_RUN – источник снова к запуску на следующем тике
+    has_more: bool = False
+    error: Optional[str] = None
+
+
+class IngestionService:
+    """
+    Инкрементальная загрузка INCREMENTAL/STREAM-источников через адаптеры (source.config["adapter"]).
+    Курсор источника – строка ingestion_jobs (kind INCREMENTAL): watermark адаптера в stats и время
+    следующего опроса next_run_at. Источник берётся под SKIP LOCKED, документы пишутся батчами
+    с дедупом по url_hash, watermark сдвигается в той же транзакции – после сбоя порция
+    перечитывается с прежнего места. Новые документы STREAM-источников дальше подхватывает
+    онлайн-детектор трендов.
+    """
+
+    def __init__(self, uow: UoW, adapters: dict[str, SourceAdapter]):
+        self.uow = uow
+        self.adapters = adapters
+        # документов на один запрос к адаптеру и один multi-row INSERT
+        self.batch_docs = int(os.getenv("INGESTION_BATCH_DOCS", "500"))
+        # документов источника за один запуск (одна транзакция) – ограничение нагрузки на БД
+        self.max_docs_per_run = int(os.getenv("INGESTION_MAX_DOCS_PER_RUN", "5000"))
+        # период опроса по умолчанию (source.config["poll_seconds"] переопределяет)
+        self.poll_seconds = float(os.getenv("INGESTION_POLL_SECONDS", "60"))
+        # после ошибок период удваивается, но не больше
+        self.max_backoff_seconds = float(os.getenv("INGESTION_MAX_BACKOFF_SECONDS", "3600"))
+
+    def process(self, now: Optional[datetime] = None, limit: int = 20) -> list[IngestionRun]:
+        """
+        Один тик: до limit источников, каждому пора по next_run_at; источник – своя транзакция.
+        """
+        now = now or datetime.now(timezone.utc)
+        self.uow.ingestion.ensure_cursors(now)
+        self.uow.commit()
+
+        runs: list[IngestionRun] = []
+        seen: list[int] = []
+        while len(runs) < limit:
+            claimed = self.uow.ingestion.claim_due(now, exclude=seen)
+            if claimed is None:
+                break
+            job, source = claimed
+            seen.append(job.id)
+            runs.append(self._run(job, source, now))
+        return runs
+
+    def _run(self, job: IngestionJob, source: Source, now: datetime) -> IngestionRun:
+        run = IngestionRun(source_id=source.id)
+        adapter_name = str(source.config.get("adapter"))
+        poll = float(source.config.get("poll_seconds", self.poll_seconds))
+        watermark = job.stats.get("watermark")
+        started = time.perf_counter()
+
+        try:
+            adapter = self.adapters.get(adapter_name)
+            if adapter is None:
+                raise ValueError(f"unknown source adapter: {adapter_name}")
+
+            while run.fetched < self.max_docs_per_run:
+                batch = adapter.fetch(source, watermark, min(self.batch_docs, self.max_docs_per_run - run.fetched))
+                if batch.docs:
+                    run.inserted += self.uow.documents.insert_many(source.id, batch.docs)
+                run.fetched += len(batch.docs)
+                watermark = batch.watermark
+                run.has_more = batch.has_more
+                if not batch.has_more or not batch.docs:
+                    break
+
+            stats = {
+                **job.stats,
+                "watermark": watermark,
+                "runs": int(job.stats.get("runs", 0)) + 1,
+                "fetched": int(job.stats.get("fetched", 0)) + run.fetched,
+                "inserted": int(job.stats.get("inserted", 0)) + run.inserted,
+                "failures": 0,
+                "last_run_at": now.isoformat(),
+                "last_fetched": run.fetched,
+                "last_inserted": run.inserted,
+                "last_seconds": round(time.perf_counter() - started, 3),
+            }
+            next_run_at = now if run.has_more else now + timedelta(seconds=poll)
+            self.uow.ingestion.save_run(job.id, JobStatus.DONE, stats, next_run_at)
+            self.uow.commit()
+
+        except Exception as exc:
+            # вставленные батчи запуска откатываются вместе с watermark
+            self.uow.rollback()
+            run.error = str(exc)
+            run.fetched = run.inserted = 0
+            self._save_error(job.id, poll, now, run.error)
+            INGESTION_ERRORS.inc(adapter=adapter_name)
+            logging.exception("ingestion source %s (%s) failed: %s", source.id, adapter_name, exc)
+            return run
+
+        INGESTION_DOCS.inc(run.fetched, adapter=adapter_name, result="fetched")
+        INGESTION_DOCS.inc(run.inserted, adapter=adapter_name, result="inserted")
+        if run.fetched:
+            logging.info(
+                "ingestion source %s (%s): fetched %s, inserted %s%s",
+                source.id, adapter_name, run.fetched, run.inserted, ", more pending" if run.has_more else "",
+            )
+        return run
+
+    def _save_error(self, job_id: int, poll: float, now: datetime, error: str) -> None:
+        # после rollback блокировка курсора снята – перечитываем его под FOR UPDATE
+        job = self.uow.ingestion.get_for_update(job_id)
+        if job is None:
+            return
+        failures = int(job.stats.get("failures", 0)) + 1
+        delay = min(poll * 2 ** (failures - 1), self.max_backoff_seconds)
+        self.uow.ingestion.save_run(
+            job_id,
+            JobStatus.ERROR,
+            {**job.stats, "failures": failures, "last_run_at": now.isoformat()},
+            now + timedelta(seconds=delay),
+            error=error,
+        )
+        self.uow.commit()
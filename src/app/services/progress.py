@@ -0,0 +1,90 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from src.app.core.metrics import JOB_STAGE_SECONDS, JOBS_FINISHED
+
+
+class ProgressTracker:
+    """
+    Прогресс выполнения задачи: счётчики документов, стадия, скорость и ETA.
+    Запись в БД (sink) – не чаще одного раза в interval секунд; смена стадии пишется сразу.
+    """
+
+    def __init__(self, sink: Callable[[dict[str, Any]], None], interval: float = 2.0):
+        self.sink = sink
+        self.interval = interval
+
+        self.stage = "queued"
+        self.docs_total = 0
+        self.docs_fetched = 0
+        self.docs_scored = 0
+
+        self.started_at = datetime.now(timezone.utc)
+        self._scoring_started: float | None = None
+        # документы, посчитанные до перезапуска (чекпоинт), – не входят в скорость
+        self._resumed = 0
+        self._last_flush = 0.0
+        self._stage_started = time.monotonic()
+
+    def set_stage(self, stage: str, **counters: int) -> None:
+        self._observe_stage(stage)
+        self.stage = stage
+        for k, v in counters.items():
+            setattr(self, k, int(v))
+        if stage == "scoring" and self._scoring_started is None:
+            self._scoring_started = time.monotonic()
+        self.flush()
+
+    def add_scored(self, n: int) -> None:
+        self.docs_scored += n
+        if time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def add_resumed(self, n: int) -> None:
+        self.docs_scored += n
+        self._resumed += n
+        self.flush()
+
+    def snapshot(self) -> dict[str, Any]:
+        rate = 0.0
+        if self._scoring_started is not None:
+            elapsed = time.monotonic() - self._scoring_started
+            if elapsed > 0:
+                rate = (self.docs_scored - self._resumed) / elapsed
+
+        remaining = max(0, self.docs_total - self.docs_scored)
+        eta = remaining / rate if rate > 0 else None
+
+        return {
+            "stage": self.stage,
+            "docs_total": self.docs_total,
+            "docs_fetched": self.docs_fetched,
+            "docs_scored": self.docs_scored,
+            "docs_per_sec": round(rate, 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "started_at": self.started_at.isoformat(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def final(self, stage: str) -> dict[str, Any]:
+        """
+        Итоговый снимок – вызывающий пишет его в одной транзакции со сменой статуса задачи.
+        """
+        self._observe_stage(stage)
+        JOBS_FINISHED.inc(stage=stage)
+        self.stage = stage
+        return self.snapshot()
+
+    def _observe_stage(self, next_stage: str) -> None:
+        # длительность завершившейся стадии – в метрики; "queued" – время до старта трекера, не считаем
+        if next_stage == self.stage:
+            return
+        now = time.monotonic()
+        if self.stage != "queued":
+            JOB_STAGE_SECONDS.observe(now - self._stage_started, stage=self.stage)
+        self._stage_started = now
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        self.sink(self.snapshot())
@@ -1,5 +1,6 @@
 from typing import Any, Optional
-from src.app.domain.contracts.uow import UoW
+from src.app.domain.contracts.uow import UoW, AsyncUoW
+from src.app.domain.entities.trend_event import TrendEvent
 
 
 class SourcesService:
@@ -18,4 +19,32 @@ class SourcesService:
             return None
 
         st = self.uow.documents.stats_by_source(account_id, source_id)
-        return {"source_id": source_id, **st}
\ No newline at end of file
+        return {"source_id": source_id, **st}
+
+
+class AsyncSourcesService:
+    def __init__(self, uow: AsyncUoW):
+        self.uow = uow
+
+    async def list_sources(self, account_id: int):
+        return await self.uow.sources.list_by_account(account_id)
+
+    async def get_source(self, account_id: int, source_id: int):
+        return await self.uow.sources.get_by_id(account_id, source_id)
+
+    async def source_stats(self, account_id: int, source_id: int) -> Optional[dict[str, Any]]:
+        s = await self.uow.sources.get_by_id(account_id, source_id)
+        if not s:
+            return None
+
+        st = await self.uow.documents.stats_by_source(account_id, source_id)
+        return {"source_id": source_id, **st}
+
+    async def live_trends(self, account_id: int, source_id: int, limit: int = 100) -> Optional[list[TrendEvent]]:
+        """
+        События онлайн-детектора трендов (STREAM-источники), новые первыми.
+        """
+        s = await self.uow.sources.get_by_id(account_id, source_id)
+        if not s:
+            return None
+        return await self.uow.trend.list_by_source(source_id, limit)
@@ -0,0 +1,101 @@
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from src.app.core.metrics import STREAM_DOCS, STREAM_TREND_EVENTS
+from src.app.domain.contracts.uow import UoW
+from src.app.domain.entities.trend_event import TrendEvent
+from src.app.domain.services.stream_trends import StreamTrendDetector, StreamTrendState
+
+
+class StreamTrendService:
+    """
+    Онлайн-детектор трендов для STREAM-источников: новые документы (после watermark id и
+    в незаполненных промежутках id ниже него – id, закоммиченные позже больших, не теряются)
+    прогоняются через StreamTrendDetector, события пишутся в trend_events (source_id, без задачи),
+    состояние детектора – в stream_trend_states в той же транзакции (переживает рестарт воркера).
+    """
+
+    def __init__(self, uow: UoW, detector: Optional[StreamTrendDetector] = None):
+        self.uow = uow
+        # корзина времени (по умолчанию час) и параметры EWMA
+        self.bucket_seconds = int(os.getenv("STREAM_TRENDS_BUCKET_SECONDS", "3600"))
+        self.detector = detector or StreamTrendDetector(
+            alpha=float(os.getenv("STREAM_TRENDS_ALPHA", "0.1")),
+            z_threshold=float(os.getenv("STREAM_TRENDS_Z", "3.0")),
+            min_buckets=int(os.getenv("STREAM_TRENDS_MIN_BUCKETS", "24")),
+        )
+        # сколько корзин истории берётся для прогрева нового источника
+        self.warmup_buckets = int(os.getenv("STREAM_TRENDS_WARMUP_BUCKETS", "168"))
+        self.batch_docs = int(os.getenv("STREAM_TRENDS_BATCH_DOCS", "10000"))
+        # дольше этого транзакция, вставляющая документы, открытой не держится
+        self.overlap = timedelta(seconds=int(os.getenv("STREAM_TRENDS_OVERLAP_SECONDS", "300")))
+        # предел числа промежутков в состоянии (id источника перемежаются id других источников)
+        self.max_gaps = int(os.getenv("STREAM_TRENDS_MAX_GAPS", "1000"))
+
+    def process(self, now: Optional[datetime] = None, limit: int = 50) -> list[TrendEvent]:
+        now = now or datetime.now(timezone.utc)
+        events: list[TrendEvent] = []
+
+        for source_id, raw in self.uow.stream_trends.lock_states(limit):
+            state = StreamTrendState.from_dict(raw) if raw else self._bootstrap(source_id, now)
+            signals = []
+
+            if state.gaps:
+                late = self.uow.documents.stream_in_ranges(source_id, state.gap_ranges())
+                for doc_id, published_at in late:
+                    signals += self.detector.observe(state, published_at)
+                    state.fill(doc_id)
+                STREAM_DOCS.inc(len(late))
+
+            while True:
+                docs = self.uow.documents.stream_after_id(source_id, state.last_doc_id, self.batch_docs)
+                for doc_id, published_at in docs:
+                    signals += self.detector.observe(state, published_at)
+                    state.advance_to(doc_id, now)
+                STREAM_DOCS.inc(len(docs))
+                if len(docs) < self.batch_docs:
+                    break
+            state.expire_gaps(now - self.overlap, self.max_gaps)
+
+            # тишина источника тоже сигнал: закрываем корзины до текущей
+            signals += self.detector.advance(state, now)
+
+            for s in signals:
+                STREAM_TREND_EVENTS.inc(kind=s.kind)
+                logging.warning(
+                    "stream trend: source %s %s at %s: %s docs vs baseline %.1f (z=%.1f)",
+                    source_id, s.kind, s.ts.isoformat(), int(s.value), s.baseline, s.z,
+                )
+            events += [
+                TrendEvent(job_id=None, source_id=source_id, ts=s.ts, kind=s.kind, value=s.value, baseline=s.baseline, z=s.z)
+                for s in signals
+            ]
+            self.uow.stream_trends.save_state(source_id, state.to_dict())
+
+        if events:
+            self.uow.stream_trends.save_events(events)
+        self.uow.commit()
+        return events
+
+    def _bootstrap(self, source_id: int, now: datetime) -> StreamTrendState:
+        """
+        Новый источник: EWMA прогревается по счётчикам последних корзин из истории,
+        watermark – текущий max id (старые документы заново не разбираются).
+        """
+        state = StreamTrendState(bucket_seconds=self.bucket_seconds)
+        state.last_doc_id = self.uow.documents.max_id(source_id)
+
+        current = self.detector.bucket_of(state, now)
+        step = timedelta(seconds=self.bucket_seconds)
+        start = current - step * self.warmup_buckets
+        counts = self.uow.documents.bucket_counts(source_id, self.bucket_seconds, start, current + step)
+
+        history = [counts.get(start + step * i, 0) for i in range(self.warmup_buckets)]
+        # до первого документа источника нулевые корзины – не история, а её отсутствие
+        first = next((i for i, n in enumerate(history) if n), len(history))
+        self.detector.warm_up(state, history[first:])
+        state.bucket_start = current
+        state.count = counts.get(current, 0)
+        return state
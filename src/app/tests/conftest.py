@@ -3,11 +3,15 @@ import uuid
 import pytest
 from datetime import datetime, timezone, timedelta
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import NullPool
 
 from src.app.main import app as fastapi_app
-from src.app.api.deps import get_db
+from src.app.api.deps import get_db, get_db_ro
+from src.app.infra.db import make_async_engine
+from src.app.core import auth_cache
+from src.app.core.metrics import instrument_engine
 
 from src.app.infra.models import SourceORM, DocumentORM, AccountSourceORM
 from src.app.core.security import decode_token
@@ -24,12 +28,10 @@ def _test_env():
 def engine():
     test_db_url = os.getenv("DATABASE_URL_TEST")
     assert test_db_url, "Set DATABASE_URL_TEST env var"
-    return create_engine(test_db_url, future=True)
-
-
-@pytest.fixture(scope="session")
-def session_testing(engine):
-    return sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+    # NullPool: соединения не переживают event loop конкретного теста
+    eng = make_async_engine(test_db_url, poolclass=NullPool)
+    instrument_engine(eng.sync_engine, "test")
+    return eng
 
 
 @pytest.fixture(scope="session")
@@ -38,38 +40,41 @@ def app():
 
 
 @pytest.fixture
-def db_session(engine, session_testing):
-    connection = engine.connect()
-    transaction = connection.begin()
-
-    session = session_testing(bind=connection)
-    session.begin_nested()
-
-    @event.listens_for(session, "after_transaction_end")
-    def _restart_savepoint(sess, trans):
-        if trans.nested and not trans._parent.nested:
-            sess.begin_nested()
-
-    try:
-        yield session
-    finally:
-        session.close()
-        transaction.rollback()
-        connection.close()
+async def db_session(engine):
+    """
+    AsyncSession внутри внешней транзакции: commit() в коде приложения
+    фиксирует только savepoint, в конце теста всё откатывается.
+    Синхронный код (воркер) гоняется через db_session.run_sync(...).
+    """
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
 
 
 @pytest.fixture
 async def client(app, db_session):
-    def _override_get_db():
+    async def _override_get_db():
         yield db_session
 
+    # primary и реплика в тестах – одна и та же локальная БД (и одна транзакция)
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_db_ro] = _override_get_db
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
 
     app.dependency_overrides.clear()
+    auth_cache.clear()
 
 @pytest.fixture
 def random_email():
@@ -107,10 +112,8 @@ async def register_user(client, db_session, random_email):
         user_id = int(payload["sub"])
 
         au = (
-            db_session.query(AccountUserORM)
-            .filter(AccountUserORM.user_id == user_id)
-            .first()
-        )
+            await db_session.execute(select(AccountUserORM).where(AccountUserORM.user_id == user_id))
+        ).scalars().first()
         assert au is not None, "AccountUser not found for created user"
         return token, int(au.account_id)
 
@@ -134,8 +137,8 @@ async def seed_source_and_docs(db_session, register_user):
         config={},
     )
     db_session.add(src)
-    db_session.commit()
-    db_session.refresh(src)
+    await db_session.commit()
+    await db_session.refresh(src)
 
     link = AccountSourceORM(
         account_id=account_id,
@@ -143,7 +146,7 @@ async def seed_source_and_docs(db_session, register_user):
         is_enabled=True,
     )
     db_session.add(link)
-    db_session.commit()
+    await db_session.commit()
 
     now = datetime(2015, 12, 31, 12, 0, 0, tzinfo=timezone.utc)
     docs = []
@@ -163,6 +166,6 @@ async def seed_source_and_docs(db_session, register_user):
         )
 
     db_session.add_all(docs)
-    db_session.commit()
+    await db_session.commit()
 
     return token, int(src.id), int(account_id), now
\ No newline at end of file
@@ -76,10 +76,14 @@ async def test_job_happy_path_run_and_overview(client, seed_source_and_docs, aut
     from src.app.infra.uow import SqlAlchemyUoW
     from src.app.services.analysis_service import AnalysisService
 
-    uow = SqlAlchemyUoW(db_session)
-    svc = AnalysisService(uow)
-    svc.run_job(job_id)
-    uow.commit()
+    # воркер синхронный – выполняем его в той же тестовой транзакции
+    def _run_worker(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        svc.run_job(job_id)
+        uow.commit()
+
+    await db_session.run_sync(_run_worker)
 
     r2 = await client.get(f"/api/analysis/jobs/{job_id}", headers=auth_headers(token))
     assert r2.status_code == 200, r2.text
@@ -91,4 +95,882 @@ async def test_job_happy_path_run_and_overview(client, seed_source_and_docs, aut
         assert r3.status_code == 200, r3.text
         rep = r3.json()
         assert "total_documents" in rep
-        assert rep["total_documents"] >= 0
\ No newline at end of file
+        assert rep["total_documents"] >= 0
+
+
+@pytest.mark.anyio
+async def test_job_progress_reports_done_and_counts(
+    client, seed_source_and_docs, auth_headers, db_session, monkeypatch
+):
+    async def _noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr("src.app.api.routers.analysis.enqueue_analysis_job", _noop)
+    # прогресс пишется на каждом шаге – промежуточные стадии видны
+    monkeypatch.setenv("ANALYSIS_PROGRESS_INTERVAL_SECONDS", "0")
+
+    token, source_id, _, seed_now = seed_source_and_docs
+    r = await client.post(
+        "/api/analysis/jobs",
+        headers=auth_headers(token),
+        json={
+            "model": {"name": "rubert-tiny2", "version": "v1"},
+            "scope": {
+                "source_ids": [source_id],
+                "date_range": {
+                    "start": (seed_now - timedelta(days=10)).isoformat(),
+                    "end": (seed_now + timedelta(days=1)).isoformat(),
+                },
+                "query": None,
+            },
+            "params": {},
+        },
+    )
+    assert r.status_code in (200, 201), r.text
+    job_id = int(r.json()["id"])
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+
+    written = []
+
+    def _run_worker(session):
+        uow = SqlAlchemyUoW(session)
+        set_progress = uow.analysis.set_progress
+
+        def _record(job_id, progress):
+            written.append(dict(progress))
+            set_progress(job_id, progress)
+
+        uow.analysis.set_progress = _record
+        AnalysisService(uow).run_job(job_id)
+        uow.commit()
+
+    await db_session.run_sync(_run_worker)
+
+    scoring = [p for p in written if p["stage"] == "scoring"]
+    assert [p["stage"] for p in written][0] == "loading"
+    assert scoring and all(p["docs_total"] == 5 for p in scoring)
+    assert scoring[-1]["docs_scored"] == 5
+
+    r = await client.get(f"/api/analysis/jobs/{job_id}/progress", headers=auth_headers(token))
+    assert r.status_code == 200, r.text
+    p = r.json()
+    assert p["stage"] == "done"
+    assert p["docs_scored"] == p["docs_total"] == p["docs_fetched"] == 5
+
+@pytest.mark.anyio
+async def test_sharded_job_matches_single_run(client, seed_source_and_docs, auth_headers, db_session):
+    token, source_id, account_id, seed_now = seed_source_and_docs
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+    from src.app.domain.enums import JobStatus
+
+    scope = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=seed_now - timedelta(days=10), end=seed_now),
+    )
+
+    def _run(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        svc.shard_min_docs, svc.shard_target_docs, svc.shard_max = 1, 2, 8
+        svc.incremental_enabled = False  # иначе сутки переиспользуются из single
+
+        single = svc.create_job(account_id, scope)
+        svc.run_job(single.id)
+
+        sharded = svc.create_job(account_id, scope)
+        shard_ids = svc.start_job(sharded.id).shard_ids
+        assert len(shard_ids) >= 2
+        # порядок завершения шардов не важен – reduce делает последний
+        for sid in reversed(shard_ids):
+            svc.run_shard(sharded.id, sid)
+        uow.commit()
+
+        return single.id, sharded.id
+
+    single_id, sharded_id = await db_session.run_sync(_run)
+
+    r = await client.get(f"/api/analysis/jobs/{sharded_id}/shards", headers=auth_headers(token))
+    assert r.status_code == 200, r.text
+    shards = r.json()
+    assert all(s["status"] == JobStatus.DONE for s in shards)
+    assert sum(s["total_documents"] for s in shards) == 5
+
+    a = (await client.get(f"/api/analysis/jobs/{single_id}/overview", headers=auth_headers(token))).json()
+    b = (await client.get(f"/api/analysis/jobs/{sharded_id}/overview", headers=auth_headers(token))).json()
+    assert b["total_documents"] == a["total_documents"] == 5
+    assert b["sentiment_share"] == a["sentiment_share"]
+    assert b["metrics"]["daily_series"] == a["metrics"]["daily_series"]
+    assert b["metrics"]["shards"] == len(shards)
+
+    p = (await client.get(f"/api/analysis/jobs/{sharded_id}/progress", headers=auth_headers(token))).json()
+    assert p["shards_done"] == p["shards_total"] == len(shards)
+    assert p["docs_scored"] == 5
+
+
+@pytest.mark.anyio
+async def test_identical_scope_reuses_done_result_until_data_changes(
+    client, seed_source_and_docs, auth_headers, db_session, monkeypatch
+):
+    published = []
+
+    async def _capture(payload, **kwargs):
+        published.append(payload)
+
+    monkeypatch.setattr("src.app.api.routers.analysis.enqueue_analysis_job", _capture)
+
+    token, source_id, _, seed_now = seed_source_and_docs
+    body = {
+        "model": {"name": "rubert-tiny2", "version": "v1"},
+        "scope": {
+            "source_ids": [source_id],
+            "date_range": {
+                "start": (seed_now - timedelta(days=10)).isoformat(),
+                "end": (seed_now + timedelta(days=1)).isoformat(),
+            },
+            "query": None,
+        },
+        "params": {},
+    }
+
+    first = (await client.post("/api/analysis/jobs", headers=auth_headers(token), json=body)).json()
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+
+    def _run_worker(session):
+        uow = SqlAlchemyUoW(session)
+        AnalysisService(uow).run_job(first["id"])
+        uow.commit()
+
+    await db_session.run_sync(_run_worker)
+
+    # тот же scope (другой порядок/дубли source_ids) – мгновенно DONE, без публикации
+    body["scope"]["source_ids"] = [source_id, source_id]
+    r = await client.post("/api/analysis/jobs", headers=auth_headers(token), json=body)
+    assert r.status_code == 201, r.text
+    second = r.json()
+    assert second["status"] == "DONE"
+    assert len(published) == 1
+
+    rep = (await client.get(f"/api/analysis/jobs/{second['id']}/overview", headers=auth_headers(token))).json()
+    assert rep["metrics"]["reused_from_job_id"] == first["id"]
+    assert rep["total_documents"] == 5
+
+    # в диапазон пришёл новый документ – результат устарел
+    from src.app.infra.models import DocumentORM
+    db_session.add(
+        DocumentORM(
+            source_id=source_id,
+            published_at=seed_now - timedelta(hours=1),
+            title="late",
+            text="late doc",
+            url_hash=f"late-{source_id}",
+        )
+    )
+    await db_session.commit()
+
+    third = (await client.post("/api/analysis/jobs", headers=auth_headers(token), json=body)).json()
+    assert third["status"] == "PENDING"
+    assert len(published) == 2
+
+
+@pytest.mark.anyio
+async def test_extended_range_recomputes_only_new_days(seed_source_and_docs, db_session):
+    _, source_id, account_id, seed_now = seed_source_and_docs
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+
+    # документы – по одному в сутки, seed_now - 1..5 дней (12:00 UTC)
+    midnight = seed_now.replace(hour=0)
+    base = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=midnight - timedelta(days=10), end=midnight - timedelta(days=2, microseconds=1)),
+    )
+    extended = AnalysisScope(source_ids=[source_id], date_range=DateRange(start=base.date_range.start, end=seed_now))
+
+    def _run(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+
+        first = svc.create_job(account_id, base)
+        svc.run_job(first.id)
+        second = svc.create_job(account_id, extended)
+        svc.run_job(second.id)
+        uow.commit()
+
+        return (
+            uow.overview.get_by_job(first.id),
+            uow.overview.get_by_job(second.id),
+            uow.analysis.get_by_id_any(second.id).progress,
+        )
+
+    first, second, progress = await db_session.run_sync(_run)
+
+    assert first.total_documents == 3
+    assert second.total_documents == 5
+    assert second.metrics["days_reused"] == 3
+    assert progress["docs_total"] == 2  # инференс только по новым суткам
+    assert len(second.metrics["daily_series"]) == 5
+    assert second.metrics["data_watermark"]["docs"] == 5
+
+
+@pytest.mark.anyio
+async def test_account_running_limit_defers_job(seed_source_and_docs, db_session):
+    _, source_id, account_id, seed_now = seed_source_and_docs
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+    from src.app.domain.enums import JobStatus
+
+    scope = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=seed_now - timedelta(days=10), end=seed_now),
+    )
+
+    def _run(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        svc.max_running_per_account = 1
+
+        busy = svc.create_job(account_id, scope)
+        uow.analysis.set_status(busy.id, JobStatus.RUNNING)
+        uow.commit()
+
+        job = svc.create_job(account_id, scope)
+        assert (job.size_class, job.priority) == ("small", 9)
+
+        # у аккаунта уже есть RUNNING задача – откладываем, статус не меняется
+        assert svc.start_job(job.id).deferred
+        assert uow.analysis.get_by_id_any(job.id).status == JobStatus.PENDING
+
+        uow.analysis.set_status(busy.id, JobStatus.DONE)
+        uow.commit()
+
+        # под блокировкой слота аккаунта – только count_running и claim, планирование – до неё
+        calls = []
+        for repo, name in ((uow.analysis, "lock_account"), (uow.documents, "daily_counts_by_sources_and_period")):
+            def _traced(*args, _fn=getattr(repo, name), _name=name, **kwargs):
+                calls.append(_name)
+                return _fn(*args, **kwargs)
+            setattr(repo, name, _traced)
+
+        result = svc.start_job(job.id)
+        uow.commit()
+
+        assert not result.deferred
+        assert calls == ["daily_counts_by_sources_and_period", "lock_account"]
+        return uow.analysis.get_by_id_any(job.id).status
+
+    assert await db_session.run_sync(_run) == JobStatus.DONE
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_reclaimed_and_job_resumes(seed_source_and_docs, db_session):
+    _, source_id, account_id, seed_now = seed_source_and_docs
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+    from src.app.services.checkpoint import ScoringCheckpoint
+    from src.app.domain.services.aggregation import PartialAggregate, day_start
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+    from src.app.domain.enums import JobStatus
+
+    scope = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=seed_now - timedelta(days=10), end=seed_now),
+    )
+
+    def _run(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        job = svc.create_job(account_id, scope)
+
+        # воркер взял задачу и умер: lease уже истёк, heartbeat'ов нет
+        assert uow.analysis.claim(job.id, "dead-worker", lease_seconds=-1)
+        uow.commit()
+        assert svc.run_job(job.id) is None
+        assert uow.analysis.get_by_id_any(job.id).status == JobStatus.RUNNING
+
+        assert svc.reap_expired_leases() == [({"job_id": job.id}, job.priority)]
+        svc.run_job(job.id)
+        uow.commit()
+        return uow.analysis.get_by_id_any(job.id)
+
+    job = await db_session.run_sync(_run)
+    assert job.status == JobStatus.DONE
+    assert job.attempts == 2
+    assert job.checkpoint == {}
+
+    # загрузка документов дольше lease: reaper вернул задачу в PENDING – воркер это видит
+    # на heartbeat'е после загрузки и ничего не пишет
+    def _slow_load(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        # другой период – без переиспользования отчёта предыдущей задачи
+        job = svc.create_job(account_id, AnalysisScope(
+            source_ids=[source_id],
+            date_range=DateRange(start=scope.date_range.start, end=seed_now - timedelta(seconds=1)),
+        ))
+        load = uow.documents.list_by_sources_and_period
+
+        def _load(*args, **kwargs):
+            docs = load(*args, **kwargs)
+            assert uow.analysis.renew_lease(job.id, svc.worker_id, -1)
+            uow.commit()
+            assert svc.reap_expired_leases() == [({"job_id": job.id}, job.priority)]
+            return docs
+
+        uow.documents.list_by_sources_and_period = _load
+        svc.run_job(job.id)
+        return uow.analysis.get_by_id_any(job.id).status
+
+    assert await db_session.run_sync(_slow_load) == JobStatus.PENDING
+
+    # чекпоинт: уже посчитанные документы пропускаются, счётчики восстанавливаются
+    class _Doc:
+        def __init__(self, id):
+            self.id = id
+
+    key = (source_id, day_start(seed_now))
+    state = {"last_doc_id": 2, "scored": 2, "sentiment": {f"{source_id}|{key[1].isoformat()}": {"negative": 2}}}
+    cells = {key: PartialAggregate(total=3)}
+    todo = ScoringCheckpoint(lambda *_: None, state=state).resume([_Doc(1), _Doc(2), _Doc(5)], cells)
+    assert [d.id for d in todo] == [5]
+    assert cells[key].sentiment_counts["negative"] == 2
+
+
+@pytest.mark.anyio
+async def test_cancel_job_stops_worker_and_skips_queued(
+    client, seed_source_and_docs, auth_headers, db_session, monkeypatch
+):
+    async def _noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr("src.app.api.routers.analysis.enqueue_analysis_job", _noop)
+
+    token, source_id, _, seed_now = seed_source_and_docs
+    body = {
+        "model": {"name": "rubert-tiny2", "version": "v1"},
+        "scope": {
+            "source_ids": [source_id],
+            "date_range": {
+                "start": (seed_now - timedelta(days=10)).isoformat(),
+                "end": seed_now.isoformat(),
+            },
+            "query": None,
+        },
+        "params": {},
+    }
+
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService, JobCanceledError
+
+    queued = (await client.post("/api/analysis/jobs", headers=auth_headers(token), json=body)).json()
+    running = (await client.post("/api/analysis/jobs", headers=auth_headers(token), json=body)).json()
+
+    svc = None
+
+    def _claim(session):
+        nonlocal svc
+        svc = AnalysisService(SqlAlchemyUoW(session))
+        assert svc.uow.analysis.claim(running["id"], svc.worker_id, svc.lease_seconds)
+        svc.uow.commit()
+
+    await db_session.run_sync(_claim)
+
+    for job in (queued, running):
+        r = await client.post(f"/api/analysis/jobs/{job['id']}/cancel", headers=auth_headers(token))
+        assert r.status_code == 200, r.text
+        assert r.json()["status"] == "CANCELED"
+
+    r = await client.post(f"/api/analysis/jobs/{queued['id']}/cancel", headers=auth_headers(token))
+    assert r.status_code == 409
+
+    def _worker(session):
+        # выполняющаяся задача останавливается на heartbeat'е
+        with pytest.raises(JobCanceledError):
+            svc._renew_job_lease(running["id"])
+        # доставленное сообщение отменённой задачи пропускается
+        result = svc.start_job(queued["id"])
+        assert not result.deferred and not result.shard_ids
+        return svc.uow.analysis.get_by_id_any(queued["id"]).status
+
+    assert await db_session.run_sync(_worker) == "CANCELED"
+    progress = (await client.get(f"/api/analysis/jobs/{running['id']}/progress", headers=auth_headers(token))).json()
+    assert progress["stage"] == "canceled"
+
+
+@pytest.mark.anyio
+async def test_batch_create_reports_per_item_errors(client, seed_source_and_docs, auth_headers, monkeypatch):
+    published = []
+
+    async def _capture(messages):
+        published.extend(messages)
+        return [None] * len(messages)
+
+    monkeypatch.setattr("src.app.api.routers.analysis.enqueue_analysis_jobs", _capture)
+
+    token, source_id, _, seed_now = seed_source_and_docs
+
+    def _item(source_ids, days_ago):
+        return {
+            "model": {"name": "rubert-tiny2", "version": "v1"},
+            "scope": {
+                "source_ids": source_ids,
+                "date_range": {
+                    "start": (seed_now - timedelta(days=days_ago)).isoformat(),
+                    "end": (seed_now - timedelta(days=days_ago - 9)).isoformat(),
+                },
+                "query": None,
+            },
+            "params": {},
+        }
+
+    body = {"jobs": [_item([source_id], 10), _item([987654321], 10), _item([source_id], 400), _item([source_id], 12)]}
+    r = await client.post("/api/analysis/jobs/batch", headers=auth_headers(token), json=body)
+    assert r.status_code == 200, r.text
+
+    data = r.json()
+    assert (data["created"], data["failed"]) == (2, 2)
+    items = data["items"]
+    assert [it["index"] for it in items] == [0, 1, 2, 3]
+    assert items[0]["job"]["status"] == "PENDING" and items[0]["job"]["size_class"] == "small"
+    assert "недоступен" in items[1]["error"]
+    assert "не найдено" in items[2]["error"]
+    assert [m[0]["job_id"] for m in published] == [items[0]["job"]["id"], items[3]["job"]["id"]]
+
+
+@pytest.mark.anyio
+async def test_local_queue_orders_by_priority_and_redelivers_deferred():
+    import asyncio
+    from src.app.infra.local_queue import LocalJobQueue
+
+    q = LocalJobQueue()
+    await q.start()
+    handled = []
+
+    async def _handle(payload):
+        handled.append(payload["job_id"])
+        if payload["job_id"] == 2 and handled.count(2) == 1:
+            await q.defer(payload, priority=9, delay_seconds=0.05)
+
+    # сообщения ставятся до старта консьюмеров – порядок определяется приоритетом
+    await q.publish_many([({"job_id": 1}, 1), ({"job_id": 2}, 9), ({"job_id": 3}, 5)])
+    q.consume(_handle, concurrency=1)
+    await q.join()
+    await asyncio.sleep(0.1)
+    await q.join()
+    await q.stop()
+
+    assert handled == [2, 3, 1, 2]
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_reports_route_template_latency(client, seed_source_and_docs, auth_headers):
+    token, *_ = seed_source_and_docs
+
+    r = await client.get("/api/analysis/jobs/424242", headers=auth_headers(token))
+    assert r.status_code == 404
+
+    r = await client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = r.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    # маршрут – шаблон, а не конкретный id
+    assert 'route="/api/analysis/jobs/{job_id}",status="404"' in body
+    assert "424242" not in body
+    assert 'db_queries_total{engine="test",op="SELECT"}' in body
+
+
+@pytest.mark.anyio
+async def test_sql_profile_reports_queries_and_repeated_shapes(app, client, seed_source_and_docs, auth_headers, caplog):
+    from httpx import AsyncClient, ASGITransport
+    from src.app.core import sql_profile
+
+    assert sql_profile.statement_shape(
+        "SELECT * FROM t WHERE id IN ($1, $2, $3) AND name = 'x'"
+    ) == sql_profile.statement_shape("SELECT *  FROM t WHERE id IN ($1) AND name = 'yy'")
+
+    token, *_ = seed_source_and_docs
+    transport = ASGITransport(app=sql_profile.SqlProfileMiddleware(app))
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        r = await c.get("/api/analysis/jobs", headers=auth_headers(token))
+    assert r.status_code == 200
+    assert int(r.headers["x-db-queries"]) > 0
+    assert r.headers["server-timing"].startswith("db;dur=")
+
+    with sql_profile.profile_queries("n+1", enabled=True) as profile:
+        for i in range(sql_profile.SQL_PROFILE_WARN_REPEATS):
+            sql_profile.record_query(f"SELECT * FROM documents WHERE id = {i}", 0.001)
+    assert profile.repeated() == [("SELECT * FROM documents WHERE id = ?", sql_profile.SQL_PROFILE_WARN_REPEATS)]
+    assert "sql profile n+1" in caplog.text
+
+
+def test_vectorized_trend_detection_matches_reference():
+    import numpy as np
+    from src.app.domain.services.trend_detection import (
+        detect_trends,
+        detect_trends_array,
+        detect_trends_reference,
+    )
+
+    rng = np.random.default_rng(7)
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tss = [t0 + timedelta(hours=h) for h in range(500)]
+
+    counts = rng.poisson(30, size=(3, 500)).astype(float)
+    counts[0, 40:60] = 12          # плоский участок
+    counts[1, 100] = 400           # всплеск
+    fractional = counts[2] * 1e6 + 1e9 + rng.random(500)
+
+    for row, window in ((counts[0], 5), (counts[1], 24), (fractional, 7)):
+        series = [{"ts": ts, "value": v} for ts, v in zip(tss, row)]
+        ref = detect_trends_reference(series, window=window)
+        got = detect_trends(series, window=window)
+        assert [(s.ts, s.kind) for s in got] == [(s.ts, s.kind) for s in ref]
+        assert np.allclose([s.z for s in got], [s.z for s in ref])
+        assert np.allclose([s.baseline for s in got], [s.baseline for s in ref])
+
+    rows = detect_trends_array(counts, tss, window=24)
+    assert rows == [detect_trends_array(r, tss, window=24) for r in counts]
+    assert any(s.ts == tss[100] and s.kind == "spike" for s in rows[1])
+
+    # пропуски (None) не входят в окно, но окно остаётся из соседних точек
+    shares = [0.2, 0.3, 0.25, None, None, 0.22, 0.28, 0.9, None, 0.3]
+    gapped = detect_trends([{"ts": ts, "value": v} for ts, v in zip(tss, shares)], window=5, min_points=5)
+    hist = np.array([0.25, 0.22, 0.28])  # окно точки 7: позиции 2..6 без пропусков
+    assert [(s.ts, s.kind) for s in gapped] == [(tss[7], "spike")]
+    assert np.isclose(gapped[0].baseline, hist.mean())
+    assert np.isclose(gapped[0].z, (0.9 - hist.mean()) / hist.std(ddof=1))
+
+
+@pytest.mark.anyio
+async def test_stream_trend_detector_alerts_on_spike_and_survives_restart(
+    client, seed_source_and_docs, db_session, auth_headers, monkeypatch
+):
+    import uuid
+    from sqlalchemy import text
+    from src.app.infra.models import AccountSourceORM, DocumentORM, SourceORM, StreamTrendStateORM
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.stream_trend_service import StreamTrendService
+
+    token, other_source_id, account_id, _ = seed_source_and_docs
+    src = SourceORM(name=f"stream-{uuid.uuid4().hex[:6]}", source_type="telegram", ingestion_mode="stream", config={})
+    db_session.add(src)
+    await db_session.commit()
+    db_session.add(AccountSourceORM(account_id=account_id, source_id=src.id, is_enabled=True))
+
+    now = datetime(2016, 3, 1, 12, 30, tzinfo=timezone.utc)
+    hour = now.replace(minute=0)
+    seq = iter(range(10**6))
+
+    def _docs(published_at, n):
+        return [
+            DocumentORM(
+                source_id=src.id, published_at=published_at, title="t", text="x",
+                url=f"https://t.me/{src.id}/{k}", url_hash=uuid.uuid4().hex,
+            )
+            for k in (next(seq) for _ in range(n))
+        ]
+
+    # двое суток истории: 4–6 документов в час
+    for h in range(48, 0, -1):
+        db_session.add_all(_docs(hour - timedelta(hours=h), 4 + h % 3))
+    await db_session.commit()
+
+    def _process(session, at):
+        return StreamTrendService(SqlAlchemyUoW(session)).process(now=at)
+
+    # первый проход: прогрев по истории, событий нет
+    assert await db_session.run_sync(_process, now) == []
+
+    # id, выданный транзакции загрузки, которая закоммитится позже следующих документов
+    reserved = (await db_session.execute(text("select nextval(pg_get_serial_sequence('documents', 'id'))"))).scalar()
+
+    # всплеск в текущем часе – событие сразу, не дожидаясь конца часа и запуска задачи
+    db_session.add_all(_docs(now, 40))
+    await db_session.commit()
+    events = [e for e in await db_session.run_sync(_process, now) if e.source_id == src.id]
+    assert [(e.kind, e.ts) for e in events] == [("spike", hour)]
+    # value – счётчик корзины в момент срабатывания порога
+    assert 6 < events[0].value <= 40 and events[0].z >= 3
+
+    # меньший id закоммичен после прохода – читается из промежутка, уже учтённые не повторяются
+    def _state(session):
+        return session.query(StreamTrendStateORM.state).filter_by(source_id=src.id).scalar()
+
+    before = (await db_session.run_sync(_state))["count"]
+    late = _docs(now, 1)[0]
+    late.id = reserved
+    db_session.add(late)
+    await db_session.commit()
+    await db_session.run_sync(_process, now + timedelta(minutes=1))
+    state = await db_session.run_sync(_state)
+    assert state["count"] == before + 1
+    assert all(not (lo < reserved < hi) for lo, hi, _ in state["gaps"])
+
+    # поток вперемешку с другим источником: промежуток на каждый документ, но состояние ограничено
+    monkeypatch.setenv("STREAM_TRENDS_MAX_GAPS", "5")
+    for doc in _docs(now, 30):
+        db_session.add(doc)
+        db_session.add(DocumentORM(
+            source_id=other_source_id, published_at=now, title="t", text="x",
+            url=f"https://x/{uuid.uuid4().hex}", url_hash=uuid.uuid4().hex,
+        ))
+    await db_session.commit()
+    await db_session.run_sync(_process, now + timedelta(minutes=2))
+    state = await db_session.run_sync(_state)
+    assert state["count"] == before + 31
+    assert len(state["gaps"]) == 5
+
+    # новый экземпляр сервиса (рестарт воркера) продолжает с сохранённого состояния: без повторов
+    assert [e for e in await db_session.run_sync(_process, now + timedelta(minutes=5)) if e.source_id == src.id] == []
+
+    r = await client.get(f"/api/sources/{src.id}/trends/live", headers=auth_headers(token))
+    assert r.status_code == 200
+    assert [(e["kind"], e["ts"]) for e in r.json()] == [("spike", hour.isoformat().replace("+00:00", "Z"))]
+
+
+def test_negativity_spike_detected_from_merged_daily_sentiment():
+    from src.app.domain.services.aggregation import PartialAggregate
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+    from src.app.services.analysis_service import AnalysisService
+
+    day0 = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    parts = [PartialAggregate(), PartialAggregate()]
+    for d in range(14):
+        day = day0 + timedelta(days=d)
+        # объём ровный, доля негатива ~10-15% и всплеск до 75% на 12-й день
+        neg = 15 if d == 12 else 2 + d % 2
+        part = parts[d % 2]
+        part.total += 20
+        part.daily_counts[day] = 20
+        part.daily_sentiment[day] = {"negative": neg, "neutral": 20 - neg - 3, "positive": 3}
+    # день с малым числом оценённых документов не участвует в ряду доли негатива
+    parts[0].daily_sentiment[day0 + timedelta(days=14)] = {"negative": 2, "neutral": 0, "positive": 0}
+
+    agg = PartialAggregate.from_dict(parts[0].to_dict()).merge(parts[1])
+    assert len(agg.daily_sentiment_series()) == 15
+
+    svc = AnalysisService(None)
+    scope = AnalysisScope(source_ids=[1], date_range=DateRange(start=day0, end=day0 + timedelta(days=15)))
+    result = svc._build_result(1, scope, agg)
+
+    kinds = {(e.kind, e.ts) for e in result.events}
+    assert ("neg_spike", day0 + timedelta(days=12)) in kinds
+    assert not any(k == "spike" for k, _ in kinds)
+
+    daily = result.report.metrics["daily_sentiment"]
+    assert daily[12]["neg_share"] == 0.75
+    assert result.report.metrics["negativity_trends_found"] >= 1
+
+
+def test_spike_events_carry_top_negative_docs_from_bounded_heaps():
+    import torch
+
+    from src.app.domain.entities.document import Document
+    from src.app.domain.services.aggregation import PartialAggregate, merge_partials
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+    from src.app.services.analysis_service import AnalysisService
+
+    class _Tokenizer:
+        def __call__(self, texts, **kw):
+            x = torch.tensor([[float(t)] for t in texts])
+            return {"input_ids": x, "attention_mask": torch.ones_like(x)}
+
+    class _Model(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.w = torch.nn.Parameter(torch.zeros(1))
+
+        def forward(self, input_ids, attention_mask):
+            # логит негатива = число из текста документа: p_neg монотонна по нему
+            x = input_ids[:, :1]
+            return {"logits": torch.cat([x, torch.zeros_like(x), torch.zeros_like(x)], dim=1)}
+
+    day0 = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    docs, doc_id = [], 0
+    for d, n in enumerate([5, 6, 7, 6, 5, 6, 7, 5, 20, 6]):
+        for j in range(n):
+            doc_id += 1
+            docs.append(Document(
+                id=doc_id, source_id=1 + j % 2, published_at=day0 + timedelta(days=d, hours=j),
+                title=None, text=str((doc_id * 7) % 13 - 6), url_hash=str(doc_id), topic=None,
+                url="", meta={},
+            ))
+
+    svc = AnalysisService(None)
+    svc.sentiment_enabled, svc.persist_predictions, svc.trend_top_docs = True, False, 3
+    svc._get_model = lambda: (_Tokenizer(), _Model(), {0: "negative", 1: "neutral", 2: "positive"})
+    scope = AnalysisScope(source_ids=[1, 2], date_range=DateRange(start=day0, end=day0 + timedelta(days=10)))
+
+    # две «шарды» по половине документов: кучи сливаются, как при reduce
+    parts = []
+    for half in (docs[::2], docs[1::2]):
+        cells, _ = svc._score_documents(scope, half)
+        assert all(len(h) <= 3 for c in cells.values() for h in c.top_docs.values())
+        parts.append(PartialAggregate.from_dict(merge_partials(cells.values()).to_dict()))
+    result = svc._build_result(1, scope, merge_partials(parts))
+
+    spike_day = day0 + timedelta(days=8)
+    spikes = [e for e in result.events if e.kind == "spike"]
+    assert [e.ts for e in spikes] == [spike_day]
+
+    day_docs = [d for d in docs if d.published_at >= spike_day and d.published_at < spike_day + timedelta(days=1)]
+    expected = sorted(day_docs, key=lambda d: (float(d.text), d.id), reverse=True)[:3]
+    assert spikes[0].top_doc_ids == [d.id for d in expected]
+
+
+@pytest.mark.anyio
+async def test_model_failure_after_checkpoint_drops_saved_predictions(seed_source_and_docs, db_session):
+    import torch
+
+    from src.app.infra.models import DocumentORM
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+    from src.app.domain.enums import JobStatus
+
+    _, source_id, account_id, seed_now = seed_source_and_docs
+    # больше одного батча инференса (32)
+    db_session.add_all([
+        DocumentORM(
+            source_id=source_id, published_at=seed_now - timedelta(hours=i + 1), title=None, text=f"text {i}",
+            url=f"https://example.com/fallback/{i}", url_hash=f"fallback-{source_id}-{i}",
+        )
+        for i in range(40)
+    ])
+    await db_session.commit()
+
+    class _Tokenizer:
+        def __call__(self, texts, **kw):
+            x = torch.zeros(len(texts), 1)
+            return {"input_ids": x, "attention_mask": torch.ones_like(x)}
+
+    class _Model(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.w = torch.nn.Parameter(torch.zeros(1))
+            self.calls = 0
+
+        def forward(self, input_ids, attention_mask):
+            # первый батч считается и сохраняется чекпоинтом, на втором модель падает
+            self.calls += 1
+            if self.calls > 1:
+                raise RuntimeError("CUDA out of memory")
+            return {"logits": torch.cat([input_ids + 1, input_ids, input_ids], dim=1)}
+
+    scope = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=seed_now - timedelta(days=10), end=seed_now),
+    )
+
+    def _run(session):
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        svc.sentiment_enabled, svc.sentiment_fail_open, svc.checkpoint_interval = True, True, 0
+        model = _Model()
+        svc._get_model = lambda: (_Tokenizer(), model, {0: "negative", 1: "neutral", 2: "positive"})
+        job = svc.create_job(account_id, scope)
+        svc.run_job(job.id)
+        return (
+            uow.analysis.get_by_id_any(job.id),
+            uow.predictions.count_by_job(job.id),
+            uow.overview.get_by_job(job.id).metrics["sentiment_mode"],
+        )
+
+    job, predictions, mode = await db_session.run_sync(_run)
+    assert job.status == JobStatus.DONE and job.checkpoint == {}
+    assert mode == "fallback"
+    assert predictions == 0
+
+
+@pytest.mark.anyio
+async def test_breakdown_cube_by_topic_matches_between_single_and_sharded(
+    client, seed_source_and_docs, auth_headers, db_session
+):
+    token, source_id, account_id, seed_now = seed_source_and_docs
+
+    from sqlalchemy import update
+    from src.app.infra.models import DocumentORM
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.analysis_service import AnalysisService
+    from src.app.domain.value_objects import AnalysisScope, DateRange
+
+    scope = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=seed_now - timedelta(days=10), end=seed_now),
+    )
+
+    def _run(session):
+        # 3 документа с темой, 2 – без
+        session.execute(
+            update(DocumentORM)
+            .where(DocumentORM.source_id == source_id, DocumentORM.published_at >= seed_now - timedelta(days=3))
+            .values(topic="politics")
+        )
+        uow = SqlAlchemyUoW(session)
+        svc = AnalysisService(uow)
+        svc.shard_min_docs, svc.shard_target_docs, svc.shard_max = 1, 2, 8
+        svc.incremental_enabled = False
+
+        single = svc.create_job(account_id, scope)
+        svc.run_job(single.id)
+
+        sharded = svc.create_job(account_id, scope)
+        for sid in svc.start_job(sharded.id).shard_ids:
+            svc.run_shard(sharded.id, sid)
+        uow.commit()
+        return single.id, sharded.id
+
+    single_id, sharded_id = await db_session.run_sync(_run)
+
+    async def _get(job_id, **params):
+        r = await client.get(
+            f"/api/analysis/jobs/{job_id}/breakdown", params=params, headers=auth_headers(token)
+        )
+        assert r.status_code == 200, r.text
+        return r.json()["rows"]
+
+    by_topic = await _get(single_id, group_by="topic")
+    assert {r["topic"]: r["docs"] for r in by_topic} == {"politics": 3, None: 2}
+    assert all(r["neutral"] == r["docs"] and r["source_id"] is None for r in by_topic)
+
+    full = await _get(single_id)
+    assert len(full) == 5 and await _get(sharded_id) == full
+
+    no_topic = await _get(single_id, group_by="source_id", topic="")
+    assert no_topic == [{**no_topic[0], "source_id": source_id, "docs": 2}]
+
+    last_day = (seed_now - timedelta(days=1)).date().isoformat()
+    assert [r["day"] for r in await _get(single_id, group_by="day", day_from=last_day)] == [last_day]
+
+    r = await client.get(
+        f"/api/analysis/jobs/{single_id}/breakdown", params={"group_by": "url"}, headers=auth_headers(token)
+    )
+    assert r.status_code == 422
+
+    # тренды задачи в API – вместе с документами всплеска
+    from src.app.domain.entities.trend_event import TrendEvent
+
+    def _spike(session):
+        uow = SqlAlchemyUoW(session)
+        uow.trend.save_many(single_id, [
+            TrendEvent(job_id=single_id, ts=seed_now, kind="neg_spike", value=0.9, baseline=0.2, z=3.5, top_doc_ids=[7, 3]),
+        ])
+        uow.commit()
+
+    await db_session.run_sync(_spike)
+    r = await client.get(f"/api/analysis/jobs/{single_id}/trends", headers=auth_headers(token))
+    assert r.status_code == 200, r.text
+    assert [(e["kind"], e["top_doc_ids"]) for e in r.json()] == [("neg_spike", [7, 3])]
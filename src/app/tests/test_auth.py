@@ -0,0 +1,20 @@
+import pytest
+
+from src.app.core.security import decode_token
+from src.app.infra.async_uow import SqlAlchemyAsyncUoW
+from src.app.services.auth_service import AsyncAuthService
+
+
+@pytest.mark.anyio
+async def test_deactivation_invalidates_cached_user_ctx(client, register_user, auth_headers, db_session):
+    token, _ = await register_user()
+
+    # первый запрос кладёт user -> account контекст в кэш
+    r = await client.get("/api/sources", headers=auth_headers(token))
+    assert r.status_code == 200, r.text
+
+    user_id = int(decode_token(token)["sub"])
+    await AsyncAuthService(SqlAlchemyAsyncUoW(db_session)).deactivate_user(user_id)
+
+    r2 = await client.get("/api/sources", headers=auth_headers(token))
+    assert r2.status_code == 401, r2.text
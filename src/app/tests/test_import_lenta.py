@@ -0,0 +1,163 @@
+import csv
+
+from scripts import import_lenta as il
+
+
+HEADER = ["url", "title", "text", "topic", "tags", "date"]
+
+
+def _write_csv(path, rows) -> str:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        w.writerows(rows)
+    return str(path)
+
+
+def _row(i: int, text: str = "текст") -> list[str]:
+    return [f"https://lenta.ru/{i}", f"заголовок {i}", text, "Мир", "", "2016/03/01"]
+
+
+def _read(path, offset: int = 0, row: int = 0, block_rows: int = 2):
+    stats = {"processed": row}
+    blocks = list(il.iter_blocks(path, None, stats, block_rows, offset))
+    return [v for block, _, _ in blocks for v in block], [pos for _, _, pos in blocks], stats
+
+
+def test_resume_from_checkpoint_offset_yields_remaining_records(tmp_path):
+    rows = [_row(1), _row(2), _row(3, "первая строка\n\"цитата\", вторая\r\nтретья"), _row(4), _row(5)]
+    path = _write_csv(tmp_path / "lenta.csv", rows)
+
+    values, positions, stats = _read(path)
+    assert values == rows and stats["processed"] == 5
+    assert [row for _, row in positions] == [2, 4, 5]
+
+    # чекпоинт после второй строки: следующая запись – многострочное поле в кавычках
+    offset, row = positions[0]
+    rest, rest_positions, rest_stats = _read(path, offset, row)
+    assert rest == rows[2:]
+    assert rest_positions == positions[1:]
+    assert rest_stats["processed"] == 5
+
+
+def test_resume_falls_back_to_fresh_import_when_file_changed(tmp_path, monkeypatch):
+    path = _write_csv(tmp_path / "lenta.csv", [_row(1)])
+    fingerprint = il.file_fingerprint(path)
+    saved = il.Checkpoint(7, fingerprint, offset=10, row=1, inserted=1)
+    monkeypatch.setattr(il, "find_resumable_ingestion", lambda *args: saved)
+
+    assert il.resumable_checkpoint(None, 1, il.IMPORT_KIND, fingerprint) is saved
+
+    _write_csv(tmp_path / "lenta.csv", [_row(1), _row(2)])
+    assert il.file_fingerprint(path) != fingerprint
+    assert il.resumable_checkpoint(None, 1, il.IMPORT_KIND, il.file_fingerprint(path)) is None
+
+
+def test_checkpoint_save_ignores_missing_position():
+    class _Cursor:
+        def __init__(self):
+            self.queries = []
+
+        def execute(self, sql, params=None):
+            self.queries.append(params)
+
+    cur = _Cursor()
+    cp = il.Checkpoint(3, "fp", offset=100, row=4, inserted=4)
+
+    # чанк без строк (конец файла) – позиция не сдвигается и ничего не пишется
+    cp.save(cur, None, 10)
+    assert cur.queries == [] and cp.to_dict() == {"offset": 100, "row": 4, "inserted": 4, "fingerprint": "fp"}
+
+    cp.save(cur, (250, 9), 8)
+    assert (cp.offset, cp.row, cp.inserted) == (250, 9, 8)
+    assert len(cur.queries) == 1 and cur.queries[0][1] == 3
+
+
+def _baseline_parse(path, source_id: int) -> tuple[list[tuple], int]:
+    # прежний разбор import_csv: csv.DictReader и нормализация по строке
+    docs, processed = [], 0
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            processed += 1
+            values = [row.get(c) or "" for c in HEADER]
+            doc = il.normalize_row(values, {c: i for i, c in enumerate(HEADER)}, source_id)
+            if doc is not None:
+                docs.append(doc)
+    return docs, processed
+
+
+def test_pipeline_matches_baseline_parser(tmp_path):
+    rows = []
+    for i in range(1200):
+        if i % 100 == 0:
+            rows.append([])  # пустая строка – не запись
+        if i % 37 == 0:
+            rows.append(_row(i, "многострочный\nтекст"))
+        elif i % 41 == 0:
+            rows.append(_row(i)[:-1] + ["не дата"])
+        elif i % 53 == 0:
+            rows.append(_row(i, ""))
+        else:
+            rows.append(_row(i % 900))  # повторяющиеся url
+    path = _write_csv(tmp_path / "lenta.csv", rows)
+    base_docs, base_processed = _baseline_parse(path, 1)
+
+    runs = {}
+    for workers in (0, 2):
+        stats = {"processed": 0}
+        out = list(il.iter_normalized(path, 1, None, stats, workers, False))
+        runs[workers] = ([d for _, docs, _ in out for d in docs], [pos for _, _, pos in out], stats["processed"])
+        assert sum(n for n, _, _ in out) == len(base_docs)
+
+    assert runs[0] == runs[2]
+    docs, positions, processed = runs[0]
+    assert docs == base_docs
+    assert processed == base_processed == 1200
+    assert positions[-1][1] == 1200 and len(positions) == 3
+
+    stats = {"processed": 0}
+    list(il.iter_normalized(path, 1, 700, stats, 0, False))
+    assert stats["processed"] == 700
+
+
+def test_copy_value_escapes_text_format():
+    from datetime import datetime, timedelta, timezone
+
+    assert il._copy_value(None) == "\\N"
+    assert il._copy_value("a\\b\tc\nd\re") == "a\\\\b\\tc\\nd\\re"
+    # обратный слэш экранируется первым – уже экранированные символы не удваиваются
+    assert il._copy_value("\\n") == "\\\\n"
+    assert il._copy_value("\\N") == "\\\\N"
+    assert il._copy_value(42) == "42"
+    assert il._copy_value(datetime(2016, 3, 1, tzinfo=timezone.utc)) == "2016-03-01T00:00:00+00:00"
+    msk = timezone(timedelta(hours=3))
+    assert il._copy_value(datetime(2016, 3, 1, 3, 30, tzinfo=msk)) == "2016-03-01T03:30:00+03:00"
+
+    line = il.copy_line((1, None, "a\tb"))
+    assert line == "1\t\\N\ta\\tb\n" and line.count("\t") == 2
+
+
+def test_copy_stream_stops_at_block_boundary_and_tracks_position():
+    blocks = iter([
+        (2, "a\nb\n", (10, 2)),
+        (0, "", (15, 3)),  # блок без документов: позиция сдвигается, текста нет
+        (2, "c\nd\n", (30, 5)),
+        (1, "e\n", (40, 6)),
+    ])
+
+    first = il.CopyStream(blocks, max_rows=3)
+    assert first.read(1 << 16) == "a\nb\n"
+    # чанк добирается целым блоком (4 документа при max_rows=3), следующий блок не трогается
+    assert first.read(1 << 16) == "c\nd\n"
+    assert first.read(1 << 16) == ""
+    assert (first.count, first.pos, first.exhausted) == (4, (30, 5), False)
+
+    second = il.CopyStream(blocks, max_rows=3)
+    assert second.read() == "e\n"
+    assert second.read() == ""
+    assert (second.count, second.pos, second.exhausted) == (1, (40, 6), True)
+
+    # пустой последний чанк: позиции нет – чекпоинт не пишется (Checkpoint.save(pos=None))
+    third = il.CopyStream(blocks, max_rows=3)
+    assert third.read() == ""
+    assert (third.count, third.pos, third.exhausted) == (0, None, True)
@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from src.app.infra.uow import SqlAlchemyUoW
+from src.app.infra.models import DocumentORM, TrendEventORM
+from src.app.domain.value_objects import AnalysisScope, DateRange, SentimentProbs
+from src.app.domain.entities.overview_report import OverviewReport
+from src.app.domain.entities.trend_event import TrendEvent
+from src.app.domain.entities.prediction import Prediction
+from src.app.domain.enums import SentimentLabel
+
+
+@pytest.mark.anyio
+async def test_bulk_result_writes_are_idempotent(seed_source_and_docs, db_session):
+    _, source_id, account_id, seed_now = seed_source_and_docs
+    await db_session.run_sync(_check_bulk_writes, source_id, account_id, seed_now)
+
+
+def _check_bulk_writes(db_session, source_id, account_id, seed_now):
+    uow = SqlAlchemyUoW(db_session)
+
+    scope = AnalysisScope(
+        source_ids=[source_id],
+        date_range=DateRange(start=seed_now - timedelta(days=10), end=seed_now),
+    )
+    job = uow.analysis.create(account_id, scope)
+    doc_ids = [int(x[0]) for x in db_session.query(DocumentORM.id).filter(DocumentORM.source_id == source_id)]
+    now = datetime.now(timezone.utc)
+
+    for share in (0.25, 0.75):
+        uow.overview.upsert(
+            OverviewReport(
+                job_id=job.id,
+                total_documents=len(doc_ids),
+                sentiment_share={"negative": share, "neutral": 1 - share, "positive": 0.0},
+                metrics={},
+                created_at=now,
+            )
+        )
+        uow.trend.save_many(
+            job.id,
+            [TrendEvent(job_id=job.id, ts=seed_now, kind="spike", value=5.0, baseline=1.0, z=3.0)],
+        )
+        uow.predictions.save_many(
+            job.id,
+            [
+                Prediction(
+                    document_id=d,
+                    label=SentimentLabel.NEG,
+                    probs=SentimentProbs(p_neg=share, p_neu=1 - share, p_pos=0.0),
+                    created_at=now,
+                )
+                for d in doc_ids
+            ],
+        )
+    uow.commit()
+
+    rep = uow.overview.get_by_job(job.id)
+    assert rep.sentiment_share["negative"] == 0.75
+    assert db_session.query(TrendEventORM).filter(TrendEventORM.job_id == job.id).count() == 1
+    assert uow.predictions.count_by_job(job.id) == len(doc_ids)
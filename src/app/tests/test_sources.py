@@ -0,0 +1,138 @@
+import pytest
+
+from src.app.infra.async_uow import SqlAlchemyAsyncUoW
+
+
+@pytest.mark.anyio
+async def test_source_stats_served_from_read_only_uow(client, seed_source_and_docs, auth_headers):
+    token, source_id, _, _ = seed_source_and_docs
+
+    r = await client.get("/api/sources", headers=auth_headers(token))
+    assert r.status_code == 200, r.text
+    assert source_id in [s["id"] for s in r.json()]
+
+    r2 = await client.get(f"/api/sources/{source_id}/stats", headers=auth_headers(token))
+    assert r2.status_code == 200, r2.text
+    assert r2.json()["total_documents"] == 5
+
+
+@pytest.mark.anyio
+async def test_read_only_uow_rejects_commit(db_session):
+    uow = SqlAlchemyAsyncUoW(db_session, read_only=True)
+    with pytest.raises(RuntimeError):
+        await uow.commit()
+
+
+@pytest.mark.anyio
+async def test_incremental_ingestion_file_drop_and_http_feed_with_watermarks(db_session, tmp_path):
+    import json
+    import threading
+    import uuid
+    from datetime import datetime, timedelta, timezone
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    from sqlalchemy import func, select
+
+    from src.app.infra.models import DocumentORM, IngestionJobORM, SourceORM
+    from src.app.infra.source_adapters import SOURCE_ADAPTERS
+    from src.app.infra.uow import SqlAlchemyUoW
+    from src.app.services.ingestion_service import IngestionService
+
+    feed = [
+        {"url": f"https://feed.test/{i}", "text": f"новость {i}", "published_at": f"2026-10-19T{i:02d}:00:00+00:00"}
+        for i in range(7)
+    ]
+
+    class _Feed(BaseHTTPRequestHandler):
+        # локальная подмена HTTP-ленты: курсор – индекс следующего элемента
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/items":
+                self.send_response(500)
+                self.end_headers()
+                return
+            q = parse_qs(url.query)
+            start, limit = int(q.get("cursor", ["0"])[0]), int(q["limit"][0])
+            items = feed[start:start + limit]
+            end = start + len(items)
+            body = json.dumps({"items": items, "next_cursor": str(end), "has_more": end < len(feed)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Feed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        drop = tmp_path / "drop"
+        drop.mkdir()
+        lines = [
+            json.dumps({"url": f"https://drop.test/{i}", "text": "текст", "published_at": "2026-10-19T10:00:00"})
+            for i in range(4)
+        ]
+        (drop / "001.jsonl").write_text(lines[0] + "\n" + lines[1] + "\nnot json\n")
+        # дубль первого документа и недописанная последняя строка
+        (drop / "002.jsonl").write_text(lines[2] + "\n" + lines[0] + "\n" + lines[3][:20])
+
+        tag = uuid.uuid4().hex[:6]
+        files = SourceORM(
+            name=f"drop-{tag}", source_type="news_corpus", ingestion_mode="incremental",
+            config={"adapter": "file_drop", "path": str(drop), "poll_seconds": 60},
+        )
+        feed_url = f"http://127.0.0.1:{server.server_port}"
+        http = SourceORM(
+            name=f"feed-{tag}", source_type="telegram", ingestion_mode="stream",
+            config={"adapter": "http_feed", "url": f"{feed_url}/items", "poll_seconds": 5},
+        )
+        db_session.add_all([files, http])
+        await db_session.commit()
+        files_id, http_id = files.id, http.id
+
+        now = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+
+        def _tick(session, at):
+            svc = IngestionService(SqlAlchemyUoW(session), SOURCE_ADAPTERS)
+            svc.batch_docs, svc.max_docs_per_run = 2, 4
+            return {r.source_id: (r.fetched, r.inserted, r.has_more, r.error) for r in svc.process(now=at)}
+
+        async def _cursor(source_id):
+            return (
+                await db_session.execute(select(IngestionJobORM).where(IngestionJobORM.source_id == source_id))
+            ).scalar_one()
+
+        # не больше max_docs_per_run за запуск: остаток – на следующем тике, сразу
+        assert await db_session.run_sync(_tick, now) == {files_id: (4, 3, True, None), http_id: (4, 4, True, None)}
+        assert await db_session.run_sync(_tick, now) == {files_id: (0, 0, False, None), http_id: (3, 3, False, None)}
+        assert await db_session.run_sync(_tick, now) == {}
+
+        # строка дописана – читается с сохранённого смещения
+        with (drop / "002.jsonl").open("a") as f:
+            f.write(lines[3][20:] + "\n")
+        assert await db_session.run_sync(_tick, now + timedelta(seconds=61)) == {
+            files_id: (1, 1, False, None), http_id: (0, 0, False, None),
+        }
+
+        for source_id, total in ((files_id, 4), (http_id, 7)):
+            n = await db_session.scalar(select(func.count(DocumentORM.id)).where(DocumentORM.source_id == source_id))
+            assert n == total
+        cursor = await _cursor(files_id)
+        assert cursor.stats["watermark"] == {"file": "002.jsonl", "offset": (drop / "002.jsonl").stat().st_size}
+        assert (cursor.stats["fetched"], cursor.stats["inserted"]) == (5, 4)
+
+        # ошибка источника: watermark не сдвигается, следующий опрос – с backoff
+        http.config = {**http.config, "url": f"{feed_url}/broken"}
+        await db_session.commit()
+        at = now + timedelta(seconds=100)
+        runs = await db_session.run_sync(_tick, at)
+        assert runs[http_id][3] and "500" in runs[http_id][3]
+        cursor = await _cursor(http_id)
+        await db_session.refresh(cursor)
+        assert cursor.status == "ERROR" and cursor.stats["watermark"] == {"cursor": "7"}
+        assert cursor.stats["failures"] == 1 and cursor.next_run_at == at + timedelta(seconds=5)
+    finally:
+        server.shutdown()
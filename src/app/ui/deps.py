@@ -1,14 +1,14 @@
 from dataclasses import dataclass
-from typing import Generator, Optional
+from typing import AsyncGenerator, Optional
 
 from fastapi import Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import RedirectResponse, Response
 
-from src.app.infra.db import SessionLocal
-from src.app.infra.uow import SqlAlchemyUoW
-from src.app.domain.contracts.uow import UoW
-from src.app.core.security import decode_token
+from src.app.infra.db import AsyncSessionLocal, AsyncSessionLocalRO
+from src.app.infra.async_uow import SqlAlchemyAsyncUoW
+from src.app.domain.contracts.uow import AsyncUoW
+from src.app.core.auth_cache import decode_token_cached
 
 
 @dataclass(frozen=True)
@@ -18,16 +18,22 @@ class UserContext:
     role: str
 
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_db_ro() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocalRO() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_uow(db: Session = Depends(get_db)) -> UoW:
-    return SqlAlchemyUoW(db)
+def get_uow(db: AsyncSession = Depends(get_db)) -> AsyncUoW:
+    return SqlAlchemyAsyncUoW(db)
+
+
+def get_uow_ro(db: AsyncSession = Depends(get_db_ro)) -> AsyncUoW:
+    return SqlAlchemyAsyncUoW(db, read_only=True)
 
 def _redirect_to_login(request: Request, reason: str = "required") -> Response:
     url = f"/login?reason={reason}"
@@ -45,7 +51,7 @@ def get_current_user_ctx_ui(request: Request) -> UserContext | Response:
         return _redirect_to_login(request, "required")
 
     try:
-        payload = decode_token(token)
+        payload = decode_token_cached(token)
         user_id = int(payload["sub"])
         account_id = int(payload.get("account_id") or payload.get("extra", {}).get("account_id") or 0)
     except Exception:
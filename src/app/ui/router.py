@@ -6,18 +6,19 @@ from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from starlette.concurrency import run_in_threadpool
 from starlette.responses import Response
 
 from src.app.infra.mq import enqueue_analysis_job
 
-from src.app.ui.deps import UserContext, get_current_user_ctx_ui, get_uow
-from src.app.domain.contracts.uow import UoW
+from src.app.ui.deps import UserContext, get_current_user_ctx_ui, get_uow, get_uow_ro
+from src.app.domain.contracts.uow import AsyncUoW
 
-from src.app.services.auth_service import AuthService
-from src.app.services.sources_service import SourcesService
-from src.app.services.analysis_service import AnalysisService
+from src.app.services.auth_service import AsyncAuthService
+from src.app.services.sources_service import AsyncSourcesService
+from src.app.services.analysis_service import AsyncAnalysisService
 from src.app.domain.value_objects import AnalysisScope, DateRange
+from src.app.domain.enums import JobStatus
+from src.app.domain.services.breakdown import BREAKDOWN_DIMS
 from src.app.ui.presenters.overview_presenter import present_overview
 
 # templates
@@ -27,9 +28,15 @@ templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 router = APIRouter(tags=["ui"])
 
+# Маршрутизация чтений: списки источников, статистика, ряды, тренды и отчёт
+# читаются через get_uow_ro (реплика). Создание задач и polling статуса – primary.
+
 # Helpers
 CtxOrResp = Union[UserContext, Response]
 
+# Сколько строк среза разбивки рисовать в HTML (полный срез – через API)
+_BREAKDOWN_UI_ROWS = 500
+
 
 def _format_dt(value: datetime | None, fmt: str = "%d.%m.%Y %H:%M") -> str:
     if not value:
@@ -74,28 +81,28 @@ def _parse_dt_iso(s: str) -> datetime:
     return dt.astimezone(timezone.utc)
 
 
-def _build_sources_map(uow: UoW, account_id: int) -> dict[int, str]:
-    sources = SourcesService(uow).list_sources(account_id)
+async def _build_sources_map(uow: AsyncUoW, account_id: int) -> dict[int, str]:
+    sources = await AsyncSourcesService(uow).list_sources(account_id)
     return {int(s.id): str(s.name) for s in sources}
 
 
 # Auth UI
 @router.get("/login", response_class=HTMLResponse)
-def ui_login_get(request: Request):
+async def ui_login_get(request: Request):
     return _render(request, "auth/login.html", {"error": None})
 
 
 @router.post("/login")
-def ui_login_post(
+async def ui_login_post(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
-    svc = AuthService(uow)
+    svc = AsyncAuthService(uow)
 
     try:
-        token = svc.login(email=email, password=password)
+        token = await svc.login(email=email, password=password)
     except Exception as e:
         return _render(request, "auth/login.html", {"error": str(e)})
 
@@ -105,22 +112,22 @@ def ui_login_post(
 
 
 @router.get("/register", response_class=HTMLResponse)
-def ui_register_get(request: Request):
+async def ui_register_get(request: Request):
     return _render(request, "auth/register.html", {"error": None})
 
 
 @router.post("/register")
-def ui_register_post(
+async def ui_register_post(
     request: Request,
     email: str = Form(...),
     password: str = Form(...),
     account_name: str = Form(...),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
-    svc = AuthService(uow)
+    svc = AsyncAuthService(uow)
 
     try:
-        token = svc.register(email=email, password=password, account_name=account_name)
+        token = await svc.register(email=email, password=password, account_name=account_name)
     except Exception as e:
         return _render(request, "auth/register.html", {"error": str(e)})
 
@@ -130,23 +137,23 @@ def ui_register_post(
 
 
 @router.post("/logout")
-def ui_logout(request: Request):
+async def ui_logout(request: Request):
     request.session.clear()
     return _redirect("/login")
 
 
 # Sources UI
 @router.get("/sources", response_class=HTMLResponse)
-def ui_sources_list(
+async def ui_sources_list(
     request: Request,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow_ro),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    sources = SourcesService(uow).list_sources(ctx.account_id)
+    sources = await AsyncSourcesService(uow).list_sources(ctx.account_id)
     return _render(
         request,
         "sources/list.html",
@@ -155,17 +162,17 @@ def ui_sources_list(
 
 
 @router.get("/sources/{source_id}/stats", response_class=HTMLResponse)
-def ui_source_stats_partial(
+async def ui_source_stats_partial(
     request: Request,
     source_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow_ro),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    st = SourcesService(uow).source_stats(ctx.account_id, source_id)
+    st = await AsyncSourcesService(uow).source_stats(ctx.account_id, source_id)
     return _render(
         request,
         "sources/_stats.html",
@@ -175,16 +182,16 @@ def ui_source_stats_partial(
 
 # Analysis / Jobs UI
 @router.get("/analysis/new", response_class=HTMLResponse)
-def ui_analysis_new(
+async def ui_analysis_new(
     request: Request,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow_ro),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    sources = SourcesService(uow).list_sources(ctx.account_id)
+    sources = await AsyncSourcesService(uow).list_sources(ctx.account_id)
 
     now = datetime.now(timezone.utc)
     d_to = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -208,7 +215,7 @@ def ui_analysis_new(
 async def ui_analysis_create_job(
     request: Request,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
@@ -216,8 +223,8 @@ async def ui_analysis_create_job(
 
     form = await request.form()
 
-    def _render_error(msg: str) -> HTMLResponse:
-        sources = SourcesService(uow).list_sources(ctx.account_id)
+    async def _render_error(msg: str) -> HTMLResponse:
+        sources = await AsyncSourcesService(uow).list_sources(ctx.account_id)
         return _render(
             request,
             "analysis/new.html",
@@ -250,27 +257,30 @@ async def ui_analysis_create_job(
         )
 
     except Exception as e:
-        return _render_error(f"Некорректные данные формы: {e}")
+        return await _render_error(f"Некорректные данные формы: {e}")
 
-    svc = AnalysisService(uow)
+    svc = AsyncAnalysisService(uow)
 
     try:
-        job = await run_in_threadpool(svc.create_job, ctx.account_id, scope)
+        job = await svc.create_job(ctx.account_id, scope)
     except ValueError as e:
-        return _render_error(str(e))
+        return await _render_error(str(e))
     except Exception as e:
-        return _render_error(f"Не удалось создать задачу: {e}")
+        return await _render_error(f"Не удалось создать задачу: {e}")
+
+    if job.status == JobStatus.DONE:
+        return _redirect(f"/jobs/{job.id}")
 
     try:
-        await enqueue_analysis_job({"job_id": job.id})
+        await enqueue_analysis_job({"job_id": job.id}, priority=job.priority)
     except Exception as e:
         try:
-            uow.analysis.set_error(job.id, f"mq_publish_error: {e}")
-            uow.commit()
+            await uow.analysis.set_error(job.id, f"mq_publish_error: {e}")
+            await uow.commit()
         except Exception:
-            uow.rollback()
+            await uow.rollback()
 
-        return _render_error(
+        return await _render_error(
             f"Задача #{job.id} создана, но не удалось поставить в очередь (RabbitMQ недоступен). "
             f"Повторите попытку позже."
         )
@@ -279,16 +289,16 @@ async def ui_analysis_create_job(
 
 
 @router.get("/jobs", response_class=HTMLResponse)
-def ui_jobs_list(
+async def ui_jobs_list(
     request: Request,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    jobs = AnalysisService(uow).list_jobs(ctx.account_id, limit=50)
+    jobs = await AsyncAnalysisService(uow).list_jobs(ctx.account_id, limit=50)
     return _render(
         request,
         "jobs/list.html",
@@ -297,22 +307,23 @@ def ui_jobs_list(
 
 
 @router.get("/jobs/{job_id}", response_class=HTMLResponse)
-def ui_job_detail(
+async def ui_job_detail(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
     if not job:
         return _render(request, "jobs/detail.html", {"ctx": ctx, "job": None, "job_id": job_id, "active": "jobs"})
 
-    sources_map = _build_sources_map(uow, ctx.account_id)
+    sources_map = await _build_sources_map(uow, ctx.account_id)
+    shards = await svc.get_shards(ctx.account_id, job_id)
 
     return _render(
         request,
@@ -322,46 +333,47 @@ def ui_job_detail(
             "job": job,
             "job_id": job_id,
             "sources_map": sources_map,
+            "shards": shards,
             "active": "jobs",
         },
     )
 
 
 @router.get("/jobs/{job_id}/card", response_class=HTMLResponse)
-def ui_job_card_partial(
+async def ui_job_card_partial(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
 
-    sources_map = _build_sources_map(uow, ctx.account_id)
+    sources_map = await _build_sources_map(uow, ctx.account_id)
 
     return _render(request, "jobs/_card.html", {"ctx": ctx, "job": job, "sources_map": sources_map})
 
 
 # polling-блок
 @router.get("/jobs/{job_id}/overview-block", response_class=HTMLResponse)
-def ui_job_overview_block_partial(
+async def ui_job_overview_block_partial(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
 
-    sources_map = _build_sources_map(uow, ctx.account_id)
+    sources_map = await _build_sources_map(uow, ctx.account_id)
 
     if not job:
         return _render(
@@ -377,9 +389,9 @@ def ui_job_overview_block_partial(
             },
         )
 
-    overview = svc.get_overview(ctx.account_id, job_id)
+    overview = await svc.get_overview(ctx.account_id, job_id)
     overview_v = present_overview(overview) if overview else None
-    trends = svc.get_trends(ctx.account_id, job_id)
+    trends = await svc.get_trends(ctx.account_id, job_id)
 
     return _render(
         request,
@@ -397,72 +409,87 @@ def ui_job_overview_block_partial(
 
 # JSON для Chart.js (ряд + overlay точек)
 @router.get("/jobs/{job_id}/series")
-def ui_job_series(
+async def ui_job_series(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow_ro),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
     if not job:
         return JSONResponse(
             {"labels": [], "values": [], "points": [], "status": "NOT_FOUND"},
             status_code=404,
         )
 
-    overview = svc.get_overview(ctx.account_id, job_id)
+    overview = await svc.get_overview(ctx.account_id, job_id)
 
     labels: list[str] = []
     values: list[int] = []
+    neg_share: list[float | None] = []
     points: list[dict[str, Any]] = []
+    neg_points: list[dict[str, Any]] = []
 
     if overview and overview.metrics and overview.metrics.get("daily_series"):
         series = overview.metrics["daily_series"]
         labels = [str(x.get("ts", ""))[:10] for x in series]
         values = [int(x.get("value", 0)) for x in series]
 
-        events = svc.get_trends(ctx.account_id, job_id)
+        # доля негатива по тем же дням (None – в этот день нет оценённых документов)
+        by_day = {
+            str(x.get("ts", ""))[:10]: float(x.get("neg_share", 0.0))
+            for x in overview.metrics.get("daily_sentiment") or []
+        }
+        neg_share = [by_day.get(day) for day in labels]
+
+        events = await svc.get_trends(ctx.account_id, job_id)
         for ev in events:
             # baseline/z могут быть None — страхуемся
             baseline = float(ev.baseline) if ev.baseline is not None else 0.0
             z = float(ev.z) if getattr(ev, "z", None) is not None else 0.0
 
-            points.append(
-                {
-                    "x": ev.ts.date().isoformat(),
-                    "y": float(ev.value),
-                    "kind": str(ev.kind),
-                    "z": z,
-                    "baseline": baseline,
-                }
-            )
+            point = {
+                "x": ev.ts.date().isoformat(),
+                "y": float(ev.value),
+                "kind": str(ev.kind),
+                "z": z,
+                "baseline": baseline,
+            }
+            (neg_points if ev.kind.startswith("neg_") else points).append(point)
 
-    return {"labels": labels, "values": values, "points": points, "status": job.status}
+    return {
+        "labels": labels,
+        "values": values,
+        "neg_share": neg_share,
+        "points": points,
+        "neg_points": neg_points,
+        "status": job.status,
+    }
 
 
 # JSON для таблицы трендов
 @router.get("/jobs/{job_id}/trends")
-def ui_job_trends(
+async def ui_job_trends(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow_ro),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
     if not job:
         return JSONResponse({"events": [], "status": "NOT_FOUND"}, status_code=404)
 
-    events = svc.get_trends(ctx.account_id, job_id)
+    events = await svc.get_trends(ctx.account_id, job_id)
 
     out: list[dict[str, Any]] = []
     for e in events:
@@ -490,33 +517,75 @@ def ui_job_trends(
                 "z": z,
                 "delta": float(delta) if delta is not None else None,
                 "delta_pct": float(delta_pct) if delta_pct is not None else None,
+                "top_doc_ids": list(getattr(e, "top_doc_ids", None) or []),
             }
         )
 
     return {"status": job.status, "events": out}
 
 
+# HTML-таблица среза куба источник × тема × сутки
+@router.get("/jobs/{job_id}/breakdown", response_class=HTMLResponse)
+async def ui_job_breakdown(
+    request: Request,
+    job_id: int,
+    group_by: str = "source_id,topic",
+    topic: str = "",
+    day_from: str = "",
+    day_to: str = "",
+    ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
+    uow: AsyncUoW = Depends(get_uow_ro),
+):
+    ctx = _ctx(ctx_or_resp)
+    if isinstance(ctx, Response):
+        return ctx
+
+    dims = [g for g in group_by.split(",") if g in BREAKDOWN_DIMS]
+    rows = await AsyncAnalysisService(uow).get_breakdown(
+        ctx.account_id,
+        job_id,
+        group_by=dims,
+        topics=[topic.strip()] if topic.strip() else None,
+        day_from=day_from or None,
+        day_to=day_to or None,
+    )
+    if rows is not None:
+        # по суткам – хронологически, внутри (и без суток) – крупные срезы первыми
+        rows.sort(key=lambda r: (r.get("day") or "", -r["docs"]))
+
+    return _render(
+        request,
+        "jobs/_breakdown_table.html",
+        {
+            "rows": rows[:_BREAKDOWN_UI_ROWS] if rows else rows,
+            "truncated": bool(rows) and len(rows) > _BREAKDOWN_UI_ROWS,
+            "group_by": dims,
+            "sources_map": await _build_sources_map(uow, ctx.account_id),
+        },
+    )
+
+
 @router.get("/jobs/{job_id}/report", response_class=HTMLResponse)
-def ui_job_report(
+async def ui_job_report(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow_ro),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
     if not job:
         return _render(request, "jobs/report.html", {"ctx": ctx, "job": None, "job_id": job_id})
 
-    overview = svc.get_overview(ctx.account_id, job_id)
+    overview = await svc.get_overview(ctx.account_id, job_id)
     overview_v = present_overview(overview) if overview else None
 
-    sources_map = _build_sources_map(uow, ctx.account_id)
-    trends = svc.get_trends(ctx.account_id, job_id)
+    sources_map = await _build_sources_map(uow, ctx.account_id)
+    trends = await svc.get_trends(ctx.account_id, job_id)
 
     return _render(
         request,
@@ -532,23 +601,59 @@ def ui_job_report(
         },
     )
 
+@router.post("/jobs/{job_id}/cancel")
+async def ui_job_cancel(
+    request: Request,
+    job_id: int,
+    ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
+    uow: AsyncUoW = Depends(get_uow),
+):
+    ctx = _ctx(ctx_or_resp)
+    if isinstance(ctx, Response):
+        return ctx
+
+    try:
+        await AsyncAnalysisService(uow).cancel_job(ctx.account_id, job_id)
+    except ValueError:
+        # задача успела завершиться – просто показываем её текущее состояние
+        pass
+    return _redirect(f"/jobs/{job_id}")
+
+
+# polling прогресса: только status + progress, отчёт не загружается
+@router.get("/jobs/{job_id}/progress", response_class=HTMLResponse)
+async def ui_job_progress_partial(
+    request: Request,
+    job_id: int,
+    ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
+    uow: AsyncUoW = Depends(get_uow),
+):
+    ctx = _ctx(ctx_or_resp)
+    if isinstance(ctx, Response):
+        return ctx
+
+    progress = await AsyncAnalysisService(uow).get_progress(ctx.account_id, job_id)
+    return _render(request, "jobs/_progress.html", {"ctx": ctx, "job_id": job_id, "progress": progress})
+
+
 @router.get("/jobs/{job_id}/panel", response_class=HTMLResponse)
-def ui_job_panel_partial(
+async def ui_job_panel_partial(
     request: Request,
     job_id: int,
     ctx_or_resp: CtxOrResp = Depends(get_current_user_ctx_ui),
-    uow: UoW = Depends(get_uow),
+    uow: AsyncUoW = Depends(get_uow),
 ):
     ctx = _ctx(ctx_or_resp)
     if isinstance(ctx, Response):
         return ctx
 
-    svc = AnalysisService(uow)
-    job = svc.get_job(ctx.account_id, job_id)
-    sources_map = _build_sources_map(uow, ctx.account_id)
+    svc = AsyncAnalysisService(uow)
+    job = await svc.get_job(ctx.account_id, job_id)
+    sources_map = await _build_sources_map(uow, ctx.account_id)
+    shards = await svc.get_shards(ctx.account_id, job_id) if job else []
 
     return _render(
         request,
         "jobs/_job_panel.html",
-        {"ctx": ctx, "job": job, "job_id": job_id, "sources_map": sources_map},
+        {"ctx": ctx, "job": job, "job_id": job_id, "sources_map": sources_map, "shards": shards},
     )
\ No newline at end of file
@@ -0,0 +1,258 @@
+import os
+import logging
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from src.app.core.metrics import QUEUE_MESSAGES, QUEUE_MESSAGE_SECONDS
+from src.app.core.sql_profile import profile_queries
+from src.app.domain.contracts.queue import JobQueue
+from src.app.infra.db import SessionLocal
+from src.app.infra.mq import ANALYSIS_DEFER_SECONDS
+from src.app.infra.source_adapters import SOURCE_ADAPTERS
+from src.app.infra.uow import SqlAlchemyUoW
+from src.app.services.analysis_service import AnalysisService, StartResult
+from src.app.services.ingestion_service import IngestionService
+from src.app.services.stream_trend_service import StreamTrendService
+
+# Обработка сообщений задач, общая для всех бэкендов очереди (RabbitMQ-воркер, in-process).
+
+# Сколько задач выполняется одновременно
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+# thread – общий процесс и одна копия модели; process – изоляция GIL, модель в каждом процессе
+WORKER_EXECUTOR = os.getenv("WORKER_EXECUTOR", "thread")
+# Как часто воркер ищет задачи/шарды с просроченным lease (0 – reaper выключен)
+ANALYSIS_REAPER_INTERVAL_SECONDS = float(os.getenv("ANALYSIS_REAPER_INTERVAL_SECONDS", "30"))
+# Как часто онлайн-детектор трендов разбирает новые документы STREAM-источников (0 – выключен)
+STREAM_TRENDS_INTERVAL_SECONDS = float(os.getenv("STREAM_TRENDS_INTERVAL_SECONDS", "10"))
+# Как часто воркер проверяет, каким источникам с адаптером пора за новыми документами (0 – выключено)
+INGESTION_INTERVAL_SECONDS = float(os.getenv("INGESTION_INTERVAL_SECONDS", "10"))
+# Сколько источников загружается за один тик
+INGESTION_SOURCES_PER_TICK = int(os.getenv("INGESTION_SOURCES_PER_TICK", "20"))
+
+
+def _make_executor() -> Executor:
+    if WORKER_EXECUTOR == "process":
+        return ProcessPoolExecutor(
+            max_workers=WORKER_CONCURRENCY,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="analysis-job")
+
+
+executor = _make_executor()
+
+
+def run_job_sync(job_id: int) -> StartResult:
+    """
+    Выполнение задачи (синхронный UoW) – вызывается в пуле executor.
+    Для больших задач возвращает id шардов, которые нужно опубликовать.
+    """
+    with profile_queries(f"analysis job {job_id}"):
+        db: Session = SessionLocal()
+        uow = SqlAlchemyUoW(db)
+        svc = AnalysisService(uow)
+
+        try:
+            result = svc.start_job(job_id)
+            uow.commit()
+            if result.deferred:
+                logging.info("analysis job %s deferred: account running limit", job_id)
+            elif result.shard_ids:
+                logging.info("analysis job %s split into %s shards", job_id, len(result.shard_ids))
+            else:
+                logging.info("analysis job %s DONE", job_id)
+            return result
+
+        except Exception as exc:
+            logging.exception("analysis job %s FAILED: %s", job_id, exc)
+            _set_error(uow, job_id, str(exc))
+            return StartResult()
+        finally:
+            db.close()
+
+
+def run_shard_sync(job_id: int, shard_id: int) -> None:
+    with profile_queries(f"analysis job {job_id} shard {shard_id}"):
+        db: Session = SessionLocal()
+        uow = SqlAlchemyUoW(db)
+        svc = AnalysisService(uow)
+
+        try:
+            svc.run_shard(job_id, shard_id)
+            logging.info("analysis job %s shard %s DONE", job_id, shard_id)
+
+        except Exception as exc:
+            # статус шарда и задачи уже проставлен в run_shard
+            logging.exception("analysis job %s shard %s FAILED: %s", job_id, shard_id, exc)
+        finally:
+            db.close()
+
+
+def fail_job_sync(job_id: int, error: str) -> None:
+    db: Session = SessionLocal()
+    try:
+        _set_error(SqlAlchemyUoW(db), job_id, error)
+    finally:
+        db.close()
+
+
+def reap_sync() -> list[tuple[dict, int]]:
+    db: Session = SessionLocal()
+    try:
+        return AnalysisService(SqlAlchemyUoW(db)).reap_expired_leases()
+    finally:
+        db.close()
+
+
+def pending_sync() -> list[tuple[dict, int]]:
+    db: Session = SessionLocal()
+    try:
+        return AnalysisService(SqlAlchemyUoW(db)).pending_messages()
+    finally:
+        db.close()
+
+
+def stream_trends_sync() -> int:
+    db: Session = SessionLocal()
+    try:
+        with profile_queries("stream trends"):
+            return len(StreamTrendService(SqlAlchemyUoW(db)).process())
+    finally:
+        db.close()
+
+
+def ingestion_sync() -> int:
+    db: Session = SessionLocal()
+    try:
+        with profile_queries("ingestion"):
+            runs = IngestionService(SqlAlchemyUoW(db), SOURCE_ADAPTERS).process(limit=INGESTION_SOURCES_PER_TICK)
+            return sum(r.inserted for r in runs)
+    finally:
+        db.close()
+
+
+def _set_error(uow: SqlAlchemyUoW, job_id: int, error: str) -> None:
+    try:
+        uow.rollback()
+        uow.analysis.set_error(job_id, error)
+        uow.commit()
+    except Exception:
+        uow.rollback()
+
+
+async def dispatch(payload: dict[str, Any], queue: JobQueue) -> None:
+    """
+    Обработка одного сообщения: шард, либо задача (сразу, шардирование или отложить).
+    """
+    kind = "shard" if "shard_id" in payload else "job"
+    started = time.perf_counter()
+    try:
+        await _dispatch(payload, queue)
+    finally:
+        QUEUE_MESSAGES.inc(kind=kind)
+        QUEUE_MESSAGE_SECONDS.observe(time.perf_counter() - started, kind=kind)
+
+
+async def _dispatch(payload: dict[str, Any], queue: JobQueue) -> None:
+    job_id = int(payload["job_id"])
+
+    # event loop не блокируется: heartbeat'ы брокера идут, параллельно обрабатываются
+    # до WORKER_CONCURRENCY задач.
+    loop = asyncio.get_running_loop()
+
+    if "shard_id" in payload:
+        await loop.run_in_executor(executor, run_shard_sync, job_id, int(payload["shard_id"]))
+        return
+
+    result = await loop.run_in_executor(executor, run_job_sync, job_id)
+
+    if result.deferred:
+        # повтор через ANALYSIS_DEFER_SECONDS
+        await queue.defer(payload, result.priority, ANALYSIS_DEFER_SECONDS)
+        return
+
+    if not result.shard_ids:
+        return
+
+    # шарды – отдельные сообщения в ту же очередь (с приоритетом задачи):
+    # их разбирают все свободные воркеры
+    errors = await queue.publish_many(
+        [({"job_id": job_id, "shard_id": sid}, result.priority) for sid in result.shard_ids]
+    )
+    failed = next((e for e in errors if e is not None), None)
+    if failed is not None:
+        logging.error("analysis job %s: failed to publish shards: %s", job_id, failed)
+        await loop.run_in_executor(executor, fail_job_sync, job_id, f"mq_publish_error: {failed}")
+
+
+async def reaper_loop(queue: JobQueue) -> None:
+    """
+    Возвращает в очередь задачи и шарды умерших воркеров. Работает в отдельном потоке,
+    а не в executor: пул может быть занят долгими задачами.
+    """
+    while True:
+        await asyncio.sleep(ANALYSIS_REAPER_INTERVAL_SECONDS)
+        try:
+            messages = await asyncio.to_thread(reap_sync)
+            for payload, _ in messages:
+                logging.warning("analysis lease expired, requeue %s", payload)
+            if messages:
+                await queue.publish_many(messages)
+        except Exception as exc:
+            logging.exception("analysis reaper failed: %s", exc)
+
+
+def start_reaper(queue: JobQueue) -> asyncio.Task | None:
+    if ANALYSIS_REAPER_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(reaper_loop(queue))
+
+
+async def stream_trends_loop() -> None:
+    """
+    Онлайн-тренды STREAM-источников: не ждут запуска задачи. Несколько воркеров безопасны –
+    состояние источника берётся под SKIP LOCKED.
+    """
+    while True:
+        await asyncio.sleep(STREAM_TRENDS_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(stream_trends_sync)
+        except Exception as exc:
+            logging.exception("stream trends failed: %s", exc)
+
+
+def start_stream_trends() -> asyncio.Task | None:
+    if STREAM_TRENDS_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(stream_trends_loop())
+
+
+async def ingestion_loop() -> None:
+    """
+    Инкрементальная загрузка источников по расписанию (next_run_at курсора). Несколько воркеров
+    безопасны – курсор источника берётся под SKIP LOCKED.
+    """
+    while True:
+        await asyncio.sleep(INGESTION_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(ingestion_sync)
+        except Exception as exc:
+            logging.exception("ingestion failed: %s", exc)
+
+
+def start_ingestion() -> asyncio.Task | None:
+    if INGESTION_INTERVAL_SECONDS <= 0:
+        return None
+    return asyncio.create_task(ingestion_loop())
+
+
+def shutdown(*tasks: asyncio.Task | None) -> None:
+    for task in tasks:
+        if task:
+            task.cancel()
+    executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+
+from src.app.infra.local_queue import LocalJobQueue
+from src.app.worker.dispatch import (
+    WORKER_CONCURRENCY, dispatch, pending_sync, shutdown, start_ingestion, start_reaper, start_stream_trends,
+)
+
+
+class LocalWorker:
+    """
+    Воркеры в процессе API для QUEUE_BACKEND=local: консьюмеры LocalJobQueue, reaper,
+    онлайн-тренды, инкрементальная загрузка источников и восстановление очереди из БД после рестарта (PENDING задачи и шарды).
+    """
+
+    def __init__(self, queue: LocalJobQueue):
+        self.queue = queue
+        self._reaper: asyncio.Task | None = None
+        self._stream_trends: asyncio.Task | None = None
+        self._ingestion: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        async def _handle(payload: dict) -> None:
+            await dispatch(payload, self.queue)
+
+        self.queue.consume(_handle, WORKER_CONCURRENCY)
+        self._reaper = start_reaper(self.queue)
+        self._stream_trends = start_stream_trends()
+        self._ingestion = start_ingestion()
+
+        messages = await asyncio.to_thread(pending_sync)
+        if messages:
+            logging.info("local queue: requeue %s pending messages", len(messages))
+            await self.queue.publish_many(messages)
+
+    async def stop(self) -> None:
+        await self.queue.stop()
+        shutdown(self._reaper, self._stream_trends, self._ingestion)
@@ -3,45 +3,75 @@ import json
 import logging
 import asyncio
 
-from sqlalchemy.orm import Session
-from faststream.rabbit import RabbitBroker
+from faststream.rabbit import Channel
 from faststream import FastStream
 
-from src.app.infra.db import SessionLocal
-from src.app.infra.uow import SqlAlchemyUoW
-from src.app.services.analysis_service import AnalysisService
+from src.app.core.metrics import start_metrics_server
+from src.app.infra.mq import RabbitJobQueue, analysis_queue, broker, deferred_queue
+from src.app.worker.dispatch import (
+    WORKER_CONCURRENCY, dispatch, shutdown, start_ingestion, start_reaper, start_stream_trends,
+)
 
 logging.basicConfig(level=logging.INFO)
 
-RABBIT_URL = os.getenv("RABBIT_URL")
-QUEUE_NAME = os.getenv("QUEUE_NAME")
+# Сколько сообщений воркер держит неподтверждёнными (по умолчанию = concurrency)
+WORKER_PREFETCH = int(os.getenv("WORKER_PREFETCH", str(WORKER_CONCURRENCY)))
+# Порт, на котором воркер отдаёт /metrics (0 – выключено)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
 
-broker = RabbitBroker(RABBIT_URL)
 app = FastStream(broker)
+queue = RabbitJobQueue(broker)
 
-@broker.subscriber(QUEUE_NAME)
+_reaper_task: asyncio.Task | None = None
+_stream_trends_task: asyncio.Task | None = None
+_ingestion_task: asyncio.Task | None = None
+_metrics_server: asyncio.AbstractServer | None = None
+
+
+@app.after_startup
+async def _declare_deferred_queue() -> None:
+    # у deferred-очереди нет консьюмеров – объявляем сами
+    await broker.declare_queue(deferred_queue)
+
+
+@app.after_startup
+async def _start_reaper() -> None:
+    global _reaper_task
+    _reaper_task = start_reaper(queue)
+
+
+@app.after_startup
+async def _start_stream_trends() -> None:
+    global _stream_trends_task
+    _stream_trends_task = start_stream_trends()
+
+
+@app.after_startup
+async def _start_ingestion() -> None:
+    global _ingestion_task
+    _ingestion_task = start_ingestion()
+
+
+@app.after_startup
+async def _start_metrics() -> None:
+    global _metrics_server
+    _metrics_server = await start_metrics_server(WORKER_METRICS_PORT)
+    if _metrics_server:
+        logging.info("worker metrics on :%s/metrics", WORKER_METRICS_PORT)
+
+
+@broker.subscriber(analysis_queue, channel=Channel(prefetch_count=WORKER_PREFETCH))
 async def handle(body: str) -> None:
-    payload = json.loads(body)
-    job_id = int(payload["job_id"])
-
-    db: Session = SessionLocal()
-    uow = SqlAlchemyUoW(db)
-    svc = AnalysisService(uow)
-
-    try:
-        svc.run_job(job_id)
-        uow.commit()
-        logging.info("analysis job %s DONE", job_id)
-
-    except Exception as exc:
-        logging.exception("analysis job %s FAILED: %s", job_id, exc)
-        try:
-            uow.analysis.set_error(job_id, str(exc))
-            uow.commit()
-        except Exception:
-            uow.rollback()
-    finally:
-        db.close()
+    # ack уходит только после завершения задачи
+    await dispatch(json.loads(body), queue)
+
+
+@app.after_shutdown
+async def _shutdown_executor() -> None:
+    if _metrics_server:
+        _metrics_server.close()
+    shutdown(_reaper_task, _stream_trends_task, _ingestion_task)
+
 
 if __name__ == "__main__":
-    asyncio.run(app.run())
\ No newline at end of file
+    asyncio.run(app.run())